@@ -0,0 +1,231 @@
+# benchmarks/bench_geojson.py
+"""
+Response serialization benchmark for /api/crimes/all
+
+Times turning a page of crimes rows (already read from SQLite) into the
+response body:
+
+    legacy             df.iterrows() + per-row pd.notna/float/district
+                       lookup + jsonify (the serializer before the
+                       columnar one)
+    columnar-json      api.geojson.crime_features + standard json
+    columnar-orjson    api.geojson.crime_features + orjson (if installed)
+    arrow              api.formats Arrow IPC stream (if pyarrow installed)
+    fgb                api.formats FlatGeobuf (if pyogrio installed)
+
+and reports rows/s, body size and the time a Python client takes to
+decode each body. The rows come from a synthetic database built in a
+scratch directory, or from --db.
+
+    python benchmarks/bench_geojson.py --rows 50000
+    python benchmarks/bench_geojson.py --db data/processed/crimes_clean.db
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import setup_database  # noqa: E402
+from api import formats, geojson  # noqa: E402
+from api.main import DISTRICT_NAMES, app  # noqa: E402
+from bench_ingest import RESULTS_DIR, git_commit  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+
+def legacy_district_name(district_num):
+    """The per-row district lookup the legacy serializer called"""
+    district_str = str(district_num)
+    return DISTRICT_NAMES.get(district_str, f"District {district_str}")
+
+
+def legacy_body(df):
+    """The row-by-row serializer /api/crimes/all used before api.geojson"""
+    features = []
+    for _, row in df.iterrows():
+        if pd.notna(row["latitude"]) and pd.notna(row["longitude"]):
+            district_name = legacy_district_name(row.get("district", "Unknown"))
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [
+                            float(row["longitude"]),
+                            float(row["latitude"]),
+                        ],
+                    },
+                    "properties": {
+                        "id": int(row["id"]),
+                        "date": str(row["date"]),
+                        "crime_type": row["crime_type"],
+                        "description": row.get("description", ""),
+                        "district": district_name,
+                        "district_num": str(row.get("district", "")),
+                        "case_number": row.get("case_number", ""),
+                    },
+                }
+            )
+    return jsonify({"type": "FeatureCollection", "features": features}).get_data()
+
+
+def columnar_body(df, use_orjson):
+    """api.geojson's serializer with the chosen JSON backend"""
+    has_orjson = geojson.HAS_ORJSON
+    geojson.HAS_ORJSON = use_orjson
+    try:
+        features = geojson.crime_features(df, DISTRICT_NAMES)
+        return geojson.dumps({"type": "FeatureCollection", "features": features})
+    finally:
+        geojson.HAS_ORJSON = has_orjson
+
+
+def arrow_body(df):
+    return b"".join(formats.arrow_stream([df], DISTRICT_NAMES))
+
+
+def decode_arrow(body):
+    return formats.pa.ipc.open_stream(body).read_all()
+
+
+def decode_fgb(body):
+    return formats.pyogrio.raw.read(io.BytesIO(body))
+
+
+def build_database(path, rows, seed):
+    """Synthetic crimes database with `rows` records"""
+    setup_database.DB_PATH = path
+    setup_database.create_database()
+    chunks = setup_database.synthetic_chicago_data(limit=rows, seed=seed)
+    setup_database.load_database(setup_database.clean_chunks(chunks))
+
+
+def read_page(db_path, limit):
+    """The rows /api/crimes/all?limit=N serializes"""
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT * FROM crimes ORDER BY date DESC LIMIT ?", conn, params=[limit]
+        )
+
+
+def best_time(function, argument, repeat):
+    """Best wall time over `repeat` runs, and the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(df, repeat):
+    # name → (serializer, client-side decoder)
+    serializers = {
+        "legacy": (legacy_body, json.loads),
+        "columnar-json": (
+            lambda page: columnar_body(page, use_orjson=False),
+            json.loads,
+        ),
+    }
+    if geojson.HAS_ORJSON:
+        serializers["columnar-orjson"] = (
+            lambda page: columnar_body(page, use_orjson=True),
+            json.loads,
+        )
+    if formats.HAS_PYARROW:
+        serializers["arrow"] = (arrow_body, decode_arrow)
+    if formats.HAS_PYOGRIO:
+        serializers["fgb"] = (
+            lambda page: formats.flatgeobuf([page], DISTRICT_NAMES),
+            decode_fgb,
+        )
+
+    results = {}
+    with app.app_context():
+        for name, (serialize, decode) in serializers.items():
+            seconds, body = best_time(serialize, df, repeat)
+            decode_seconds, _ = best_time(decode, body, repeat)
+            results[name] = {
+                "seconds": round(seconds, 4),
+                "rows_per_s": round(len(df) / seconds),
+                "bytes": len(body),
+                "decode_seconds": round(decode_seconds, 4),
+            }
+            print(
+                f"  {name:<16} {seconds * 1000:8.1f} ms "
+                f"{len(df) / seconds:>12,.0f} rows/s {len(body) / 2**20:7.1f} MB "
+                f"decode {decode_seconds * 1000:7.1f} ms"
+            )
+
+    legacy = results["legacy"]["seconds"]
+    for name, result in results.items():
+        result["speedup"] = round(legacy / result["seconds"], 1)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--rows", type=int, default=50000, help="Page size")
+    parser.add_argument("--db", default=None, help="Existing crimes database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("RESPONSE SERIALIZATION BENCHMARK")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(scratch, "crimes_clean.db")
+            build_database(db_path, args.rows, args.seed)
+        df = read_page(db_path, args.rows)
+
+    print(f"\nSerializing {len(df):,} rows (best of {args.repeat}):")
+    results = bench(df, args.repeat)
+
+    commit = git_commit()
+    report = {
+        "benchmark": "geojson",
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "orjson": geojson.HAS_ORJSON,
+            "pyarrow": formats.HAS_PYARROW,
+            "pyogrio": formats.HAS_PYOGRIO,
+            "platform": platform.platform(),
+        },
+        "config": {"rows": len(df), "repeat": args.repeat},
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"geojson-{commit or 'local'}-{datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
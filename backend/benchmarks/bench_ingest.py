@@ -0,0 +1,470 @@
+# benchmarks/bench_ingest.py
+"""
+Ingestion benchmark: download → parse → clean → load → index, per stage
+
+Serves a synthetic dataset from a local stand-in for the Socrata endpoint,
+then runs each pipeline stage on it and records wall time, rows/s, peak
+RSS and database size. Every stage runs in a fresh process, so its peak
+RSS is its own. Results are written as JSON; pass --compare with an
+earlier results file to fail on throughput regressions.
+
+    python benchmarks/bench_ingest.py --sizes 100k 1m 10m
+    python benchmarks/bench_ingest.py --sizes 100k --compare results/base.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+
+import setup_database  # noqa: E402
+from database.migrations import (  # noqa: E402
+    GRID_INDEXES,
+    QUERY_INDEXES,
+    analyze,
+    migrate,
+)
+from utils.csv_reader import HAS_PYARROW, read_crime_csv  # noqa: E402
+from utils.data_collector import ChicagoCrimeCollector  # noqa: E402
+from utils.synthetic_generator import (  # noqa: E402
+    SyntheticCrimeGenerator,
+    to_socrata_csv,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+STAGES = ["download", "parse", "clean", "load", "index"]
+
+# Secondary indexes rebuilt by the index stage
+TIME_INDEXES = {
+    "idx_epoch_hour": "ON crimes(epoch, crime_type, hour)",
+    "idx_epoch_weekday": "ON crimes(epoch, weekday, hour)",
+}
+
+# Fail --compare when a stage's rows/s drops by more than this share
+REGRESSION_THRESHOLD = 0.20
+
+
+# ==================== STAND-IN SOCRATA SERVER ====================
+
+
+class StandInDataset:
+    """A synthetic CSV on disk plus the byte offset of every row"""
+
+    def __init__(self, path, rows, seed=42, chunksize=250000):
+        self.path = path
+        generator = SyntheticCrimeGenerator(rows, seed=seed)
+        row_ends = []
+
+        with open(path, "wb") as f:
+            for i, chunk in enumerate(generator.iter_chunks(chunksize)):
+                text = to_socrata_csv(chunk).to_csv(index=False, header=i == 0)
+                data = text.encode()
+                if i == 0:
+                    self.header = data[: data.index(b"\n") + 1]
+                    data = data[len(self.header) :]
+                    base = len(self.header)
+                    f.write(self.header)
+                # One newline per record - generated fields never contain one
+                ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10) + 1
+                row_ends.append(ends + base)
+                base += len(data)
+                f.write(data)
+
+        self.row_ends = np.concatenate(row_ends) if row_ends else np.array([], int)
+        self.rows = len(self.row_ends)
+        self.size = os.path.getsize(path)
+
+    def byte_range(self, offset, limit):
+        """File byte range holding rows offset..offset+limit-1"""
+        offset = min(offset, self.rows)
+        stop = min(offset + limit, self.rows)
+        start = len(self.header) if offset == 0 else int(self.row_ends[offset - 1])
+        end = start if stop == offset else int(self.row_ends[stop - 1])
+        return start, end
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves $offset/$limit pages of the dataset in file order"""
+
+    dataset = None
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        offset = int(params.get("$offset", ["0"])[0])
+        limit = int(params.get("$limit", ["1000"])[0])
+        start, end = self.dataset.byte_range(offset, limit)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(self.dataset.header) + end - start))
+        self.end_headers()
+        self.wfile.write(self.dataset.header)
+        with open(self.dataset.path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining:
+                block = f.read(min(remaining, 1 << 20))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(dataset):
+    """Start the stand-in server on a free port; returns (server, url)"""
+    handler = type("Handler", (StandInHandler,), {"dataset": dataset})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_port}/resource/ijzp-q8t2.csv"
+
+
+# ==================== STAGES (one process each) ====================
+
+
+def peak_rss_mb():
+    """Peak RSS of this process or any worker it spawned, in MB
+
+    VmHWM starts afresh at exec, while ru_maxrss would still include the
+    parent's peak from before the stage process was started.
+    """
+    peak_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    peak_kb = max(peak_kb, int(line.split()[1]))
+    except OSError:
+        peak_kb = max(peak_kb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    return peak_kb / 1024
+
+
+def timed(iterable, timer):
+    """Yield from iterable, adding the time spent producing items to timer[0]"""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        timer[0] += time.perf_counter() - start
+        yield item
+
+
+def parsed_chunks(config, timer):
+    """Parse every downloaded page into raw chunks"""
+    for page in config["pages"]:
+        yield from timed(
+            read_crime_csv(
+                page,
+                chunksize=config["chunksize"],
+                columns=setup_database.RAW_COLUMNS,
+            ),
+            timer,
+        )
+
+
+def cleaned_chunks(config, timer):
+    """Parse and clean, adding only the cleaning time to timer[0]"""
+    parse_timer = [0.0]
+    chunks = setup_database.CLEANER.clean_chunks(
+        parsed_chunks(config, parse_timer), workers=config["clean_workers"]
+    )
+    for chunk in timed(chunks, timer):
+        yield chunk
+    # Waiting on the pool also pulls and parses the next chunk
+    timer[0] -= parse_timer[0]
+
+
+def stage_download(config):
+    collector = ChicagoCrimeCollector(
+        data_dir=config["work_dir"],
+        base_url=config["url"],
+        workers=config["download_workers"],
+        page_size=config["page_size"],
+    )
+    start = time.perf_counter()
+    pages = collector.download_pages(config["rows"], run_name="bench")
+    seconds = time.perf_counter() - start
+
+    rows = sum(collector._count_rows(p) for p in pages)
+    size = sum(os.path.getsize(p) for p in pages)
+    return {"seconds": seconds, "rows": rows, "bytes": size, "pages": pages}
+
+
+def stage_parse(config):
+    timer = [0.0]
+    rows = sum(len(chunk) for chunk in parsed_chunks(config, timer))
+    return {"seconds": timer[0], "rows": rows}
+
+
+def stage_clean(config):
+    timer = [0.0]
+    rows = sum(len(chunk) for chunk in cleaned_chunks(config, timer))
+    return {"seconds": timer[0], "rows": rows}
+
+
+def stage_load(config):
+    """Upsert cleaned chunks into a fresh database with the full schema"""
+    db_path = config["db_path"]
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    migrate(conn, verbose=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+    seconds, rows = 0.0, 0
+    try:
+        for chunk in cleaned_chunks(config, [0.0]):
+            start = time.perf_counter()
+            setup_database.insert_chunk(conn, chunk)
+            seconds += time.perf_counter() - start
+            rows += len(chunk)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return {"seconds": seconds, "rows": rows, "db_size_mb": file_mb(db_path)}
+
+
+def stage_index(config):
+    """Rebuild every secondary index on the loaded table, then ANALYZE"""
+    db_path = config["db_path"]
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    indexes = {**QUERY_INDEXES, **TIME_INDEXES, **GRID_INDEXES}
+    try:
+        for name in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("VACUUM")
+        without = file_mb(db_path)
+
+        start = time.perf_counter()
+        for name, definition in indexes.items():
+            conn.execute(f"CREATE INDEX {name} {definition}")
+        analyze(conn)
+        seconds = time.perf_counter() - start
+        rows = conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        "seconds": seconds,
+        "rows": rows,
+        "db_size_mb": file_mb(db_path),
+        "index_size_mb": file_mb(db_path) - without,
+    }
+
+
+def file_mb(path):
+    """Size of a database including its WAL, in MB"""
+    total = 0
+    for suffix in ("", "-wal"):
+        if os.path.exists(path + suffix):
+            total += os.path.getsize(path + suffix)
+    return total / (1024 * 1024)
+
+
+def _run_stage(name, config, queue):
+    """Child process entry point: run one stage and report peak RSS"""
+    try:
+        result = globals()[f"stage_{name}"](config)
+        result["peak_rss_mb"] = peak_rss_mb()
+        queue.put(result)
+    except Exception as e:  # reported back to the parent
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_stage(name, config):
+    """Run one stage in a fresh process so its peak RSS is its own"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(name, config, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if "error" in result:
+        raise RuntimeError(f"{name} stage failed: {result['error']}")
+
+    seconds = result["seconds"]
+    result["rows_per_s"] = result["rows"] / seconds if seconds else 0
+    return result
+
+
+# ==================== DRIVER ====================
+
+
+def bench_size(label, rows, args):
+    """Run every stage on one dataset size"""
+    work_dir = tempfile.mkdtemp(prefix=f"bench_ingest_{label}_", dir=args.work_dir)
+    try:
+        print(f"\n{label}: generating {rows:,} synthetic records...")
+        start = time.perf_counter()
+        dataset = StandInDataset(os.path.join(work_dir, "source.csv"), rows, args.seed)
+        print(
+            f"  ✓ {dataset.size / (1024 * 1024):,.1f} MB source "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+        httpd, url = serve(dataset)
+        config = {
+            "rows": rows,
+            "url": url,
+            "work_dir": work_dir,
+            "db_path": os.path.join(work_dir, "crimes_clean.db"),
+            "chunksize": args.chunk_size,
+            "page_size": args.page_size,
+            "download_workers": args.workers,
+            "clean_workers": args.clean_workers,
+        }
+
+        results = {}
+        try:
+            for stage in STAGES:
+                result = run_stage(stage, config)
+                if stage == "download":
+                    config["pages"] = result.pop("pages")
+                results[stage] = result
+                print(
+                    f"  {stage:<9} {result['rows']:>11,} rows "
+                    f"{result['seconds']:>8.2f}s {result['rows_per_s']:>12,.0f} rows/s "
+                    f"peak RSS {result['peak_rss_mb']:>6.0f} MB"
+                )
+        finally:
+            httpd.shutdown()
+
+        print(f"  ✓ Database: {results['index']['db_size_mb']:,.1f} MB")
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Return the stages whose rows/s fell by more than `threshold`"""
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, result in stages.items():
+            before = baseline.get("results", {}).get(size, {}).get(stage)
+            if not before or not before.get("rows_per_s"):
+                continue
+            change = result["rows_per_s"] / before["rows_per_s"] - 1
+            if change < -threshold:
+                regressions.append((size, stage, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingest pipeline")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=list(SIZES),
+        help="Dataset sizes: 100k, 1m, 10m or a row count",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=setup_database.CHUNK_SIZE)
+    parser.add_argument("--page-size", type=int, default=setup_database.PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=setup_database.DOWNLOAD_WORKERS)
+    parser.add_argument(
+        "--clean-workers", type=int, default=setup_database.CLEAN_WORKERS
+    )
+    parser.add_argument("--work-dir", default=None, help="Scratch directory")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="Allowed rows/s drop before --compare fails (0.2 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("INGEST BENCHMARK")
+    print("=" * 60)
+
+    results = {}
+    for label in args.sizes:
+        rows = SIZES.get(label.lower()) or int(label)
+        results[label] = bench_size(label, rows, args)
+
+    commit = git_commit()
+    report = {
+        "benchmark": "ingest",
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "pyarrow": HAS_PYARROW,
+            "cpus": os.cpu_count(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "seed": args.seed,
+            "chunk_size": args.chunk_size,
+            "page_size": args.page_size,
+            "download_workers": args.workers,
+            "clean_workers": args.clean_workers,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"ingest-{commit or 'local'}-{datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        against = baseline.get("commit")
+        regressions = compare(report, baseline, args.threshold)
+        for size, stage, change in regressions:
+            print(f"✗ {size} {stage}: rows/s {change:+.0%} vs {against}")
+        if regressions:
+            return 1
+        print(f"✓ No stage slower than -{args.threshold:.0%} vs {against}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
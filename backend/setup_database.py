@@ -2,148 +2,527 @@
 Chicago Crime Database Setup
 Integrates with existing main.py and analysis scripts
 Downloads data from Chicago Data Portal and creates crimes_clean.db
+
+The pipeline streams download → clean → load one chunk at a time, so
+memory stays flat no matter how many records are ingested.
 """
 
+import argparse
+import itertools
+import resource
 import sqlite3
+import sys
+import time
 import pandas as pd
 import os
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from database.migrations import (  # noqa: E402
+    analyze,
+    drop_sync_triggers,
+    migrate,
+    optimize,
+    search_index,
+    spatial_index,
+)
+from database.generation import bump_generation  # noqa: E402
+from database.shards import write_shards  # noqa: E402
+from database.tiles import write_tiles  # noqa: E402
+from database.summaries import (  # noqa: E402
+    SUMMARY_TABLES,
+    rebuild_summaries,
+    refresh_summaries,
+    take_replaced_days,
+    track_replaced_days,
+)
+from utils.csv_reader import format_socrata_timestamp, read_crime_csv  # noqa: E402
+from utils.data_cleaner import ChicagoCrimeDataCleaner  # noqa: E402
+from utils.data_collector import (  # noqa: E402
+    DEFAULT_BASE_URL,
+    DEFAULT_ORDER,
+    ChicagoCrimeCollector,
+)
+from utils.synthetic_generator import SyntheticCrimeGenerator  # noqa: E402
 
 # Match your main.py configuration
 DB_PATH = "data/processed/crimes_clean.db"
-CHICAGO_API_URL = "https://data.cityofchicago.org/resource/ijzp-q8t2.csv"
+CHICAGO_API_URL = DEFAULT_BASE_URL
+
+# Parallel download configuration - pages are checkpointed here until loaded
+PAGES_DIR = "data/raw"
+DOWNLOAD_WORKERS = 4
+PAGE_SIZE = 50000
+
+# Streaming configuration
+MEMORY_BUDGET_MB = int(os.environ.get("INGEST_MEMORY_BUDGET_MB", 512))
+CHUNK_SIZE = 50000
+INSERT_BATCH_SIZE = 5000
+
+# Cleaning runs on a process pool; chunks come back in download order
+CLEAN_WORKERS = os.cpu_count() or 1
+CLEANER = ChicagoCrimeDataCleaner(
+    derived=False, text_dates=True, time_buckets=True, grid_cells=True
+)
+
+# Rough in-memory cost of one raw Socrata row in pandas (22 mostly-object columns)
+BYTES_PER_RAW_ROW = 2048
+
+# Raw dataset columns the pipeline reads - everything else is skipped at parse time
+RAW_COLUMNS = [
+    "case_number",
+    "date",
+    "primary_type",
+    "location_description",
+    "latitude",
+    "longitude",
+    "district",
+    "ward",
+    "beat",
+]
+
+# Columns written to the crimes table, in insert order
+INSERT_COLUMNS = [
+    "case_number",
+    "date",
+    "crime_type",
+    "description",
+    "latitude",
+    "longitude",
+    "district",
+    "ward",
+    "beat",
+    "year_month",
+    "epoch",
+    "hour",
+    "weekday",
+    "iso_week",
+    "cell_coarse",
+    "cell_medium",
+    "cell_fine",
+]
+
+
+def current_rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return peak_rss_mb()
 
 
-def create_database():
-    """Create database matching main.py schema"""
-    print("Creating database schema...")
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
-    os.makedirs("data/processed", exist_ok=True)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def chunk_size_for_budget(memory_budget_mb):
+    """Pick a chunk size that keeps a few chunks in flight within the budget"""
+    # Download, clean and load each hold at most one chunk, plus pandas
+    # temporaries while cleaning - reserve a quarter of the budget per chunk.
+    rows = int(memory_budget_mb * 1024 * 1024 * 0.25 / BYTES_PER_RAW_ROW)
+    return max(1000, min(rows, 250000))
 
-    # Drop if exists
-    cursor.execute("DROP TABLE IF EXISTS crimes")
-
-    # Schema matching your main.py expectations
-    cursor.execute("""
-        CREATE TABLE crimes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            case_number TEXT,
-            date TEXT NOT NULL,
-            crime_type TEXT NOT NULL,
-            description TEXT,
-            latitude REAL NOT NULL,
-            longitude REAL NOT NULL,
-            district TEXT,
-            ward TEXT,
-            beat TEXT,
-            year_month TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
 
-    # Indexes for your API queries
-    cursor.execute("CREATE INDEX idx_crime_type ON crimes(crime_type)")
-    cursor.execute("CREATE INDEX idx_date ON crimes(date)")
-    cursor.execute("CREATE INDEX idx_location ON crimes(latitude, longitude)")
-    cursor.execute("CREATE INDEX idx_year_month ON crimes(year_month)")
-    cursor.execute("CREATE INDEX idx_district ON crimes(district)")
+class StageStats:
+    """Rows and wall time per pipeline stage"""
 
-    conn.commit()
-    conn.close()
+    def __init__(self):
+        self.stages = {}
+        self.dropped = 0
+        self.peak_rss_mb = 0.0
 
-    print(f"✓ Database created: {DB_PATH}")
+    def record(self, stage, rows, seconds):
+        entry = self.stages.setdefault(stage, {"rows": 0, "seconds": 0.0})
+        entry["rows"] += rows
+        entry["seconds"] += seconds
 
+    def seconds(self, stage):
+        return self.stages.get(stage, {}).get("seconds", 0.0)
 
-def download_chicago_data(limit=50000):
-    """Download from Chicago Data Portal"""
-    print(f"\nDownloading {limit} Chicago crime records...")
-    print("This takes 30-60 seconds...")
+    def sample_memory(self):
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
 
-    try:
-        # Build URL - use %20 for space in URL encoding
-        url = f"{CHICAGO_API_URL}?$limit={limit}&$order=date%20DESC"
+    def report(self, memory_budget_mb=MEMORY_BUDGET_MB):
+        print(f"\n{'Stage':<10} {'Rows':>12} {'Seconds':>10} {'Rows/s':>12}")
+        print("-" * 47)
+        for stage, entry in self.stages.items():
+            rate = entry["rows"] / entry["seconds"] if entry["seconds"] else 0
+            print(
+                f"{stage:<10} {entry['rows']:>12,} "
+                f"{entry['seconds']:>10.2f} {rate:>12,.0f}"
+            )
+        print(f"\nDropped invalid records: {self.dropped:,}")
 
-        print(f"Fetching: {url[:100]}...")
-        df = pd.read_csv(url)
+        peak = max(self.peak_rss_mb, peak_rss_mb())
+        status = "✓" if peak <= memory_budget_mb else "⚠"
+        print(f"{status} Peak RSS: {peak:.0f} MB (budget {memory_budget_mb} MB)")
 
-        print(f"✓ Downloaded {len(df)} records")
-        return df
 
-    except Exception as e:
-        print(f"✗ Download error: {e}")
-        return None
+def create_database(rebuild=False):
+    """Create database matching main.py schema
 
+    Existing tables are kept unless rebuild=True, so incremental refreshes
+    never take the API offline. Either way the schema is migrated to the
+    current version (see src/database/migrations.py).
+    """
+    print("Creating database schema...")
 
-def clean_data(df):
-    """Clean and format data for your schema"""
-    print("\nCleaning data...")
+    os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
 
-    original = len(df)
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
 
-    # Column mapping to your schema
-    rename_map = {"primary_type": "crime_type", "location_description": "description"}
+    if rebuild:
+        cursor.execute("DROP TABLE IF EXISTS crimes")
+        cursor.execute("DROP TABLE IF EXISTS ingest_state")
+        for table in [*SUMMARY_TABLES, "crimes_rtree", "crimes_fts"]:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute("PRAGMA user_version = 0")
 
-    df = df.rename(columns=rename_map)
+    version = migrate(conn)
+    conn.close()
 
-    # Required columns only
-    keep_cols = [
-        "case_number",
-        "date",
-        "crime_type",
-        "description",
-        "latitude",
-        "longitude",
-        "district",
-        "ward",
-        "beat",
-    ]
+    print(f"✓ Database ready: {DB_PATH} (schema v{version})")
 
-    available = [c for c in keep_cols if c in df.columns]
-    df = df[available]
 
-    # Remove nulls
-    df = df.dropna(subset=["latitude", "longitude", "date", "crime_type"])
-    print(f"  Removed {original - len(df)} invalid records")
+def get_watermark(conn):
+    """Return the last ingested (date, case_number), or None before the first load"""
+    rows = dict(
+        conn.execute(
+            "SELECT key, value FROM ingest_state WHERE key IN (?, ?)",
+            ("watermark_date", "watermark_case_number"),
+        ).fetchall()
+    )
+    if "watermark_date" not in rows:
+        return None
+    return rows["watermark_date"], rows.get("watermark_case_number") or ""
+
+
+def chunk_watermark(chunk, current=None):
+    """Highest (date, case_number) in a raw chunk, never moving backwards"""
+    dated = chunk.dropna(subset=["date"])
+    if dated.empty:
+        return current
+
+    max_date = dated["date"].max()
+    latest = dated.loc[dated["date"] == max_date, "case_number"].dropna()
+    mark = (
+        format_socrata_timestamp(max_date),
+        str(latest.max()) if len(latest) else "",
+    )
+
+    if current is not None and current >= mark:
+        return current
+    return mark
+
+
+def soql_literal(value):
+    """SoQL string literal for `value`: single-quoted, embedded quotes doubled"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_download_query(since=None):
+    """Socrata $where/$order for the newest records, or records after a watermark"""
+    if since is None:
+        return None, DEFAULT_ORDER
+
+    # Oldest-first so a truncated run still advances the watermark safely.
+    # The watermark comes from downloaded data, so it is quoted, never trusted
+    date, case_number = map(soql_literal, since)
+    where = f"date > {date} OR (date = {date} AND case_number > {case_number})"
+    return where, "date ASC, case_number ASC"
+
+
+def download_chicago_data(
+    limit=50000,
+    chunksize=CHUNK_SIZE,
+    stats=None,
+    since=None,
+    workers=DOWNLOAD_WORKERS,
+    page_size=PAGE_SIZE,
+):
+    """Stream records from Chicago Data Portal in fixed-size chunks
+
+    Pages are fetched in parallel and checkpointed under PAGES_DIR, so an
+    interrupted run resumes from the first missing page. With ``since`` set
+    to a (date, case_number) watermark only newer records are fetched.
+    Every chunk carries the watermark reached so far in
+    ``chunk.attrs["watermark"]``.
+    """
+    if since is None:
+        print(f"\nDownloading {limit} Chicago crime records...")
+    else:
+        print(f"\nDownloading up to {limit} records newer than {since[0]}...")
+    print(f"Fetching {page_size:,}-row pages with {workers} workers")
+    print(f"Streaming in chunks of {chunksize:,} rows")
+
+    collector = ChicagoCrimeCollector(
+        data_dir=PAGES_DIR,
+        base_url=CHICAGO_API_URL,
+        workers=workers,
+        page_size=page_size,
+    )
+    where, order = build_download_query(since)
+    pages = collector.iter_pages(limit, where=where, order=order, run_name="ingest")
+
+    watermark = since
+    while True:
+        start = time.perf_counter()
+        try:
+            page = next(pages)
+        except StopIteration:
+            break
+        waited = time.perf_counter() - start
+
+        reader = read_crime_csv(page, chunksize=chunksize, columns=RAW_COLUMNS)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                break
+            if stats is not None:
+                elapsed = waited + time.perf_counter() - start
+                stats.record("download", len(chunk), elapsed)
+            waited = 0.0
+
+            watermark = chunk_watermark(chunk, watermark)
+            chunk.attrs["watermark"] = watermark
+            yield chunk
+
+    # Every chunk has been loaded by now - the checkpoint is no longer needed
+    collector.clear_pages("ingest")
+
+
+def synthetic_chicago_data(limit=50000, chunksize=CHUNK_SIZE, stats=None, seed=42):
+    """Stream seeded synthetic records in place of the portal download
+
+    Same chunks and watermark attrs as download_chicago_data, so the rest
+    of the pipeline runs unchanged - offline, and at any volume.
+    """
+    print(f"\nGenerating {limit:,} synthetic crime records (seed {seed})...")
+    print(f"Streaming in chunks of {chunksize:,} rows")
+
+    generator = SyntheticCrimeGenerator(limit, seed=seed)
+    chunks = generator.iter_chunks(chunksize)
+
+    watermark = None
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        # Recorded as the download stage so clean timings stay comparable
+        if stats is not None:
+            stats.record("download", len(chunk), time.perf_counter() - start)
+
+        watermark = chunk_watermark(chunk, watermark)
+        chunk.attrs["watermark"] = watermark
+        yield chunk
 
-    # Validate Chicago bounds
-    df = df[
-        (df["latitude"] >= 41.64)
-        & (df["latitude"] <= 42.02)
-        & (df["longitude"] >= -87.94)
-        & (df["longitude"] <= -87.52)
-    ]
 
-    # Format dates
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
+def clean_data(df):
+    """Clean and format one chunk of data for your schema"""
+    return CLEANER.clean_chunk(df)
+
+
+def clean_chunks(chunks, stats=None, workers=CLEAN_WORKERS):
+    """Clean downloaded chunks as they arrive, spread over `workers` processes"""
+    raw_rows = 0
+
+    def counted(chunks):
+        nonlocal raw_rows
+        for chunk in chunks:
+            raw_rows += len(chunk)
+            yield chunk
+
+    cleaned_rows = 0
+    cleaned_chunks = CLEANER.clean_chunks(counted(chunks), workers=workers)
+    while True:
+        # Waiting on a result also pulls the next download - don't count that twice
+        start = time.perf_counter()
+        downloading = stats.seconds("download") if stats is not None else 0.0
+        try:
+            cleaned = next(cleaned_chunks)
+        except StopIteration:
+            break
+        if stats is not None:
+            elapsed = time.perf_counter() - start
+            downloaded = stats.seconds("download") - downloading
+            stats.record("clean", len(cleaned), max(0.0, elapsed - downloaded))
+        cleaned_rows += len(cleaned)
+
+        # Empty chunks still move the watermark past rejected records
+        yield cleaned
+
+    if stats is not None:
+        stats.dropped += raw_rows - cleaned_rows
+
+
+def insert_chunk(conn, df, batch_size=INSERT_BATCH_SIZE, summaries=True):
+    """Upsert one cleaned chunk with batched executemany in one transaction
+
+    Rows are keyed on case_number, so a corrected record replaces the copy
+    already stored instead of duplicating it. The chunk's watermark is
+    saved in the same transaction, so it only advances with committed rows.
+    With `summaries`, the aggregate tables are refreshed for every day the
+    chunk touched in that transaction too.
+
+    Returns the set of days ('YYYY-MM-DD') the chunk touched.
+    """
+    columns = [c for c in INSERT_COLUMNS if c in df.columns]
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "case_number")
+    sql = (
+        f"INSERT INTO crimes ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT(case_number) DO UPDATE SET {updates}"
+    )
+
+    # tolist() hands sqlite3 native Python values instead of numpy scalars
+    rows = zip(*(df[c].tolist() for c in columns))
+    watermark = df.attrs.get("watermark")
+    if summaries:
+        track_replaced_days(conn)
+
+    conn.execute("BEGIN")
+    try:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            conn.executemany(sql, batch)
+
+        days = set(df["date"].dropna().str[:10])
+        if summaries:
+            days |= take_replaced_days(conn)
+            refresh_summaries(conn, days)
+
+        if watermark is not None:
+            conn.executemany(
+                """
+                INSERT INTO ingest_state (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                [
+                    ("watermark_date", watermark[0]),
+                    ("watermark_case_number", watermark[1]),
+                ],
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return days
+
+
+def rebuild_derived(conn, stats=None):
+    """Recompute the summary tables, R*Tree and FTS index from crimes"""
+    start = time.perf_counter()
+    conn.execute("BEGIN")
+    try:
+        rebuild_summaries(conn)
+        spatial_index(conn)
+        search_index(conn)
+        conn.execute("DELETE FROM ingest_state WHERE key = 'rebuild_pending'")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if stats is not None:
+        stats.record("derived", 0, time.perf_counter() - start)
+
+
+def load_database(
+    chunks, stats=None, memory_budget_mb=MEMORY_BUDGET_MB, bulk=True, days=None
+):
+    """Load cleaned chunks into crimes_clean.db
+
+    A bulk (full) load rebuilds the summary tables, the R*Tree and the FTS
+    index in one pass at the end and runs a full ANALYZE. An incremental
+    load refreshes the summaries per chunk for the days it touched, then
+    PRAGMA optimize (re-analyzes only tables that changed a lot). Pass a set
+    as `days` to collect the touched days.
+    """
+    print("\nLoading to database...")
 
-    # Add year_month for your API
-    df["year_month"] = df["date"].dt.strftime("%Y-%m")
-    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    # Autocommit mode so every chunk runs in an explicit BEGIN/COMMIT
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
 
-    # Fill nulls
-    df["crime_type"] = df["crime_type"].fillna("UNKNOWN")
-    df["district"] = df["district"].astype(str).fillna("0")
-    df["description"] = df["description"].fillna("")
+    loaded = 0
+    try:
+        if bulk:
+            # Per-row R*Tree/FTS triggers would triple the load time; the
+            # indexes are rebuilt in one pass at the end instead
+            drop_sync_triggers(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_state VALUES ('rebuild_pending', '1')"
+            )
+        elif conn.execute(
+            "SELECT 1 FROM ingest_state WHERE key = 'rebuild_pending'"
+        ).fetchone():
+            print("  ⚠ Previous full load was interrupted - rebuilding indexes")
+            rebuild_derived(conn, stats)
+
+        for chunk in chunks:
+            start = time.perf_counter()
+            touched = insert_chunk(conn, chunk, summaries=not bulk)
+            if days is not None:
+                days |= touched
+            loaded += len(chunk)
+            if stats is not None:
+                stats.record("load", len(chunk), time.perf_counter() - start)
+                stats.sample_memory()
+            del chunk
+
+            rss_mb = current_rss_mb()
+            print(f"  Loaded {loaded:,} rows (RSS {rss_mb:.0f} MB)")
+            if rss_mb > memory_budget_mb:
+                print(
+                    f"  ⚠ RSS {rss_mb:.0f} MB exceeds budget of "
+                    f"{memory_budget_mb} MB - lower --chunk-size"
+                )
+
+        if bulk:
+            rebuild_derived(conn, stats)
+
+        # Cached API responses computed before this load are now stale
+        bump_generation(conn)
+
+        start = time.perf_counter()
+        if bulk:
+            analyze(conn)
+        else:
+            optimize(conn)
+        if stats is not None:
+            stats.record("analyze", 0, time.perf_counter() - start)
+    finally:
+        conn.close()
 
-    print(f"✓ Cleaned: {len(df)} valid records")
+    return loaded
 
-    return df
 
+def read_watermark():
+    """Watermark stored in crimes_clean.db, or None if nothing was ingested yet"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return get_watermark(conn)
+    finally:
+        conn.close()
 
-def load_database(df):
-    """Load into crimes_clean.db"""
-    print("\nLoading to database...")
 
+def print_database_summary():
+    """Print record counts and date range of the loaded database"""
     conn = sqlite3.connect(DB_PATH)
 
     try:
-        df.to_sql("crimes", conn, if_exists="append", index=False)
-
-        # Stats
         cursor = conn.cursor()
 
         cursor.execute("SELECT COUNT(*) FROM crimes")
@@ -163,9 +542,6 @@ def load_database(df):
         print(f"Date range: {dates[0]} → {dates[1]}")
         print(f"Location: {DB_PATH}")
         print(f"{'=' * 60}\n")
-
-    except Exception as e:
-        print(f"✗ Load error: {e}")
     finally:
         conn.close()
 
@@ -216,32 +592,131 @@ def verify_database():
 
 def main():
     """Main setup workflow"""
+    parser = argparse.ArgumentParser(description="Build crimes_clean.db")
+    parser.add_argument(
+        "--mode",
+        choices=["incremental", "full"],
+        default="incremental",
+        help="incremental: fetch records past the stored watermark and upsert "
+        "them; full: drop and rebuild the crimes table",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["portal", "synthetic"],
+        default="portal",
+        help="portal: download from the Chicago Data Portal; synthetic: "
+        "generate seeded records offline (see --seed)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limit", type=int, default=50000)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--clean-workers", type=int, default=CLEAN_WORKERS)
+    parser.add_argument("--memory-budget-mb", type=int, default=MEMORY_BUDGET_MB)
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="Also keep one database per year under data/processed/shards/ "
+        "for the API's raw-row queries",
+    )
+    parser.add_argument(
+        "--tiles",
+        action="store_true",
+        help="Also render the vector tile pyramid (data/processed/tiles.mbtiles) "
+        "for /api/tiles",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Rows per chunk (default: derived from the memory budget)",
+    )
+    args = parser.parse_args()
+
+    # The downloader reads the module-level URL
+    global CHICAGO_API_URL
+    CHICAGO_API_URL = args.base_url
+    chunksize = args.chunk_size or chunk_size_for_budget(args.memory_budget_mb)
+
     print("=" * 60)
     print("CHICAGO CRIME HEATMAP - DATABASE SETUP")
     print("=" * 60)
     print()
 
-    # Step 1: Create DB
-    create_database()
+    # Step 1: Create DB (only dropped for a full rebuild)
+    create_database(rebuild=args.mode == "full")
 
-    # Step 2: Download
-    df = download_chicago_data(limit=50000)
+    since = read_watermark() if args.mode == "incremental" else None
+    incremental = since is not None
+    if args.mode == "incremental" and not incremental:
+        print("No watermark found - running initial load")
 
-    if df is None:
+    # Steps 2-4: Download → Clean → Load, one chunk at a time
+    stats = StageStats()
+    if args.source == "synthetic":
+        # Deterministic records keyed on case_number - reruns upsert in place
+        chunks = synthetic_chicago_data(
+            limit=args.limit, chunksize=chunksize, stats=stats, seed=args.seed
+        )
+    else:
+        chunks = download_chicago_data(
+            limit=args.limit,
+            chunksize=chunksize,
+            stats=stats,
+            since=since,
+            workers=args.workers,
+            page_size=args.page_size,
+        )
+    chunks = clean_chunks(chunks, stats=stats, workers=args.clean_workers)
+
+    days = set()
+    try:
+        loaded = load_database(
+            chunks,
+            stats=stats,
+            memory_budget_mb=args.memory_budget_mb,
+            bulk=not incremental,
+            days=days,
+        )
+    except Exception as e:
+        print(f"✗ Ingest error: {e}")
         print("\n✗ Setup failed")
         return
 
-    # Step 3: Clean
-    df = clean_data(df)
+    # Step 5 (optional): Year shards for the API
+    if args.shards:
+        print("\nWriting year shards...")
+        start = time.perf_counter()
+        write_shards(
+            DB_PATH,
+            os.path.join(os.path.dirname(DB_PATH), "shards"),
+            days=days if incremental else None,
+        )
+        stats.record("shards", 0, time.perf_counter() - start)
+
+    # Step 6 (optional): Vector tile pyramid for the map
+    if args.tiles:
+        print("\nRendering vector tiles...")
+        start = time.perf_counter()
+        write_tiles(DB_PATH)
+        stats.record("tiles", 0, time.perf_counter() - start)
+
+    stats.report(memory_budget_mb=args.memory_budget_mb)
+
+    if incremental:
+        # Skip full-table summaries so refresh cost tracks the new rows only
+        watermark = read_watermark()
+        print(f"\n✓ Upserted {loaded:,} records (watermark: {watermark[0]})")
+        return
 
-    if len(df) == 0:
+    if loaded == 0:
         print("\n✗ No valid data")
         return
 
-    # Step 4: Load
-    load_database(df)
+    print_database_summary()
 
-    # Step 5: Verify
+    # Step 7: Verify
     verify_database()
 
     print("\n🎉 Setup complete!")
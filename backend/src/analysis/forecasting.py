@@ -149,13 +149,16 @@ class SimpleCrimeForecaster:
 
 # Week 4 Usage Script
 if __name__ == "__main__":
-    import sqlite3
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.data_loader import load_crimes
 
     print("=== Chicago CRIME FORECASTING ===")
 
-    # Load data from database
-    conn = sqlite3.connect("data/processed/crimes_clean.db")
-    crimes_df = pd.read_sql_query("SELECT * FROM crimes", conn)
+    # Load data from database (only dates are needed, in compact dtypes)
+    crimes_df = load_crimes(columns=["date"])
 
     # Initialize forecaster
     forecaster = SimpleCrimeForecaster(crimes_df)
@@ -181,4 +184,3 @@ if __name__ == "__main__":
     plt.show()
 
     print("\nForecasting completed!")
-    conn.close()
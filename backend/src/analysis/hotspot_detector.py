@@ -150,7 +150,7 @@ class ChicagoHotspotDetector:
 
             if len(crimes_in_hotspot) > 0:
                 # Analyze crime types
-                crime_types = crimes_in_hotspot["primary_type"].value_counts()
+                crime_types = crimes_in_hotspot["crime_type"].value_counts()
 
                 # Temporal patterns
                 temporal_patterns = {
@@ -264,12 +264,18 @@ class ChicagoHotspotDetector:
 
 # Usage and testing script
 if __name__ == "__main__":
-    import sqlite3
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.data_loader import load_crimes
 
     # Load crime data from database
-    conn = sqlite3.connect("../../data/processed/chicago_crimes.db")
-    query = "SELECT latitude, longitude, primary_type, hour, is_weekend, season FROM crimes LIMIT 10000"
-    df = pd.read_sql_query(query, conn)
+    df = load_crimes(
+        columns=["date", "latitude", "longitude", "crime_type"],
+        derived=True,
+        limit=10000,
+    )
 
     # Convert to GeoDataFrame
     from src.analysis.geo_utils import ChicagoGeoProcessor
@@ -321,5 +327,4 @@ if __name__ == "__main__":
     )
     plt.show()
 
-    conn.close()
     print("Hotspot detection completed!")
@@ -171,14 +171,15 @@ class HotspotExperimentRunner:
 
 # Experiment runner script
 if __name__ == "__main__":
-    import sqlite3
+    import sys
     import geopandas as gpd
     from src.analysis.geo_utils import ChicagoGeoProcessor
 
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.data_loader import load_crimes
+
     # Load data
-    conn = sqlite3.connect("../../data/processed/chicago_crimes.db")
-    query = "SELECT * FROM crimes LIMIT 20000"  # Larger sample for experiments
-    df = pd.read_sql_query(query, conn)
+    df = load_crimes(limit=20000)  # Larger sample for experiments
 
     processor = ChicagoGeoProcessor()
     crimes_gdf = processor.create_gdf_from_crimes(df)
@@ -189,4 +190,3 @@ if __name__ == "__main__":
     optimal_params = experiment_runner.find_optimal_parameters()
 
     print("Parameter tuning completed!")
-    conn.close()
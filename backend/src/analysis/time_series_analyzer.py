@@ -1,14 +1,104 @@
-# src/analysis/time_series_analyzer.py (Continuation)
+# src/analysis/time_series_analyzer.py
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from scipy import stats
+import warnings
+
+warnings.filterwarnings("ignore")
+
+DAY_ORDER = [
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"
+]
+
+# Hours counted as night: 22:00-05:59
+NIGHT_HOURS = [22, 23, 0, 1, 2, 3, 4, 5]
+
+
+class ChicagoTimeSeriesAnalyzer:
+    """
+    Daily, weekly, hourly and seasonal crime patterns
+
+    Expects the frame from utils.data_loader.load_crimes(derived=True):
+    datetime64 `date` plus month/hour/day_of_week/is_weekend/season columns.
+    """
+
+    def __init__(self, crimes_df):
+        self.crimes_df = crimes_df
+
+    def analyze_daily_trends(self):
+        """Daily crime counts with their mean, spread, trend and anomalies"""
+        daily_crimes = self.crimes_df.groupby(self.crimes_df["date"].dt.date).size()
+        daily_crimes.index = pd.to_datetime(daily_crimes.index)
+        daily_crimes = daily_crimes.sort_index()
+
+        daily_stats = {
+            "mean_daily_crimes": daily_crimes.mean(),
+            "std_daily_crimes": daily_crimes.std(),
+            "max_daily_crimes": daily_crimes.max(),
+            "min_daily_crimes": daily_crimes.min(),
+            "trend_slope": self.calculate_trend(daily_crimes.astype(float)),
+            "anomaly_days": len(self.detect_anomalies(daily_crimes)),
+        }
+        return daily_crimes, daily_stats
+
+    def analyze_weekly_patterns(self):
+        """Crimes per day of week, Monday first, and the weekend share"""
+        weekly_patterns = (
+            self.crimes_df.groupby("day_of_week", observed=True)
+            .size()
+            .reindex(DAY_ORDER, fill_value=0)
+        )
+
+        weekend_crimes = int(self.crimes_df["is_weekend"].sum())
+        weekend_analysis = {
+            "weekend_crimes": weekend_crimes,
+            "weekday_crimes": len(self.crimes_df) - weekend_crimes,
+            "weekend_percentage": weekend_crimes / len(self.crimes_df) * 100,
+        }
+        return weekly_patterns, weekend_analysis
+
+    def analyze_hourly_patterns(self):
+        """Crimes per hour of day, the peak hour and the night share"""
+        hourly_crimes = (
+            self.crimes_df.groupby("hour").size().reindex(range(24), fill_value=0)
+        )
+
+        night_crimes = hourly_crimes[NIGHT_HOURS].sum()
+        hourly_stats = {
+            "peak_hour": int(hourly_crimes.idxmax()),
+            "quietest_hour": int(hourly_crimes.idxmin()),
+            "night_percentage": night_crimes / hourly_crimes.sum() * 100,
+        }
+        return hourly_crimes, hourly_stats
+
+    def analyze_seasonal_patterns(self):
+        """Crimes per month, per season and per month of each year"""
+        monthly_crimes = self.crimes_df.groupby("month").size()
+        seasonal_crimes = self.crimes_df.groupby("season", observed=True).size()
+        monthly_by_year = (
+            self.crimes_df.groupby(["year", "month"]).size().unstack(0, fill_value=0)
+        )
+
+        summer = seasonal_crimes.get("Summer", 0)
+        winter = seasonal_crimes.get("Winter", 0)
+        seasonal_stats = {
+            "peak_month": int(monthly_crimes.idxmax()),
+            "lowest_month": int(monthly_crimes.idxmin()),
+            "summer_vs_winter": summer / winter if winter else None,
+        }
+        return monthly_crimes, seasonal_crimes, monthly_by_year, seasonal_stats
 
     def analyze_crime_type_temporal_patterns(self):
         """Analyze temporal patterns by crime type"""
         # Top crime types
-        top_crime_types = self.crimes_df['primary_type'].value_counts().head(5).index
+        top_crime_types = self.crimes_df['crime_type'].value_counts().head(5).index
         
         crime_type_patterns = {}
         
         for crime_type in top_crime_types:
-            crime_subset = self.crimes_df[self.crimes_df['primary_type'] == crime_type]
+            crime_subset = self.crimes_df[self.crimes_df['crime_type'] == crime_type]
             
             # Monthly pattern
             monthly_pattern = crime_subset.groupby('month').size()
@@ -17,10 +107,8 @@
             hourly_pattern = crime_subset.groupby('hour').size()
             
             # Weekly pattern
-            weekly_pattern = crime_subset.groupby('day_of_week').size()
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 
-                        'Friday', 'Saturday', 'Sunday']
-            weekly_pattern = weekly_pattern.reindex(day_order, fill_value=0)
+            weekly_pattern = crime_subset.groupby('day_of_week', observed=True).size()
+            weekly_pattern = weekly_pattern.reindex(DAY_ORDER, fill_value=0)
             
             crime_type_patterns[crime_type] = {
                 'monthly': monthly_pattern,
@@ -174,12 +262,14 @@
 
 # Usage and testing script
 if __name__ == "__main__":
-    import sqlite3
-    
-    # Load data
-    conn = sqlite3.connect("../../data/processed/chicago_crimes.db")
-    query = "SELECT * FROM crimes"
-    crimes_df = pd.read_sql_query(query, conn)
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.data_loader import load_crimes
+
+    # Load data (compact dtypes + hour/month/season columns)
+    crimes_df = load_crimes(derived=True)
     
     print("Starting temporal analysis...")
     
@@ -208,6 +298,4 @@ if __name__ == "__main__":
     print(f"Peak Hour: {insights['peak_patterns']['peak_hour']}:00")
     print(f"Peak Month: {insights['peak_patterns']['peak_month']}")
     print(f"Most Active Season: {insights['seasonal_insights']['most_active_season']}")
-    
-    conn.close()
     print("Temporal analysis completed!")
\ No newline at end of file
@@ -0,0 +1,417 @@
+# src/api/cache.py
+"""
+Response cache for the API's GET endpoints
+
+The data only changes at ingest, so a response is reusable until the next
+load. Entries are keyed by endpoint plus the normalized query string and
+carry the data generation they were computed under (see
+database/generation.py); an entry from an older generation is a miss.
+
+Two tiers:
+
+    memory  per-process LRU, bounded by API_CACHE_MEMORY_MB
+    disk    optional SQLite file in API_CACHE_DIR, shared by every worker
+            process (gunicorn), bounded by API_CACHE_DISK_MB; least
+            recently used entries are evicted first
+
+Only complete 200 JSON responses not marked no-store are stored.
+Responses carry an X-Cache header (HIT-MEMORY, HIT-DISK or MISS) and
+/api/cache/stats reports the counters.
+
+The same key and generation make the ETag, and the generation's time the
+Last-Modified date. A client revalidating with If-None-Match (or
+If-Modified-Since) gets a 304 before any query runs, so polling an
+unchanged dashboard costs one header comparison.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import g, jsonify, request
+
+import database
+from database.generation import data_generation, generation_time
+
+MEMORY_MAX_BYTES = int(float(os.environ.get("API_CACHE_MEMORY_MB", 64)) * 2**20)
+DISK_DIR = os.environ.get("API_CACHE_DIR")
+DISK_MAX_BYTES = int(float(os.environ.get("API_CACHE_DISK_MB", 512)) * 2**20)
+
+# How long a worker trusts the generation it last read from the database
+GENERATION_TTL_S = float(os.environ.get("API_CACHE_GENERATION_TTL_S", 1.0))
+
+# Liveness is always checked against the database, but may still be
+# revalidated (ETag/304); the cache counters change on every request
+UNCACHED_ENDPOINTS = {"health_check", "cache_stats"}
+UNVERSIONED_ENDPOINTS = {"cache_stats"}
+
+# Served gzip-coded to clients that accept it: each coding is its own
+# representation, so it gets its own strong ETag (RFC 9110 8.8.3)
+CODED_ENDPOINTS = {"tiles.get_tile"}
+
+# Largest body checked for an error field (see reusable())
+FALLBACK_MAX_BYTES = 64 * 1024
+
+
+def cache_key(endpoint, args):
+    """'endpoint?a=1&b=2' with parameters sorted and empty values dropped"""
+    items = sorted(
+        (name, value) for name in args for value in args.getlist(name) if value != ""
+    )
+    return f"{endpoint}?{urlencode(items)}"
+
+
+class MemoryTier:
+    """Byte-bounded LRU of key → (generation, mimetype, body)"""
+
+    def __init__(self, max_bytes=MEMORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        size = len(entry[2])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[2])
+            self._entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted[2])
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+class DiskTier:
+    """Byte-bounded LRU in a SQLite file shared between processes"""
+
+    def __init__(self, cache_dir, max_bytes=DISK_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "responses.db")
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # A connection must not cross a fork (gunicorn --preload)
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    generation INTEGER,
+                    mimetype TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    accessed REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed "
+                "ON responses(accessed)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT generation, mimetype, body FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET accessed = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+            return row
+
+    def put(self, key, entry):
+        generation, mimetype, body = entry
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Generations only grow: older entries can never hit again
+                conn.execute(
+                    "DELETE FROM responses WHERE generation < ?", (generation,)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, generation, mimetype, body, len(body), time.time()),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn):
+        excess = conn.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+        excess -= self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "evictions": self.evictions}
+
+
+class ResponseCache:
+    """Memory tier in front of an optional disk tier, with hit/miss counters"""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else MemoryTier()
+        self.disk = disk
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "not_modified": 0,
+        }
+        self._generation = None
+        self._checked = (None, 0.0)
+
+    def generation(self):
+        """Data generation of the served database, re-read every TTL seconds"""
+        db_path, checked_at = self._checked
+        now = time.monotonic()
+        if db_path != database.DB_PATH or now - checked_at > GENERATION_TTL_S:
+            conn = database.get_db()
+            if conn is None:
+                return None
+            try:
+                generation = data_generation(conn)
+            finally:
+                conn.close()
+            if generation != self._generation:
+                # A new load: nothing in memory can hit any more
+                self.memory.clear()
+                self._generation = generation
+            self._checked = (database.DB_PATH, now)
+        return self._generation
+
+    def lookup(self, key, generation):
+        """(mimetype, body, tier) for a current entry, else None"""
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] == generation:
+            self.counters["memory_hits"] += 1
+            return entry[1], entry[2], "memory"
+
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None and entry[0] == generation:
+                self.counters["disk_hits"] += 1
+                self.memory.put(key, tuple(entry))
+                return entry[1], entry[2], "disk"
+
+        self.counters["misses"] += 1
+        return None
+
+    def store(self, key, generation, mimetype, body):
+        entry = (generation, mimetype, body)
+        self.memory.put(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, entry)
+            except sqlite3.Error as e:
+                # The disk tier is an optimisation; never fail a request on it
+                print(f"⚠ Response cache write failed: {e}")
+        self.counters["stores"] += 1
+
+    def clear(self):
+        self.memory.clear()
+        self._checked = (None, 0.0)
+
+    def stats(self):
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        stats = {
+            **self.counters,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "generation": self._generation,
+            "memory": {
+                "entries": len(self.memory),
+                "bytes": self.memory.bytes,
+                "max_bytes": self.memory.max_bytes,
+                "evictions": self.memory.evictions,
+            },
+            "disk": None,
+        }
+        if self.disk is not None:
+            stats["disk"] = {**self.disk.stats(), "max_bytes": self.disk.max_bytes}
+        return stats
+
+
+response_cache = ResponseCache(disk=DiskTier(DISK_DIR) if DISK_DIR else None)
+
+
+def entity_tag(key, generation):
+    """ETag for one endpoint + parameters under one data generation"""
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f"{generation:x}-{digest}"
+
+
+def coded_tag(etag):
+    """`etag` for the content-coding this request will be served in"""
+    if request.endpoint in CODED_ENDPOINTS and "gzip" in request.accept_encodings:
+        return f"{etag}-gz"
+    return etag
+
+
+def not_modified(etag, modified):
+    """True if the request's validators still match (RFC 9110 precedence)"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    # Last-Modified has one-second resolution: a load within the second the
+    # client's copy was dated carries the same date, so only a strictly
+    # later one proves the copy current
+    since = request.if_modified_since
+    return modified is not None and since is not None and modified < since
+
+
+def reusable(response):
+    """A complete, successful JSON answer - safe to cache and to validate"""
+    # Errors, timeouts (503) and streamed bodies are never reused
+    if response.status_code != 200 or response.is_streamed:
+        return False
+    # Stand-in answers computed from older data say so
+    if response.cache_control.no_store:
+        return False
+    if response.mimetype != "application/json":
+        return False
+    # Blueprint routes report failures as 200 with an error field. Those
+    # fallbacks are tiny; parsing a multi-megabyte GeoJSON body to rule
+    # them out would cost more than serializing it did.
+    if response.content_length and response.content_length > FALLBACK_MAX_BYTES:
+        return True
+    payload = response.get_json(silent=True)
+    return not (isinstance(payload, dict) and "error" in payload)
+
+
+def binary(response):
+    """A complete, successful non-JSON body - validated but not stored"""
+    if response.status_code != 200 or response.is_streamed:
+        return False
+    return response.mimetype.startswith("application/") and not response.is_json
+
+
+def install_cache(app, cache=response_cache):
+    """Serve repeat GETs on `app` from `cache`, and 304s to revalidations"""
+
+    def validators(response, etag, modified):
+        response.set_etag(etag)
+        if modified is not None:
+            response.last_modified = modified
+        # Clients may keep the body but must revalidate before reusing it
+        response.headers["Cache-Control"] = "no-cache"
+        if request.endpoint in CODED_ENDPOINTS:
+            response.vary.add("Accept-Encoding")
+        return response
+
+    @app.before_request
+    def serve_cached():
+        if request.method != "GET" or request.endpoint is None:
+            return None
+        if request.endpoint in UNVERSIONED_ENDPOINTS:
+            return None
+        generation = cache.generation()
+        if generation is None:
+            return None
+
+        key = cache_key(request.endpoint, request.args)
+        etag = coded_tag(entity_tag(key, generation))
+        modified = generation_time(generation)
+        g.cache_key, g.cache_generation = key, generation
+        g.cache_validators = (etag, modified)
+
+        # Nothing changed since the client's copy: no query, no body
+        if not_modified(etag, modified):
+            cache.counters["not_modified"] += 1
+            g.cache_key = None
+            return validators(app.response_class(status=304), etag, modified)
+
+        if request.endpoint in UNCACHED_ENDPOINTS:
+            return None
+        hit = cache.lookup(key, generation)
+        if hit is None:
+            return None
+
+        mimetype, body, tier = hit
+        response = app.response_class(body, mimetype=mimetype)
+        response.headers["X-Cache"] = f"HIT-{tier.upper()}"
+        g.cache_key = None
+        return validators(response, etag, modified)
+
+    @app.after_request
+    def store_response(response):
+        key = g.pop("cache_key", None)
+        if key is None:
+            return response
+        if request.endpoint not in UNCACHED_ENDPOINTS:
+            response.headers["X-Cache"] = "MISS"
+        if not reusable(response):
+            # Binary answers (tiles, FlatGeobuf) still get validators
+            if binary(response):
+                validators(response, *g.cache_validators)
+            return response
+
+        validators(response, *g.cache_validators)
+        if request.endpoint not in UNCACHED_ENDPOINTS:
+            cache.store(
+                key, g.cache_generation, response.mimetype, response.get_data()
+            )
+        return response
+
+    @app.route("/api/cache/stats", methods=["GET"])
+    def cache_stats():
+        """Response cache hit/miss counters and tier sizes"""
+        return jsonify({"success": True, "cache": cache.stats()})
@@ -0,0 +1,341 @@
+# src/api/clusters.py
+"""
+Zoom-aware clustering of crime points, in the style of supercluster
+
+`ClusterIndex` holds one level of clusters per zoom, built bottom-up with
+NumPy: the distinct crime locations form the level above MAX_ZOOM, and
+each lower level merges the clusters of the one above that fall into the
+same grid cell of RADIUS_PX screen pixels at that zoom. A cluster keeps
+its crime count, the count-weighted centroid of its members and its most
+frequent crime types. (supercluster merges greedily within a radius of
+each point; a grid is the vectorised equivalent, at the cost of keeping
+neighbours on either side of a cell edge apart.)
+
+A query at zoom z returns the level-z clusters inside the bbox: at most
+one per RADIUS_PX × RADIUS_PX pixels of viewport, however many crimes
+there are. The index is built once per data generation and kept in
+memory. Builds run on a background thread, started by the first request
+each process serves and again when a request sees a new generation, so
+no request waits for one: until the first build is done requests answer
+503 with Retry-After, and after a load they are answered from the
+previous index, uncached, while the new one is built. Nothing is read or
+started at import time, so workers forked after `gunicorn --preload`
+each start their own build.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+import database
+from api.cache import response_cache
+from database.deadline import Deadline
+from database.streaming import iter_frames
+from database.tiles import codes, mercator
+
+RADIUS_PX = 60
+TILE_SIZE = 256
+MAX_ZOOM = 16
+TOP_TYPES = 3
+
+# Quantization of the unclustered level: 2**28 steps per world width is
+# about 15 cm, so only crimes recorded at one address share a point
+POINT_STEPS = 2**28
+
+# Largest viewport answered, in screen pixels per side (a 4K display and
+# then some); bigger ones would no longer bound the response size
+MAX_VIEWPORT_PX = 8192
+
+# Query time allowed to a background build, and the retry hint sent while
+# the first one runs
+BUILD_BUDGET_S = float(os.environ.get("CLUSTER_BUILD_BUDGET_S", 300))
+RETRY_AFTER_S = 5
+
+# A failed build is not retried for the same generation before this
+# (a new load is built at once)
+FAILED_RETRY_S = float(os.environ.get("CLUSTER_BUILD_RETRY_S", 600))
+
+POINTS_SQL = """
+    SELECT longitude, latitude, COALESCE(crime_type, 'UNKNOWN') AS crime_type
+    FROM crimes
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+"""
+
+
+class ClusterLevel:
+    """Clusters of one zoom: positions in [0, 1) Mercator units, counts, types"""
+
+    def __init__(self, x, y, count, cluster, kind, n):
+        self.x, self.y, self.count = x, y, count
+        # Sparse per-cluster crime type counts, kept to merge the next level
+        self.cluster, self.kind, self.n = cluster, kind, n
+        self.top_types, self.top_counts = top_types(cluster, kind, n, len(count))
+
+    def merge(self, keys):
+        """The next level down: clusters sharing a key become one"""
+        _, parent = np.unique(keys, return_inverse=True)
+        count = np.bincount(parent, weights=self.count)
+        x = np.bincount(parent, weights=self.x * self.count) / count
+        y = np.bincount(parent, weights=self.y * self.count) / count
+
+        kinds = self.kind.max(initial=0) + 1
+        pairs, inverse = np.unique(
+            parent[self.cluster] * kinds + self.kind, return_inverse=True
+        )
+        n = np.bincount(inverse, weights=self.n).astype(np.int64)
+        count = count.astype(np.int64)
+        return ClusterLevel(x, y, count, pairs // kinds, pairs % kinds, n)
+
+
+def top_types(cluster, kind, n, size):
+    """(size × TOP_TYPES) type codes and counts, most frequent first, -1/0 pad"""
+    order = np.lexsort((-n, cluster))
+    cluster, kind, n = cluster[order], kind[order], n[order]
+    first = np.searchsorted(cluster, np.arange(size))
+    rank = np.arange(len(cluster)) - first[cluster]
+    keep = rank < TOP_TYPES
+
+    top = np.full((size, TOP_TYPES), -1, dtype=np.int64)
+    top_n = np.zeros((size, TOP_TYPES), dtype=np.int64)
+    top[cluster[keep], rank[keep]] = kind[keep]
+    top_n[cluster[keep], rank[keep]] = n[keep]
+    return top, top_n
+
+
+class ClusterIndex:
+    """Cluster levels for zooms 0..MAX_ZOOM, plus the unclustered points"""
+
+    def __init__(self, longitude, latitude, kinds, type_names, max_zoom=MAX_ZOOM):
+        self.type_names = list(type_names)
+        self.max_zoom = max_zoom
+        self.total = len(kinds)
+
+        x, y = mercator(latitude, longitude, 0)
+        x, y = np.clip(x, 0, 1 - 1e-12), np.clip(y, 0, 1 - 1e-12)
+        # Start from every crime as its own cluster
+        crimes = ClusterLevel(
+            x,
+            y,
+            np.ones(len(kinds), dtype=np.int64),
+            np.arange(len(kinds)),
+            np.asarray(kinds, dtype=np.int64),
+            np.ones(len(kinds), dtype=np.int64),
+        )
+        points = crimes.merge(grid_keys(x, y, POINT_STEPS))
+
+        self.levels = [points]
+        for zoom in range(max_zoom, -1, -1):
+            above = self.levels[-1]
+            steps = TILE_SIZE * 2**zoom // RADIUS_PX + 1
+            self.levels.append(above.merge(grid_keys(above.x, above.y, steps)))
+        # levels[z] is zoom z; levels[max_zoom + 1] the distinct locations
+        self.levels.reverse()
+
+    def level_number(self, zoom):
+        """Index into levels of the level shown at a (fractional) zoom"""
+        return min(max(int(zoom), 0), self.max_zoom + 1)
+
+    def level(self, zoom):
+        return self.levels[self.level_number(zoom)]
+
+    def is_clustered(self, zoom):
+        """Whether the level shown at `zoom` merges crimes into clusters"""
+        return self.level_number(zoom) <= self.max_zoom
+
+    def clusters(self, zoom, bounds=None):
+        """Column dict of the clusters shown at `zoom` inside bounds"""
+        level = self.level(zoom)
+        mask = np.ones(len(level.count), dtype=bool)
+        if bounds is not None:
+            min_lon, min_lat, max_lon, max_lat = bounds
+            (west, east), (north, south) = mercator(
+                [max_lat, min_lat], [min_lon, max_lon], 0
+            )
+            mask = (
+                (level.x >= west)
+                & (level.x <= east)
+                & (level.y >= north)
+                & (level.y <= south)
+            )
+
+        x, y = level.x[mask], level.y[mask]
+        return {
+            "longitude": x * 360.0 - 180.0,
+            "latitude": np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y)))),
+            "count": level.count[mask],
+            "top_types": level.top_types[mask],
+            "top_counts": level.top_counts[mask],
+            "clustered": self.is_clustered(zoom),
+        }
+
+    def features(self, zoom, bounds=None):
+        """GeoJSON Point features, one per cluster"""
+        found = self.clusters(zoom, bounds)
+        names = self.type_names
+        features = []
+        for lon, lat, count, top, top_n in zip(
+            found["longitude"].tolist(),
+            found["latitude"].tolist(),
+            found["count"].tolist(),
+            found["top_types"].tolist(),
+            found["top_counts"].tolist(),
+        ):
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [round(lon, 6), round(lat, 6)],
+                    },
+                    "properties": {
+                        "cluster": found["clustered"] and count > 1,
+                        "count": count,
+                        "top_types": [
+                            {"crime_type": names[code], "count": n}
+                            for code, n in zip(top, top_n)
+                            if code >= 0
+                        ],
+                    },
+                }
+            )
+        return features
+
+
+def viewport_pixels(bounds, zoom):
+    """(width, height) in screen pixels of a bbox at `zoom` (None: the world)"""
+    if bounds is None:
+        side = TILE_SIZE * 2 ** int(zoom)
+        return side, side
+    min_lon, min_lat, max_lon, max_lat = bounds
+    x, y = mercator([max_lat, min_lat], [min_lon, max_lon], int(zoom))
+    return (x[1] - x[0]) * TILE_SIZE, (y[1] - y[0]) * TILE_SIZE
+
+
+def grid_keys(x, y, steps):
+    """One integer per cell of a steps × steps grid over [0, 1)²"""
+    col = np.floor(x * steps).astype(np.int64)
+    row = np.floor(y * steps).astype(np.int64)
+    return row * steps + col
+
+
+def build_index(pool, max_zoom=MAX_ZOOM, deadline=None):
+    """ClusterIndex over every located crime, read through `pool`"""
+    longitude, latitude, kinds = [], [], []
+    type_codes = {}
+    conn = pool.connect(deadline)
+    try:
+        for frame in iter_frames(conn, POINTS_SQL, batch_rows=100_000):
+            longitude.append(frame["longitude"].to_numpy(dtype=float))
+            latitude.append(frame["latitude"].to_numpy(dtype=float))
+            kinds.append(codes(frame["crime_type"], type_codes))
+    finally:
+        conn.close()
+
+    if not kinds:
+        longitude = latitude = [np.zeros(0)]
+        kinds = [np.zeros(0, dtype=np.int64)]
+    return ClusterIndex(
+        np.concatenate(longitude),
+        np.concatenate(latitude),
+        np.concatenate(kinds),
+        list(type_codes),
+        max_zoom=max_zoom,
+    )
+
+
+# (db path, generation) → index of the last finished build, and the
+# thread building the next one with the pid of the process that started it
+_index = (None, None)
+_building = (None, None, None)
+# (db path, generation) of the last failed build, and when to retry it
+_failed = (None, 0.0)
+_index_lock = threading.Lock()
+_warmed_pid = None
+
+
+def _build(key, pool):
+    global _index, _building, _failed
+    try:
+        index = build_index(pool, deadline=Deadline(BUILD_BUDGET_S))
+    except Exception as e:
+        print(f"✗ Cluster index build failed: {e}")
+        index = None
+    with _index_lock:
+        # A build overtaken by a newer generation's is dropped
+        if _building[0] == key:
+            if index is not None:
+                _index = (key, index)
+            else:
+                _failed = (key, time.monotonic() + FAILED_RETRY_S)
+            _building = (None, None, None)
+
+
+def retry_in(generation):
+    """Seconds until a failed build of `generation` is retried, else None"""
+    key, retry_at = _failed
+    if key != (database.DB_PATH, generation):
+        return None
+    remaining = retry_at - time.monotonic()
+    return remaining if remaining > 0 else None
+
+
+def warm_index(generation):
+    """
+    Start building the index of the served database at `generation`
+
+    Returns the building thread (None when the index is current, no
+    database is served or its last build failed under FAILED_RETRY_S
+    ago); a build already running for it is reused.
+    """
+    global _building
+    if generation is None or retry_in(generation) is not None:
+        return None
+    key = (database.DB_PATH, generation)
+    with _index_lock:
+        if _index[0] == key:
+            return None
+        building, thread, pid = _building
+        # A forked worker inherits the record of its parent's thread, but
+        # not the thread itself
+        if building != key or pid != os.getpid() or not thread.is_alive():
+            thread = threading.Thread(
+                target=_build,
+                args=(key, database.get_pool()),
+                name="cluster-index",
+                daemon=True,
+            )
+            _building = (key, thread, os.getpid())
+            thread.start()
+        return thread
+
+
+def cluster_index(generation):
+    """
+    (index, current) for the served database at `generation`; never waits
+
+    A missing or outdated index is built in the background meanwhile:
+    `current` is False while the previous generation's index stands in,
+    and index is None until a first one exists.
+    """
+    warm_index(generation)
+    key, index = _index
+    if index is None or key[0] != database.DB_PATH:
+        return None, False
+    return index, key == (database.DB_PATH, generation)
+
+
+def install_warmup(app):
+    """Start the index build on the first request each process of `app` serves"""
+
+    @app.before_request
+    def warm_cluster_index():
+        global _warmed_pid
+        if _warmed_pid == os.getpid():
+            return None
+        generation = response_cache.generation()
+        if generation is not None:
+            _warmed_pid = os.getpid()
+            warm_index(generation)
+        return None
@@ -0,0 +1,207 @@
+# src/api/formats.py
+"""
+Binary export formats for crime points: Arrow IPC and FlatGeobuf
+
+Both are built batch by batch from the same query frames as the streamed
+GeoJSON (see database/streaming.py), located crimes only:
+
+    arrow   Arrow IPC stream, one record batch per query batch. Crime
+            types, descriptions and districts are dictionary-encoded,
+            coordinates are float32 and dates are timestamps. Written
+            incrementally, so it is streamed like NDJSON.
+    fgb     FlatGeobuf, written through pyogrio (GDAL). The format stores
+            plain strings and double coordinates, so the coordinates are
+            rounded to float32 precision but not narrowed; its header
+            needs the feature count, so the file is built in full first.
+
+pyarrow and pyogrio are optional; without them the format answers 501.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from api.geojson import column, district_labels
+from database.deadline import current_deadline
+
+try:
+    import pyarrow as pa
+
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    HAS_PYARROW = False
+
+try:
+    import pyogrio.raw
+    import shapely
+
+    HAS_PYOGRIO = True
+except ImportError:
+    pyogrio = None
+    shapely = None
+    HAS_PYOGRIO = False
+
+MIMETYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "fgb": "application/flatgeobuf",
+}
+
+# Columns repeating a few hundred distinct values at most
+DICTIONARY_COLUMNS = ["crime_type", "description", "district", "district_num"]
+
+
+def available(output):
+    """Whether the libraries behind a binary format are installed"""
+    return {"arrow": HAS_PYARROW, "fgb": HAS_PYOGRIO}.get(output, True)
+
+
+def point_columns(df, names):
+    """Column name → values for the located rows of a crimes frame"""
+    df = df[(df["latitude"].notna() & df["longitude"].notna()).to_numpy()]
+    labels, numbers = district_labels(
+        df.get("district", pd.Series([None] * len(df), index=df.index)), names
+    )
+    dates = pd.to_datetime(df["date"], format="ISO8601", errors="coerce")
+    return {
+        "id": df["id"].to_numpy(dtype="int64"),
+        "date": dates.to_numpy(dtype="datetime64[s]"),
+        "crime_type": column(df, "crime_type"),
+        "description": column(df, "description", missing=""),
+        "district": labels.tolist(),
+        "district_num": numbers.tolist(),
+        "case_number": column(df, "case_number", missing=""),
+        "longitude": df["longitude"].to_numpy(dtype="float32"),
+        "latitude": df["latitude"].to_numpy(dtype="float32"),
+    }
+
+
+def arrow_schema():
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("date", pa.timestamp("s")),
+            ("crime_type", dictionary),
+            ("description", dictionary),
+            ("district", dictionary),
+            ("district_num", dictionary),
+            ("case_number", pa.string()),
+            ("longitude", pa.float32()),
+            ("latitude", pa.float32()),
+        ]
+    )
+
+
+def arrow_batch(df, names, schema):
+    """One Arrow record batch for a crimes frame"""
+    columns = point_columns(df, names)
+    arrays = [
+        (
+            pa.array(columns[field.name], type=pa.string()).dictionary_encode()
+            if field.name in DICTIONARY_COLUMNS
+            else pa.array(columns[field.name], type=field.type)
+        )
+        for field in schema
+    ]
+    return pa.record_batch(arrays, schema=schema)
+
+
+def arrow_stream(frames, names, deadline=None, trailer=None):
+    """
+    Arrow IPC stream chunks for a stream of crimes DataFrames
+
+    Each batch carries its own dictionaries (IPC dictionary replacement),
+    so no batch waits for the values of the next. A failure mid-stream
+    ends the body without the end-of-stream marker, which strict readers
+    report as a truncated stream.
+
+    The schema goes out before the first query batch, so what is only
+    known at the end (the next page's cursor) rides on a last, empty
+    batch as its custom metadata (pyarrow:
+    read_next_batch_with_custom_metadata).
+
+    Args:
+        frames: Iterable of crimes DataFrames (see database.streaming)
+        names: District number → readable name
+        deadline: The request's Deadline (see api.geojson.stream_features)
+        trailer: Callable returning {key: value} once frames are
+                 exhausted; non-empty values are sent on the last batch
+    """
+    schema = arrow_schema()
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain():
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    yield drain()
+
+    count = 0
+    deadline = deadline or current_deadline()
+    try:
+        for frame in frames:
+            batch = arrow_batch(frame, names, schema)
+            if batch.num_rows:
+                writer.write_batch(batch)
+                count += batch.num_rows
+                yield drain()
+    except Exception as e:
+        timed_out = deadline is not None and deadline.expired
+        reason = "time budget exceeded" if timed_out else e
+        print(f"⚠ Arrow stream ended early after {count:,} rows: {reason}")
+        return
+
+    metadata = {k: v for k, v in (trailer() if trailer else {}).items() if v}
+    if metadata:
+        empty = pa.RecordBatch.from_pylist([], schema=schema)
+        writer.write_batch(empty, custom_metadata=metadata)
+    writer.close()
+    yield drain()
+
+
+def flatgeobuf(frames, names):
+    """
+    A FlatGeobuf file (bytes) holding every located crime in `frames`
+
+    Batches are reduced to their compact columns as they arrive; the file
+    is written once at the end, in query order (no spatial index).
+    """
+    parts = [point_columns(frame, names) for frame in frames]
+    if parts:
+        columns = {
+            name: np.concatenate([np.asarray(part[name]) for part in parts])
+            for name in parts[0]
+        }
+    else:
+        columns = point_columns(
+            pd.DataFrame(columns=["id", "date", "latitude", "longitude"]), names
+        )
+
+    points = shapely.points(
+        columns.pop("longitude").astype("float64"),
+        columns.pop("latitude").astype("float64"),
+    )
+    fields = list(columns)
+    field_data = [
+        values if values.dtype.kind in "iM" else values.astype(object)
+        for values in map(np.asarray, columns.values())
+    ]
+
+    body = io.BytesIO()
+    pyogrio.raw.write(
+        body,
+        shapely.to_wkb(points),
+        field_data,
+        fields,
+        geometry_type="Point",
+        crs="EPSG:4326",
+        driver="FlatGeobuf",
+        layer="crimes",
+        layer_options={"SPATIAL_INDEX": "NO"},
+    )
+    return body.getvalue()
@@ -0,0 +1,165 @@
+# src/api/geojson.py
+"""
+Columnar GeoJSON serialization for crime points
+
+Features are built from whole columns instead of row by row: unlocated
+crimes are dropped with one mask, district names come from one vectorized
+lookup, and every column is converted to native Python values once
+(`tolist()`). The payload is encoded with orjson when it is installed and
+the standard json module otherwise.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+from database.deadline import current_deadline
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+
+def dumps(payload):
+    """Encode a JSON payload to bytes with the fastest available backend"""
+    if HAS_ORJSON:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def json_response(payload):
+    """A 200 application/json response encoded by dumps()"""
+    return current_app.response_class(dumps(payload), mimetype="application/json")
+
+
+def district_labels(districts, names):
+    """Readable district names for a column of district numbers"""
+    numbers = districts.astype(object).where(districts.notna(), "").astype(str)
+    labels = numbers.map(names)
+    labels = labels.where(labels.notna(), "District " + numbers)
+    return labels.where(numbers != "", "Unknown"), numbers
+
+
+def column(df, name, missing=None):
+    """Native Python values of a column, nulls as None (`missing` if absent)"""
+    if name not in df.columns:
+        return [missing] * len(df)
+    values = df[name].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def crime_features(df, names, extra=(), located_only=True):
+    """
+    GeoJSON Point features for rows of the crimes table
+
+    Args:
+        df: Crimes rows (id, date, crime_type, latitude, longitude, ...)
+        names: District number → readable name
+        extra: Further columns copied into the properties as-is
+        located_only: Drop rows without coordinates; otherwise they get a
+                      null geometry
+
+    Returns:
+        List of feature dicts
+    """
+    located = (df["latitude"].notna() & df["longitude"].notna()).to_numpy()
+    if located_only and not located.all():
+        df = df[located]
+        located = np.ones(len(df), dtype=bool)
+
+    labels, numbers = district_labels(
+        df.get("district", pd.Series([None] * len(df), index=df.index)), names
+    )
+    longitude = df["longitude"].astype(float).tolist()
+    latitude = df["latitude"].astype(float).tolist()
+    geometries = [
+        {"type": "Point", "coordinates": [lon, lat]} if ok else None
+        for lon, lat, ok in zip(longitude, latitude, located.tolist())
+    ]
+
+    properties = {
+        "id": df["id"].astype("int64").tolist(),
+        "date": df["date"].astype(str).tolist(),
+        "crime_type": column(df, "crime_type"),
+        "description": column(df, "description", missing=""),
+        "district": labels.tolist(),
+        "district_num": numbers.tolist(),
+        "case_number": column(df, "case_number", missing=""),
+    }
+    for name in extra:
+        properties[name] = column(df, name)
+
+    keys = list(properties)
+    rows = zip(*properties.values())
+    return [
+        {"type": "Feature", "geometry": geometry, "properties": dict(zip(keys, row))}
+        for geometry, row in zip(geometries, rows)
+    ]
+
+
+def stream_features(frames, names, metadata, ndjson=False, deadline=None):
+    """
+    Response body chunks for a stream of crimes DataFrames
+
+    A FeatureCollection is written incrementally: its opening goes out
+    before the first query batch, each batch adds its features, and the
+    metadata (with the final count) closes it. NDJSON writes one feature
+    per line, and a last line holding only `next_cursor` when another page
+    follows. A failure mid-stream cannot change the status any more, so
+    it is reported in-band: an `error` in the collection's metadata, or a
+    last line holding only an `error`.
+
+    Args:
+        frames: Iterable of crimes DataFrames (see database.streaming)
+        names: District number → readable name
+        metadata: Collection metadata, or a callable returning it once
+                  frames are exhausted; `count` is filled in at the end
+        ndjson: Newline-delimited features instead of a FeatureCollection
+        deadline: The request's Deadline; the body is written after the
+                  request context has ended, so it is not current any more
+    """
+    separator = b"\n" if ndjson else b","
+    if not ndjson:
+        yield b'{"type":"FeatureCollection","features":['
+
+    count = 0
+    error = None
+    deadline = deadline or current_deadline()
+    try:
+        for frame in frames:
+            features = crime_features(frame, names)
+            if not features:
+                continue
+            body = separator.join(dumps(feature) for feature in features)
+            if ndjson:
+                yield body + b"\n"
+            else:
+                yield (separator if count else b"") + body
+            count += len(features)
+    except Exception as e:
+        timed_out = deadline is not None and deadline.expired
+        error = {
+            "error": "Query exceeded its time budget" if timed_out else str(e),
+            "code": "query_timeout" if timed_out else "stream_failed",
+        }
+        print(f"⚠ Stream ended early after {count:,} features: {e}")
+
+    if callable(metadata):
+        metadata = metadata()
+    if ndjson:
+        if error is not None:
+            yield dumps({**error, "count": count}) + b"\n"
+        elif metadata.get("next_cursor"):
+            yield dumps({"next_cursor": metadata["next_cursor"]}) + b"\n"
+        return
+
+    metadata = {**metadata, "count": count, "streamed": True}
+    if error is not None:
+        metadata.update(error, truncated=True)
+    yield b'],"metadata":' + dumps(metadata) + b"}"
@@ -0,0 +1,175 @@
+# src/api/limits.py
+"""
+Per-request limits: query time budgets and result-size caps
+
+Every request runs under a time budget for its SQLite work, looked up by
+Flask endpoint name. Queries still running when it is spent are
+interrupted (see database/deadline.py) and the request answers 503,
+whatever the endpoint itself made of the error. Requests asking for more
+rows or days than the caps allow are refused up front with 413, and ones
+asking for fewer than none (SQLite reads LIMIT -1 as no limit at all)
+with 400.
+
+Budgets and caps come from the environment:
+
+    API_QUERY_BUDGET_S=10                 default budget, seconds
+    API_QUERY_BUDGETS=get_all_crimes=5,temporal.get_temporal_trends=2
+    API_MAX_ROWS=50000                    largest ?limit=
+    API_MAX_DAYS=3660                     largest ?days=
+
+Streamed exports (`format=ndjson`, `format=arrow` or `stream=1`) hold one
+batch in memory whatever their size, so they get their own, larger cap and
+budget:
+
+    API_STREAM_MAX_ROWS=10000000
+    API_STREAM_BUDGET_S=300
+"""
+
+import os
+
+from flask import g, jsonify, request
+
+from database.deadline import end_deadline, start_deadline
+
+DEFAULT_BUDGET_S = float(os.environ.get("API_QUERY_BUDGET_S", 10))
+
+# Dashboard reads answer from summary tables and indexes in milliseconds;
+# a tight budget keeps a pathological one from holding a worker
+ENDPOINT_BUDGETS = {
+    "health_check": 2.0,
+    "get_crime_types": 3.0,
+    "get_monthly_stats": 3.0,
+    "get_hotspots": 5.0,
+    "get_clusters": 5.0,
+    "search_crimes_text": 5.0,
+    "temporal.get_temporal_trends": 5.0,
+    "temporal.get_hourly_distribution": 5.0,
+    "temporal.get_weekly_pattern": 5.0,
+    "forecast.get_short_term_forecast": 5.0,
+    "forecast.get_risk_assessment": 5.0,
+    "tiles.get_tile": 2.0,
+}
+
+
+def parse_budgets(text):
+    """'endpoint=seconds,...' → {endpoint: seconds}"""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        endpoint, _, seconds = item.partition("=")
+        budgets[endpoint.strip()] = float(seconds)
+    return budgets
+
+
+ENDPOINT_BUDGETS.update(parse_budgets(os.environ.get("API_QUERY_BUDGETS", "")))
+
+# Query parameters capped per request: name → largest accepted value
+SIZE_LIMITS = {
+    "limit": int(os.environ.get("API_MAX_ROWS", 50000)),
+    "days": int(os.environ.get("API_MAX_DAYS", 3660)),
+}
+
+# Smallest accepted value of the same parameters
+SIZE_MINIMUMS = {"limit": 1, "days": 0}
+
+STREAM_SIZE_LIMITS = {
+    **SIZE_LIMITS,
+    "limit": int(os.environ.get("API_STREAM_MAX_ROWS", 10_000_000)),
+}
+STREAM_BUDGET_S = float(os.environ.get("API_STREAM_BUDGET_S", 300))
+
+# Formats always written incrementally, and ones that never can be
+STREAM_ONLY_FORMATS = {"ndjson", "arrow"}
+BUFFERED_FORMATS = {"fgb"}
+
+
+def streamed(args):
+    """True if the request asks for a streamed (chunked) response"""
+    output = args.get("format")
+    if output in STREAM_ONLY_FORMATS or output in BUFFERED_FORMATS:
+        return output in STREAM_ONLY_FORMATS
+    return args.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def endpoint_budget(endpoint, stream=False):
+    """Seconds of query time allowed for one request to `endpoint`"""
+    if stream:
+        return STREAM_BUDGET_S
+    return ENDPOINT_BUDGETS.get(endpoint, DEFAULT_BUDGET_S)
+
+
+def oversized(args):
+    """(parameter, value, maximum) of the first capped parameter over its cap"""
+    limits = STREAM_SIZE_LIMITS if streamed(args) else SIZE_LIMITS
+    for name, maximum in limits.items():
+        value = args.get(name, type=int)
+        if value is not None and value > maximum:
+            return name, value, maximum
+    return None
+
+
+def undersized(args):
+    """(parameter, value, minimum) of the first capped parameter under its floor"""
+    for name, minimum in SIZE_MINIMUMS.items():
+        value = args.get(name, type=int)
+        if value is not None and value < minimum:
+            return name, value, minimum
+    return None
+
+
+def install_limits(app):
+    """Enforce budgets and caps on every request served by `app`"""
+
+    @app.before_request
+    def start_budget():
+        too_small = undersized(request.args)
+        if too_small:
+            name, value, minimum = too_small
+            return jsonify(
+                {
+                    "error": f"{name}={value} is below the minimum of {minimum}",
+                    "code": "invalid_parameter",
+                    "parameter": name,
+                    "minimum": minimum,
+                }
+            ), 400
+
+        too_large = oversized(request.args)
+        if too_large:
+            name, value, maximum = too_large
+            return jsonify(
+                {
+                    "error": f"{name}={value} exceeds the maximum of {maximum}",
+                    "code": "request_too_large",
+                    "parameter": name,
+                    "maximum": maximum,
+                }
+            ), 413
+
+        g.deadline, g.deadline_token = start_deadline(
+            endpoint_budget(request.endpoint, streamed(request.args))
+        )
+
+    @app.after_request
+    def report_timeout(response):
+        # An interrupted query leaves the endpoint with partial or fallback
+        # data, so its own answer is replaced
+        deadline = g.get("deadline")
+        if deadline is None or not deadline.expired:
+            return response
+        print(f"⚠ {request.path} exceeded its {deadline.seconds:g}s query budget")
+        timeout = jsonify(
+            {
+                "error": "Query exceeded its time budget",
+                "code": "query_timeout",
+                "endpoint": request.endpoint,
+                "budget_s": deadline.seconds,
+            }
+        )
+        timeout.status_code = 503
+        return timeout
+
+    @app.teardown_request
+    def end_budget(error=None):
+        token = g.pop("deadline_token", None)
+        if token is not None:
+            end_deadline(token)
@@ -4,10 +4,11 @@ Chicago Crime Analytics API - Complete Working Version
 Combines existing endpoints with new temporal analysis & forecasting
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-import sqlite3
+from datetime import datetime, timedelta
 import pandas as pd
+import math
 import os
 import sys
 
@@ -39,31 +40,62 @@ DISTRICT_NAMES = {
 }
 
 
-def get_district_name(district_num):
-    """Convert district number to readable name."""
-    district_str = str(district_num)
-    return DISTRICT_NAMES.get(district_str, f"District {district_str}")
-
-
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api import formats  # noqa: E402
+from api.cache import install_cache, response_cache  # noqa: E402
+from api.clusters import (  # noqa: E402
+    MAX_VIEWPORT_PX,
+    RADIUS_PX,
+    RETRY_AFTER_S,
+    cluster_index,
+    install_warmup,
+    retry_in,
+    viewport_pixels,
+)
+from api.geojson import crime_features, json_response, stream_features  # noqa: E402
+from api.limits import install_limits, streamed  # noqa: E402
+from api.pagination import (  # noqa: E402
+    AFTER_CURSOR,
+    ORDER_BY,
+    StreamedPage,
+    decode_cursor,
+    next_cursor,
+)
+
+# Pooled read-only connections shared with the route modules
+from database import get_db, get_pool, get_shards  # noqa: E402
+from database.deadline import current_deadline  # noqa: E402
+from database.search import search_crimes  # noqa: E402
+from database.streaming import iter_frames  # noqa: E402
+from utils.grid import (  # noqa: E402
+    DEFAULT_RESOLUTION,
+    GRID_RESOLUTIONS,
+    cell_center,
+    cell_column,
+)
+
 app = Flask(__name__)
-CORS(app)
+# Browsers only let the frontend read the validators it must send back.
+# If-None-Match makes every poll a preflighted request, so the preflight
+# answer is cached for a day (browsers cap it lower, Chrome at 2 hours).
+CORS(
+    app,
+    expose_headers=["ETag", "Last-Modified", "X-Cache", "X-Next-Cursor"],
+    max_age=86400,
+)
 
-# Database path
-DB_PATH = "data/processed/crimes_clean.db"
+# Repeat GETs are answered from the response cache until the next ingest;
+# installed first so it never stores a response the limits rejected
+install_cache(app)
 
+# Per-endpoint query time budgets (503) and row/day caps (413)
+install_limits(app)
 
-def get_db():
-    """Get database connection"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
-    except Exception as e:
-        print(f"DB Error: {e}")
-        return None
+# The cluster index is built in the background from each process's first
+# request, so the first map view does not wait for it
+install_warmup(app)
 
 
 # ==================== HEALTH CHECK ====================
@@ -87,13 +119,20 @@ def health_check():
                     "endpoints": {
                         "existing": [
                             "/api/crimes/all",
+                            "/api/crimes/search",
                             "/api/crimes/hotspots",
                             "/api/stats/monthly",
                             "/api/crimes/types",
                         ],
+                        "maps": [
+                            "/api/crimes/clusters",
+                            "/api/tiles/{z}/{x}/{y}.mvt",
+                            "/api/tiles/metadata",
+                        ],
                         "temporal_analysis": [
                             "/api/analysis/temporal/trends",
                             "/api/analysis/temporal/hourly",
+                            "/api/analysis/temporal/weekly",
                             "/api/analysis/temporal/monthly",
                             "/api/analysis/temporal/seasonality",
                         ],
@@ -116,6 +155,77 @@ def health_check():
 # ==================== EXISTING CORE ENDPOINTS ====================
 
 
+def parse_bbox(text):
+    """'minLon,minLat,maxLon,maxLat' → tuple of floats (ValueError if invalid)"""
+    parts = [float(p) for p in text.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox needs 4 values: minLon,minLat,maxLon,maxLat")
+    min_lon, min_lat, max_lon, max_lat = parts
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+# Viewports holding more crimes than this are answered from the
+# (date, latitude, longitude) index newest-first: with that many matches
+# the page fills after a short scan, while the R*Tree path would fetch
+# and sort every match
+RTREE_MAX_CANDIDATES = 50000
+
+
+def viewport_filter(conn, bounds):
+    """SQL filter (and params) selecting the crimes inside a bbox"""
+    min_lon, min_lat, max_lon, max_lat = bounds
+    box = [min_lon, max_lon, min_lat, max_lat]
+    # R*Tree boxes are float32, so the exact bounds are always checked too
+    exact = " AND longitude BETWEEN ? AND ? AND latitude BETWEEN ? AND ?"
+
+    # Counting stops at the cap, so this probe stays cheap
+    candidates = conn.execute(
+        """
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM crimes_rtree
+            WHERE max_lon >= ? AND min_lon <= ? AND max_lat >= ? AND min_lat <= ?
+            LIMIT ?
+        )
+        """,
+        box + [RTREE_MAX_CANDIDATES + 1],
+    ).fetchone()[0]
+    if candidates > RTREE_MAX_CANDIDATES:
+        return exact, box
+
+    rtree = """
+        AND id IN (
+            SELECT id FROM crimes_rtree
+            WHERE max_lon >= ? AND min_lon <= ? AND max_lat >= ? AND min_lat <= ?
+        )
+    """
+    return rtree + exact, box * 2
+
+
+OUTPUT_FORMATS = {
+    "geojson": "application/json",
+    "ndjson": "application/x-ndjson",
+    **formats.MIMETYPES,
+}
+
+
+def stream_crimes(plan, start, end, limit, deadline):
+    """Crimes DataFrames for plan(conn), one fetchmany() batch at a time"""
+    shards = get_shards()
+    if shards:
+        yield from shards.iter_frames(
+            plan, start=start, end=end, limit=limit, deadline=deadline
+        )
+        return
+    conn = get_pool().connect(deadline)
+    try:
+        sql, args = plan(conn)
+        yield from iter_frames(conn, sql + " LIMIT ?", args + [limit])
+    finally:
+        conn.close()
+
+
 @app.route("/api/crimes/all", methods=["GET"])
 def get_all_crimes():
     """Get all crime points as GeoJSON"""
@@ -124,6 +234,25 @@ def get_all_crimes():
         crime_type = request.args.get("crime_type")
         start_date = request.args.get("start_date")
         end_date = request.args.get("end_date")
+        bbox = request.args.get("bbox")
+        output = request.args.get("format", "geojson")
+        cursor = request.args.get("cursor")
+
+        # Checked before LIMIT limit + 1: SQLite reads LIMIT -1 as no limit
+        if limit < 1:
+            return jsonify({"error": "limit must be at least 1"}), 400
+        try:
+            bounds = parse_bbox(bbox) if bbox else None
+        except ValueError as e:
+            return jsonify({"error": f"Invalid bbox: {e}"}), 400
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if output not in OUTPUT_FORMATS:
+            return jsonify({"error": f"Unknown format: {output}"}), 400
+        if not formats.available(output):
+            return jsonify({"error": f"format={output} is not installed"}), 501
 
         query = "SELECT * FROM crimes WHERE 1=1"
         params = []
@@ -136,53 +265,154 @@ def get_all_crimes():
             query += " AND date >= ?"
             params.append(start_date)
 
+        end_bound = None
         if end_date:
+            # Dates carry a time of day; a bare end date covers the whole day
+            end_bound = end_date + " 23:59:59" if len(end_date) == 10 else end_date
             query += " AND date <= ?"
-            params.append(end_date)
+            params.append(end_bound)
+
+        if after:
+            # Keyset page: a seek to the rows before the cursor, never OFFSET
+            query += AFTER_CURSOR
+            params.extend(after)
+            # Shards newer than the cursor hold nothing for this page
+            end_bound = min(end_bound, after[0]) if end_bound else after[0]
+
+        def plan(conn):
+            """Final SQL for one database; the viewport filter depends on it"""
+            sql, args = query, list(params)
+            if bounds:
+                clause, extra = viewport_filter(conn, bounds)
+                sql += clause
+                args += extra
+            return sql + ORDER_BY, args
+
+        filters = {
+            "crime_type": crime_type,
+            "limit": limit,
+            "start_date": start_date,
+            "end_date": end_date,
+            "bbox": list(bounds) if bounds else None,
+        }
+
+        # One row past the page tells whether another page follows
+        fetch = limit + 1
+
+        if streamed(request.args):
+            # Chunked body: the first bytes leave before the query finishes,
+            # and memory holds one batch whatever the limit
+            # Teardown ends the request's deadline before the body is
+            # written, so the generators are handed it
+            deadline = current_deadline()
+            page = StreamedPage(limit)
+            frames = page.frames(
+                stream_crimes(plan, start_date, end_bound, fetch, deadline)
+            )
+            if output == "arrow":
+                body = formats.arrow_stream(
+                    frames,
+                    DISTRICT_NAMES,
+                    deadline,
+                    trailer=lambda: {"next_cursor": page.next_cursor},
+                )
+            else:
+                body = stream_features(
+                    frames,
+                    DISTRICT_NAMES,
+                    lambda: {
+                        "filters": filters,
+                        "cursor": cursor,
+                        "next_cursor": page.next_cursor,
+                    },
+                    ndjson=output == "ndjson",
+                    deadline=deadline,
+                )
+            return Response(stream_with_context(body), mimetype=OUTPUT_FORMATS[output])
+
+        if output == "fgb":
+            # Compact columns per batch, one file write at the end, so the
+            # next page's cursor is known in time for a header
+            deadline = current_deadline()
+            page = StreamedPage(limit)
+            body = formats.flatgeobuf(
+                page.frames(
+                    stream_crimes(plan, start_date, end_bound, fetch, deadline)
+                ),
+                DISTRICT_NAMES,
+            )
+            response = Response(body, mimetype=OUTPUT_FORMATS[output])
+            if page.next_cursor:
+                response.headers["X-Next-Cursor"] = page.next_cursor
+            return response
+
+        shards = get_shards()
+        if shards:
+            # Only the years inside the date filter are queried, newest first
+            df = shards.read_frame(plan, start=start_date, end=end_bound, limit=fetch)
+        else:
+            conn = get_db()
+            sql, args = plan(conn)
+            df = pd.read_sql_query(sql + " LIMIT ?", conn, params=args + [fetch])
+            conn.close()
+        cursor_after = next_cursor(df, limit)
+        df = df.head(limit)
 
-        query += " ORDER BY date DESC LIMIT ?"
-        params.append(limit)
+        # Whole columns at a time; rows without coordinates are masked out
+        features = crime_features(df, DISTRICT_NAMES)
+
+        return json_response(
+            {
+                "type": "FeatureCollection",
+                "features": features,
+                "metadata": {
+                    "count": len(features),
+                    "filters": filters,
+                    "cursor": cursor,
+                    "next_cursor": cursor_after,
+                },
+            }
+        )
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/crimes/search", methods=["GET"])
+def search_crimes_text():
+    """Full-text search over crime descriptions, most relevant first"""
+    try:
+        text = request.args.get("q", "")
+        limit = request.args.get("limit", 100, type=int)
+        crime_type = request.args.get("crime_type")
+        start_date = request.args.get("start_date")
+        end_date = request.args.get("end_date")
+
+        if not text.strip():
+            return jsonify({"error": "Missing search text: pass ?q="}), 400
 
         conn = get_db()
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+        try:
+            # FTS5 MATCH on crimes_fts, joined back to crimes for the filters
+            df = search_crimes(conn, text, crime_type, start_date, end_date, limit)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            conn.close()
 
-        features = []
-        for _, row in df.iterrows():
-            if pd.notna(row["latitude"]) and pd.notna(row["longitude"]):
-                # Get district name
-                district_name = get_district_name(row.get("district", "Unknown"))
-
-                features.append(
-                    {
-                        "type": "Feature",
-                        "geometry": {
-                            "type": "Point",
-                            "coordinates": [
-                                float(row["longitude"]),
-                                float(row["latitude"]),
-                            ],
-                        },
-                        "properties": {
-                            "id": int(row["id"]),
-                            "date": str(row["date"]),
-                            "crime_type": row["crime_type"],
-                            "description": row.get("description", ""),
-                            "district": district_name,  # Human-readable name
-                            "district_num": str(
-                                row.get("district", "")
-                            ),  # Numeric value for filtering
-                            "case_number": row.get("case_number", ""),
-                        },
-                    }
-                )
+        # Unlocated matches are still results, just not mappable
+        df["rank"] = df["rank"].round(4)
+        features = crime_features(
+            df, DISTRICT_NAMES, extra=["rank"], located_only=False
+        )
 
-        return jsonify(
+        return json_response(
             {
                 "type": "FeatureCollection",
                 "features": features,
                 "metadata": {
                     "count": len(features),
+                    "query": text,
                     "filters": {
                         "crime_type": crime_type,
                         "limit": limit,
@@ -203,12 +433,13 @@ def get_crime_types():
     try:
         conn = get_db()
 
+        # Monthly per-type counts are pre-aggregated at ingest
         query = """
             SELECT 
                 crime_type,
-                COUNT(*) as count,
-                ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM crimes), 2) as percentage
-            FROM crimes 
+                SUM(n) as count,
+                ROUND(SUM(n) * 100.0 / (SELECT SUM(n) FROM monthly_type), 2) as percentage
+            FROM monthly_type 
             GROUP BY crime_type 
             ORDER BY count DESC
         """
@@ -237,9 +468,8 @@ def get_monthly_stats():
         query = """
             SELECT 
                 year_month,
-                COUNT(*) as crime_count
-            FROM crimes
-            WHERE year_month IS NOT NULL
+                SUM(n) as crime_count
+            FROM monthly_type
             GROUP BY year_month
             ORDER BY year_month DESC
             LIMIT 12
@@ -268,38 +498,144 @@ def get_monthly_stats():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/crimes/clusters", methods=["GET"])
+def get_clusters():
+    """Crime clusters for a map viewport, sized to the zoom level"""
+    try:
+        zoom = request.args.get("zoom", type=float)
+        bbox = request.args.get("bbox")
+
+        if zoom is None or not 0 <= zoom <= 24:
+            return jsonify({"error": "zoom must be a number from 0 to 24"}), 400
+        try:
+            bounds = parse_bbox(bbox) if bbox else None
+        except ValueError as e:
+            return jsonify({"error": f"Invalid bbox: {e}"}), 400
+
+        width, height = viewport_pixels(bounds, zoom)
+        if max(width, height) > MAX_VIEWPORT_PX:
+            return jsonify(
+                {
+                    "error": f"Viewport is {width:.0f}x{height:.0f} px at zoom "
+                    f"{zoom:g}; pass a bbox of at most {MAX_VIEWPORT_PX} px a side",
+                    "code": "viewport_too_large",
+                }
+            ), 400
+
+        generation = response_cache.generation()
+        if generation is None:
+            return jsonify({"error": "Database not available"}), 500
+
+        # Built once per data generation, then a mask over one zoom level
+        index, current = cluster_index(generation)
+        if index is None:
+            failed = retry_in(generation)
+            if failed is None:
+                retry_after = RETRY_AFTER_S
+                error = {
+                    "error": "Cluster index is being built, retry shortly",
+                    "code": "index_building",
+                }
+            else:
+                # Not retried for this generation until the backoff is over
+                retry_after = math.ceil(failed)
+                error = {
+                    "error": "Cluster index build failed",
+                    "code": "index_unavailable",
+                }
+            unavailable = jsonify({**error, "retry_after_s": retry_after})
+            unavailable.headers["Retry-After"] = str(retry_after)
+            return unavailable, 503
+        features = index.features(zoom, bounds)
+
+        response = json_response(
+            {
+                "type": "FeatureCollection",
+                "features": features,
+                "metadata": {
+                    "count": len(features),
+                    "crimes": sum(f["properties"]["count"] for f in features),
+                    "zoom": zoom,
+                    "clustered": index.is_clustered(zoom),
+                    "radius_px": RADIUS_PX,
+                    "bbox": list(bounds) if bounds else None,
+                    "stale": not current,
+                },
+            }
+        )
+        if not current:
+            # The previous load's clusters, until the new index is built
+            response.headers["Cache-Control"] = "no-store"
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/crimes/hotspots", methods=["GET"])
 def get_hotspots():
-    """Get crime hotspots"""
+    """Get crime hotspots: the busiest grid cells of the latest days"""
     try:
+        resolution = request.args.get("resolution", DEFAULT_RESOLUTION)
+        days = request.args.get("days", 30, type=int)
+        limit = request.args.get("limit", 50, type=int)
+        min_count = request.args.get("min_count", 5, type=int)
+
+        try:
+            column = cell_column(resolution)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        size = GRID_RESOLUTIONS[resolution]
+
         conn = get_db()
 
-        query = """
+        # Window ends at the latest crime, like the temporal endpoints
+        max_date = conn.execute("SELECT MAX(date) FROM crimes").fetchone()[0]
+        if not max_date:
+            conn.close()
+            return jsonify({"success": True, "hotspots": [], "count": 0})
+        latest = datetime.strptime(max_date[:10], "%Y-%m-%d")
+        cutoff = (latest - timedelta(days=days)).strftime("%Y-%m-%d")
+
+        # Stored integer cell keys, grouped on one column: coarse and medium
+        # walk their (cell, date) index in cell order, fine cells are a
+        # range scan of the (date, cell_*) index (see GRID_INDEXES)
+        query = f"""
             SELECT 
-                latitude,
-                longitude,
+                {column} as cell,
                 COUNT(*) as crime_count
             FROM crimes
-            WHERE date >= date('now', '-30 days')
-            GROUP BY ROUND(latitude, 2), ROUND(longitude, 2)
-            HAVING crime_count > 5
+            WHERE date >= ? AND {column} IS NOT NULL
+            GROUP BY {column}
+            HAVING crime_count > ?
             ORDER BY crime_count DESC
-            LIMIT 50
+            LIMIT ?
         """
 
-        df = pd.read_sql_query(query, conn)
+        df = pd.read_sql_query(query, conn, params=[cutoff, min_count, limit])
         conn.close()
 
-        hotspots = [
+        hotspots = []
+        for cell, count in zip(df["cell"], df["crime_count"]):
+            latitude, longitude = cell_center(cell, size)
+            hotspots.append(
+                {
+                    "latitude": round(latitude, 6),
+                    "longitude": round(longitude, 6),
+                    "intensity": int(count),
+                    "cell": int(cell),
+                }
+            )
+
+        return jsonify(
             {
-                "latitude": float(row["latitude"]),
-                "longitude": float(row["longitude"]),
-                "intensity": int(row["crime_count"]),
+                "success": True,
+                "hotspots": hotspots,
+                "count": len(hotspots),
+                "resolution": resolution,
+                "cell_size_deg": size,
             }
-            for _, row in df.iterrows()
-        ]
-
-        return jsonify({"success": True, "hotspots": hotspots, "count": len(hotspots)})
+        )
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -319,16 +655,20 @@ try:
     # Import blueprints
     from api.routes.temporal_analysis import temporal_bp
     from api.routes.forecasting import forecast_bp
+    from api.routes.tiles import tiles_bp
 
     # Register blueprints with URL prefixes
     app.register_blueprint(temporal_bp, url_prefix="/api/analysis/temporal")
     app.register_blueprint(forecast_bp, url_prefix="/api/forecast")
+    app.register_blueprint(tiles_bp, url_prefix="/api/tiles")
 
     print("✓ Loaded temporal analysis & forecasting routes")
     print("  - /api/analysis/temporal/trends")
     print("  - /api/analysis/temporal/hourly")
+    print("  - /api/analysis/temporal/weekly")
     print("  - /api/forecast/short-term")
     print("  - /api/forecast/risk-assessment")
+    print("  - /api/tiles/<z>/<x>/<y>.mvt")
 except ImportError as e:
     print(f"⚠ Warning: Could not load new routes: {e}")
     print(f"  Error details: {str(e)}")
@@ -374,10 +714,17 @@ if __name__ == "__main__":
     print("  GET /api/crimes/hotspots   - Crime hotspots")
     print("  GET /api/stats/monthly     - Monthly statistics")
     print("  GET /api/crimes/types      - Crime type list")
+    print("  GET /api/crimes/search     - Full-text crime search")
+    print()
+    print("Maps:")
+    print("  GET /api/crimes/clusters?zoom=11&bbox=...")
+    print("  GET /api/tiles/{z}/{x}/{y}.mvt")
+    print("  GET /api/tiles/metadata")
     print()
     print("New Temporal Analysis:")
     print("  GET /api/analysis/temporal/trends?period=daily&days=90")
     print("  GET /api/analysis/temporal/hourly?days=90")
+    print("  GET /api/analysis/temporal/weekly?days=90")
     print("  GET /api/analysis/temporal/monthly?months=3")
     print("  GET /api/analysis/temporal/seasonality")
     print()
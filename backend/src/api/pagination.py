@@ -0,0 +1,88 @@
+# src/api/pagination.py
+"""
+Keyset (cursor) pagination for crime listings
+
+Listings are ordered by (date DESC, id DESC); ids break ties between
+crimes recorded at the same time, so the order is total. A page ends with
+a cursor naming its last row, and the next page asks for the rows strictly
+before it:
+
+    ... AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?
+
+SQLite compares the row value with a range seek on the date-leading
+indexes, so every page costs the same, where OFFSET would walk and discard
+all the rows of the pages before it. A page also stays put when newer
+crimes are loaded while a client is paging.
+
+Cursors are opaque to clients: URL-safe base64 of the JSON [date, id].
+Streamed exports learn whether another page follows only once their last
+batch is read, so they hand the cursor over at the end of the body (see
+StreamedPage).
+"""
+
+import base64
+import json
+
+ORDER_BY = " ORDER BY date DESC, id DESC"
+AFTER_CURSOR = " AND (date, id) < (?, ?)"
+
+
+def encode_cursor(date, crime_id):
+    """Cursor for the page after the row (date, crime_id)"""
+    raw = json.dumps([str(date), int(crime_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """(date, id) of a cursor (ValueError if it is not one of ours)"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        date, crime_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {token}") from None
+    if not isinstance(date, str) or type(crime_id) is not int:
+        raise ValueError(f"Invalid cursor: {token}")
+    return date, crime_id
+
+
+def next_cursor(df, limit):
+    """
+    Cursor after a page, or None on the last page
+
+    `df` is the query result fetched with LIMIT limit + 1: the extra row
+    only tells that another page exists and is not part of this one.
+    """
+    if limit < 1 or len(df) <= limit:
+        return None
+    last = df.iloc[limit - 1]
+    return encode_cursor(last["date"], last["id"])
+
+
+class StreamedPage:
+    """
+    One page of a stream of crimes DataFrames fetched with LIMIT limit + 1
+
+    frames() passes on the first `limit` rows; once they are exhausted
+    next_cursor names the last of them if the extra row came, else None.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.next_cursor = None
+
+    def frames(self, frames):
+        sent, last, more = 0, None, False
+        # The source is read to its end (the extra row is its last), so
+        # its connection is handed back as usual
+        for frame in frames:
+            room = self.limit - sent
+            if len(frame) > room:
+                # The extra row: another page follows this one
+                more = True
+                frame = frame.iloc[:room]
+            if len(frame):
+                sent += len(frame)
+                last = frame.iloc[-1]
+                yield frame
+        if more and last is not None:
+            self.next_cursor = encode_cursor(last["date"], last["id"])
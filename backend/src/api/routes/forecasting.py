@@ -3,29 +3,10 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-import sqlite3
-import os
-
-forecast_bp = Blueprint("forecast", __name__)
-
-DB_PATH = os.path.join(
-    os.path.dirname(__file__), "../../../data/processed/crimes_clean.db"
-)
 
+from database import get_db
 
-def get_db():
-    """Get database connection"""
-    try:
-        db_path = os.path.abspath(DB_PATH)
-        if not os.path.exists(db_path):
-            print(f"ERROR: Database file not found at {db_path}")
-            return None
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-    except Exception as e:
-        print(f"ERROR connecting to database: {e}")
-        return None
+forecast_bp = Blueprint("forecast", __name__)
 
 
 @forecast_bp.route("/short-term", methods=["GET"])
@@ -38,11 +19,10 @@ def get_short_term_forecast():
         if not conn:
             return jsonify([]), 200
 
-        # FIXED: Get actual date range from database
+        # Latest day with data, from the daily summary table
         cursor = conn.cursor()
-        cursor.execute("SELECT MAX(date), MIN(date) FROM crimes")
-        result = cursor.fetchone()
-        max_date = result[0]
+        cursor.execute("SELECT MAX(day) FROM daily_type_hour")
+        max_date = cursor.fetchone()[0]
 
         if not max_date:
             conn.close()
@@ -55,12 +35,12 @@ def get_short_term_forecast():
 
         query = """
             SELECT 
-                date,
-                COUNT(*) as count
-            FROM crimes
-            WHERE date >= ?
-            GROUP BY date
-            ORDER BY date DESC
+                day as date,
+                SUM(n) as count
+            FROM daily_type_hour
+            WHERE day >= ?
+            GROUP BY day
+            ORDER BY day DESC
         """
         df = pd.read_sql_query(query, conn, params=[cutoff_date])
         conn.close()
@@ -142,9 +122,9 @@ def get_risk_assessment():
                 }
             ), 200
 
-        # FIXED: Get actual date range from database
+        # Latest day with data, from the daily summary table
         cursor = conn.cursor()
-        cursor.execute("SELECT MAX(date) FROM crimes")
+        cursor.execute("SELECT MAX(day) FROM daily_type_hour")
         max_date = cursor.fetchone()[0]
 
         if not max_date:
@@ -164,32 +144,42 @@ def get_risk_assessment():
 
         print(f"Assessing risk from {cutoff_date} to {max_date}")
 
+        # District counts and coordinate sums are pre-aggregated per day
         query = """
             SELECT 
                 district,
-                COUNT(*) as count,
-                AVG(latitude) as lat,
-                AVG(longitude) as lng
-            FROM crimes
-            WHERE date >= ?
+                SUM(located) as count,
+                SUM(lat_sum) / SUM(located) as lat,
+                SUM(lon_sum) / SUM(located) as lng
+            FROM daily_district
+            WHERE day >= ?
                 AND district IS NOT NULL 
                 AND district != ''
-                AND latitude IS NOT NULL
-                AND longitude IS NOT NULL
             GROUP BY district
+            HAVING SUM(located) > 0
             ORDER BY count DESC
             LIMIT 10
         """
         df = pd.read_sql_query(query, conn, params=[cutoff_date])
 
         query_total = """
-            SELECT COUNT(*) as total
-            FROM crimes
-            WHERE date >= ?
+            SELECT COALESCE(SUM(n), 0) as total
+            FROM daily_type_hour
+            WHERE day >= ?
         """
         total_df = pd.read_sql_query(query_total, conn, params=[cutoff_date])
         total_crimes = total_df["total"].iloc[0] if not total_df.empty else 0
 
+        query_hourly = """
+            SELECT hour, SUM(n) as count
+            FROM daily_type_hour
+            WHERE day >= ?
+            AND hour IS NOT NULL
+            GROUP BY hour
+        """
+        hourly_df = pd.read_sql_query(query_hourly, conn, params=[cutoff_date])
+        hour_counts = dict(zip(hourly_df["hour"], hourly_df["count"]))
+
         conn.close()
 
         if df.empty:
@@ -223,15 +213,22 @@ def get_risk_assessment():
         else:
             overall_risk = "LOW"
 
+        # Rate each hour against the average hour of the same window
+        mean_hourly = sum(hour_counts.values()) / 24
         hourly_risk = []
         for hour in range(24):
-            if 18 <= hour <= 23 or 0 <= hour <= 2:
+            count = hour_counts.get(hour, 0)
+            if not mean_hourly:
+                risk_level = "low"
+            elif count >= mean_hourly * 1.2:
                 risk_level = "high"
-            elif 6 <= hour <= 17:
+            elif count >= mean_hourly * 0.7:
                 risk_level = "medium"
             else:
                 risk_level = "low"
-            hourly_risk.append({"hour": hour, "risk_level": risk_level})
+            hourly_risk.append(
+                {"hour": hour, "risk_level": risk_level, "count": int(count)}
+            )
 
         high_risk_hours = sum(1 for hr in hourly_risk if hr["risk_level"] == "high")
 
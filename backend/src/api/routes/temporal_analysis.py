@@ -3,30 +3,10 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-import sqlite3
-import os
 
-temporal_bp = Blueprint("temporal", __name__)
-
-# Database path
-DB_PATH = os.path.join(
-    os.path.dirname(__file__), "../../../data/processed/crimes_clean.db"
-)
+from database import get_db
 
-
-def get_db():
-    """Get database connection"""
-    try:
-        db_path = os.path.abspath(DB_PATH)
-        if not os.path.exists(db_path):
-            print(f"ERROR: Database file not found at {db_path}")
-            return None
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-    except Exception as e:
-        print(f"ERROR connecting to database: {e}")
-        return None
+temporal_bp = Blueprint("temporal", __name__)
 
 
 @temporal_bp.route("/trends", methods=["GET"])
@@ -41,9 +21,9 @@ def get_temporal_trends():
         if not conn:
             return jsonify({"trends": [], "message": "Database connection failed"}), 200
 
-        # FIXED: Get actual date range from database
+        # Latest day with data, from the daily summary table
         cursor = conn.cursor()
-        cursor.execute("SELECT MAX(date) FROM crimes")
+        cursor.execute("SELECT MAX(day) FROM daily_type_hour")
         max_date = cursor.fetchone()[0]
 
         if not max_date:
@@ -56,32 +36,22 @@ def get_temporal_trends():
 
         print(f"Querying data from {cutoff_date} to {max_date}")
 
+        # Daily counts per type are pre-aggregated at ingest
+        query = """
+            SELECT 
+                day as date,
+                crime_type,
+                SUM(n) as count
+            FROM daily_type_hour
+            WHERE day >= ?
+        """
+        params = [cutoff_date]
         if crime_type:
-            query = """
-                SELECT 
-                    date,
-                    crime_type,
-                    COUNT(*) as count
-                FROM crimes
-                WHERE date >= ?
-                AND crime_type = ?
-                GROUP BY date, crime_type
-                ORDER BY date
-            """
-            df = pd.read_sql_query(query, conn, params=[cutoff_date, crime_type])
-        else:
-            query = """
-                SELECT 
-                    date,
-                    crime_type,
-                    COUNT(*) as count
-                FROM crimes
-                WHERE date >= ?
-                GROUP BY date, crime_type
-                ORDER BY date
-            """
-            df = pd.read_sql_query(query, conn, params=[cutoff_date])
+            query += " AND crime_type = ?"
+            params.append(crime_type)
+        query += " GROUP BY day, crime_type ORDER BY day"
 
+        df = pd.read_sql_query(query, conn, params=params)
         conn.close()
 
         if df.empty:
@@ -125,9 +95,18 @@ def get_temporal_trends():
         return jsonify({"error": str(e), "trends": []}), 200
 
 
+def get_day_window(conn, days):
+    """(cutoff, latest) days bounding the last `days` days of data"""
+    latest = conn.execute("SELECT MAX(day) FROM daily_type_hour").fetchone()[0]
+    if latest is None:
+        return None
+    cutoff = datetime.strptime(latest, "%Y-%m-%d") - timedelta(days=days)
+    return cutoff.strftime("%Y-%m-%d"), latest
+
+
 @temporal_bp.route("/hourly", methods=["GET"])
 def get_hourly_distribution():
-    """Get hourly crime distribution (synthetic based on daily patterns)"""
+    """Get hourly crime distribution from the stored crime timestamps"""
     try:
         days = int(request.args.get("days", 90))
 
@@ -135,86 +114,50 @@ def get_hourly_distribution():
         if not conn:
             return jsonify({"heatmap": {}, "peak_hours": [], "total_crimes": 0}), 200
 
-        # FIXED: Get actual date range from database
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(date) FROM crimes")
-        max_date = cursor.fetchone()[0]
-
-        if not max_date:
+        window = get_day_window(conn, days)
+        if not window:
             conn.close()
             return jsonify({"heatmap": {}, "peak_hours": [], "total_crimes": 0})
 
-        latest_date = datetime.strptime(max_date, "%Y-%m-%d")
-        cutoff_date = (latest_date - timedelta(days=days)).strftime("%Y-%m-%d")
-
-        print(f"Querying hourly data from {cutoff_date} to {max_date}")
+        print(f"Querying hourly data for the last {days} days")
 
+        # Summed from the (day, crime_type, hour) summary table
         query = """
             SELECT 
                 crime_type,
-                date,
-                COUNT(*) as daily_count
-            FROM crimes
-            WHERE date >= ?
-            GROUP BY crime_type, date
-            ORDER BY crime_type, date
+                hour,
+                SUM(n) as count
+            FROM daily_type_hour
+            WHERE day > ? AND day <= ?
+            AND hour IS NOT NULL
+            GROUP BY crime_type, hour
         """
-        df = pd.read_sql_query(query, conn, params=[cutoff_date])
+        df = pd.read_sql_query(query, conn, params=list(window))
         conn.close()
 
         if df.empty:
             print("WARNING: No data returned from hourly query")
             return jsonify({"heatmap": {}, "peak_hours": [], "total_crimes": 0})
 
-        # Generate hourly distribution
-        heatmap = {}
-        hourly_totals = {h: 0 for h in range(24)}
-        total_crimes = 0
-
-        # Realistic hourly weights
-        hour_weights = {
-            0: 0.015,
-            1: 0.010,
-            2: 0.008,
-            3: 0.007,
-            4: 0.008,
-            5: 0.012,
-            6: 0.020,
-            7: 0.025,
-            8: 0.030,
-            9: 0.035,
-            10: 0.040,
-            11: 0.045,
-            12: 0.050,
-            13: 0.052,
-            14: 0.055,
-            15: 0.057,
-            16: 0.060,
-            17: 0.062,
-            18: 0.065,
-            19: 0.063,
-            20: 0.060,
-            21: 0.055,
-            22: 0.048,
-            23: 0.038,
-        }
-
-        for crime_type_val in df["crime_type"].unique():
-            crime_df = df[df["crime_type"] == crime_type_val]
-            total_for_type = crime_df["daily_count"].sum()
-
-            hourly_data = []
-            for hour in range(24):
-                hourly_count = int(total_for_type * hour_weights[hour])
-                hourly_data.append({"hour": hour, "count": hourly_count})
-                hourly_totals[hour] += hourly_count
-                total_crimes += hourly_count
+        # crime_type x hour grid, with hours that had no crimes as zeros
+        grid = (
+            df.pivot(index="crime_type", columns="hour", values="count")
+            .reindex(columns=range(24), fill_value=0)
+            .fillna(0)
+            .astype(int)
+        )
 
-            heatmap[crime_type_val] = hourly_data
+        heatmap = {
+            crime_type_val: [
+                {"hour": hour, "count": int(count)} for hour, count in row.items()
+            ]
+            for crime_type_val, row in grid.iterrows()
+        }
+        hourly_totals = grid.sum(axis=0)
+        total_crimes = int(hourly_totals.sum())
 
         # Find peak hours
-        peak_hours = sorted(hourly_totals.items(), key=lambda x: x[1], reverse=True)[:3]
-        peak_hours = sorted([hour for hour, _ in peak_hours])
+        peak_hours = sorted(int(h) for h in hourly_totals.nlargest(3).index)
 
         print(
             f"✓ Returning hourly data: {total_crimes} crimes, {len(peak_hours)} peak hours"
@@ -235,3 +178,69 @@ def get_hourly_distribution():
         return jsonify(
             {"error": str(e), "heatmap": {}, "peak_hours": [], "total_crimes": 0}
         ), 200
+
+
+@temporal_bp.route("/weekly", methods=["GET"])
+def get_weekly_pattern():
+    """Get the day-of-week x hour crime grid"""
+    try:
+        days = int(request.args.get("days", 90))
+        crime_type = request.args.get("crime_type", None)
+
+        conn = get_db()
+        if not conn:
+            return jsonify({"grid": [], "total_crimes": 0}), 200
+
+        window = get_day_window(conn, days)
+        if not window:
+            conn.close()
+            return jsonify({"grid": [], "total_crimes": 0})
+
+        # Monday = 0, matching crimes.weekday
+        query = """
+            SELECT 
+                (CAST(strftime('%w', day) AS INTEGER) + 6) % 7 as weekday,
+                hour,
+                SUM(n) as count
+            FROM daily_type_hour
+            WHERE day > ? AND day <= ?
+            AND hour IS NOT NULL
+        """
+        params = list(window)
+        if crime_type:
+            query += " AND crime_type = ?"
+            params.append(crime_type)
+        query += " GROUP BY 1, hour"
+
+        df = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+
+        counts = {
+            (int(row.weekday), int(row.hour)): int(row.count)
+            for row in df.itertuples(index=False)
+        }
+        grid = [
+            {
+                "day": day,
+                "hours": [
+                    {"hour": hour, "count": counts.get((weekday, hour), 0)}
+                    for hour in range(24)
+                ],
+            }
+            for weekday, day in enumerate(
+                ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+            )
+        ]
+        total_crimes = sum(counts.values())
+
+        print(f"✓ Returning weekly pattern: {total_crimes} crimes")
+        return jsonify(
+            {"grid": grid, "total_crimes": total_crimes, "days_analyzed": days}
+        )
+
+    except Exception as e:
+        print(f"ERROR in weekly pattern: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return jsonify({"error": str(e), "grid": [], "total_crimes": 0}), 200
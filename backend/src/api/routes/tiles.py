@@ -0,0 +1,79 @@
+# backend/src/api/routes/tiles.py
+import gzip
+import re
+
+from flask import Blueprint, current_app, jsonify, request
+
+from database import get_db, get_tiles
+from database.tiles import render_tile
+
+tiles_bp = Blueprint("tiles", __name__)
+
+MVT_MIMETYPE = "application/vnd.mapbox-vector-tile"
+MONTH_PATTERN = re.compile(r"\d{4}-\d{2}")
+
+
+@tiles_bp.route("/<int:z>/<int:x>/<int:y>.mvt", methods=["GET"])
+def get_tile(z, x, y):
+    """One vector tile of crime points and clustered counts"""
+    crime_type = request.args.get("crime_type")
+    month = request.args.get("month")
+    if month and not MONTH_PATTERN.fullmatch(month):
+        return jsonify({"error": f"Invalid month: {month} (expected YYYY-MM)"}), 400
+    if x >= 2**z or y >= 2**z:
+        return jsonify({"error": f"Tile {z}/{x}/{y} does not exist"}), 400
+
+    store = get_tiles()
+    if store is None:
+        return jsonify({"error": "No tile pyramid (setup_database.py --tiles)"}), 404
+    maxzoom = int(store.metadata()["maxzoom"])
+    if z > maxzoom:
+        # TileJSON's maxzoom tells map clients to overzoom instead
+        return jsonify({"error": f"Tiles stop at zoom {maxzoom}"}), 404
+
+    if month:
+        # Month tiles are cut per request from that month's crimes
+        conn = get_db()
+        try:
+            data = render_tile(conn, z, x, y, crime_type, month)
+        finally:
+            conn.close()
+    else:
+        # A single indexed lookup, whatever the zoom or the crime type
+        data = store.tile(z, x, y, crime_type)
+    if data is None:
+        return "", 204
+
+    response = current_app.response_class(mimetype=MVT_MIMETYPE)
+    if "gzip" in request.accept_encodings:
+        response.set_data(data)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response.set_data(gzip.decompress(data))
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@tiles_bp.route("/metadata", methods=["GET"])
+def get_tile_metadata():
+    """TileJSON for the pyramid, plus the crime types and months it covers"""
+    store = get_tiles()
+    if store is None:
+        return jsonify({"error": "No tile pyramid (setup_database.py --tiles)"}), 404
+
+    metadata = store.metadata()
+    return jsonify(
+        {
+            "tilejson": "3.0.0",
+            "name": metadata["name"],
+            "scheme": "xyz",
+            "tiles": [request.host_url.rstrip("/") + "/api/tiles/{z}/{x}/{y}.mvt"],
+            "minzoom": int(metadata["minzoom"]),
+            "maxzoom": int(metadata["maxzoom"]),
+            "bounds": [float(v) for v in str(metadata["bounds"]).split(",")],
+            "center": [float(v) for v in str(metadata["center"]).split(",")],
+            "vector_layers": metadata["json"]["vector_layers"],
+            "crime_types": metadata["crime_types"],
+            "months": metadata["months"],
+        }
+    )
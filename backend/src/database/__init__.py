@@ -0,0 +1,114 @@
+# backend/src/database/__init__.py
+import os
+import threading
+
+from database.pool import ConnectionPool
+from database.shards import MANIFEST, ShardRouter
+from database.tiles import TileStore, tile_path
+
+# ==============================================================
+# DATABASE CONFIGURATION
+# ==============================================================
+
+# Construct the correct database path (relative to this file)
+DB_PATH = os.path.join(
+    os.path.dirname(__file__),  # backend/src/database/
+    "..",  # backend/src/
+    "..",  # backend/
+    "data",  # backend/data/
+    "processed",  # backend/data/processed/
+    "crimes_clean.db",  # backend/data/processed/crimes_clean.db
+)
+
+# Resolve to an absolute path
+DB_PATH = os.path.abspath(DB_PATH)
+
+
+# ==============================================================
+# DATABASE CONNECTION
+# ==============================================================
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The shared read-only connection pool for DB_PATH"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+_router = None
+
+
+def shard_dir():
+    """Year shards live next to the database they are copied from"""
+    return os.path.join(os.path.dirname(DB_PATH), "shards")
+
+
+def get_shards():
+    """ShardRouter over the year shards, or None when none were written"""
+    global _router
+    directory = shard_dir()
+    if not os.path.exists(os.path.join(directory, MANIFEST)):
+        return None
+    with _pool_lock:
+        if _router is None or _router.shard_dir != directory:
+            if _router is not None:
+                _router.close()
+            _router = ShardRouter(directory)
+        return _router
+
+
+_tiles = None
+
+
+def get_tiles():
+    """TileStore over the vector tile pyramid, or None when none was written"""
+    global _tiles
+    path = tile_path(DB_PATH)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _pool_lock:
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if _tiles is None or _tiles.path != path or _tiles.identity != identity:
+            if _tiles is not None:
+                _tiles.close()
+            _tiles = TileStore(path)
+        return _tiles
+
+
+def set_db_path(path):
+    """Point the API at another database file (tests, benchmarks)"""
+    global DB_PATH
+    DB_PATH = os.path.abspath(path)
+    return get_pool()
+
+
+def get_db_connection():
+    """Check out a pooled read-only connection; conn.close() returns it."""
+    try:
+        if not os.path.exists(DB_PATH):
+            raise FileNotFoundError(f"Database not found at: {DB_PATH}")
+
+        return get_pool().connect()
+    except Exception as e:
+        # Minimal production-safe logging
+        print(f"❌ Database connection error: {e}")
+        raise
+
+
+def get_db():
+    """Pooled read-only connection for a request, or None if unavailable"""
+    try:
+        return get_db_connection()
+    except Exception:
+        return None
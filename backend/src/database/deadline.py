@@ -0,0 +1,68 @@
+# src/database/deadline.py
+"""
+Time budgets for queries on pooled connections
+
+A request starts a `Deadline`; every connection checked out of a pool
+while it is active gets a SQLite progress handler that aborts the running
+statement once the deadline has passed. SQLite then raises
+OperationalError("interrupted") and `deadline.expired` is set, so the
+caller can tell a cancelled query from a failed one - whatever wrapped the
+error on the way up (pandas re-raises it as DatabaseError).
+
+The active deadline lives in a context variable, so it follows the request
+through Flask without being passed around. Worker threads (the shard
+router) are handed it explicitly.
+"""
+
+import contextvars
+import os
+import time
+
+# SQLite VM instructions between deadline checks; lower reacts faster but
+# spends more time calling back into Python
+PROGRESS_OPS = int(os.environ.get("SQLITE_PROGRESS_OPS", 20000))
+
+_current = contextvars.ContextVar("query_deadline", default=None)
+
+
+class Deadline:
+    """A point in time after which queries are interrupted"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self.expired = False
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def check(self):
+        """Progress handler: non-zero interrupts the running statement"""
+        if time.monotonic() >= self.expires:
+            self.expired = True
+            return 1
+        return 0
+
+
+def start_deadline(seconds):
+    """Make a new deadline the active one; returns (deadline, reset token)"""
+    deadline = Deadline(seconds)
+    return deadline, _current.set(deadline)
+
+
+def end_deadline(token):
+    """Restore whatever deadline was active before start_deadline()"""
+    _current.reset(token)
+
+
+def current_deadline():
+    """The active Deadline, or None outside a budgeted request"""
+    return _current.get()
+
+
+def watch(conn, deadline):
+    """Install (or with None, remove) the deadline check on a connection"""
+    if deadline is None:
+        conn.set_progress_handler(None, 0)
+    else:
+        conn.set_progress_handler(deadline.check, PROGRESS_OPS)
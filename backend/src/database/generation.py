@@ -0,0 +1,46 @@
+# src/database/generation.py
+"""
+Data generation: a number that changes whenever ingest changes the data
+
+Everything the API serves is a function of the stored crimes, so cached
+responses (and their ETags) stay valid exactly as long as the generation
+they were computed under. Ingest bumps it after each load; readers compare.
+
+The value is kept in ingest_state. It always grows and is seeded from the
+clock, so a rebuilt database never repeats a generation an old cache entry
+might still carry.
+"""
+
+import time
+from datetime import datetime, timezone
+
+# Generations below this (2001-01-01 in µs) are plain counters, not times
+CLOCK_SEEDED = 978307200 * 10**6
+
+
+def data_generation(conn):
+    """Current generation, 0 for a database never loaded since tracking began"""
+    row = conn.execute(
+        "SELECT value FROM ingest_state WHERE key = 'generation'"
+    ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def bump_generation(conn):
+    """Start a new generation (inside the caller's transaction); returns it"""
+    generation = max(data_generation(conn) + 1, time.time_ns() // 1000)
+    conn.execute(
+        """
+        INSERT INTO ingest_state (key, value) VALUES ('generation', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """,
+        (str(generation),),
+    )
+    return generation
+
+
+def generation_time(generation):
+    """UTC time a clock-seeded generation started, to the second, else None"""
+    if generation < CLOCK_SEEDED:
+        return None
+    return datetime.fromtimestamp(generation // 10**6, tz=timezone.utc)
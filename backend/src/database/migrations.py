@@ -0,0 +1,415 @@
+# src/database/migrations.py
+"""
+Versioned schema migrations for the crimes database
+
+setup_database.py, ChicagoCrimeDB and older releases of both built
+slightly different `crimes` tables. `migrate()` brings any of them to one
+canonical schema. The applied version lives in PRAGMA user_version; each
+pending migration runs once in its own transaction, and ANALYZE refreshes
+the planner statistics afterwards.
+"""
+
+import sqlite3
+from datetime import datetime
+
+from database.summaries import create_summary_tables, rebuild_summaries
+from utils.grid import GRID_RESOLUTIONS, cell_column, cell_key_sql
+
+# Canonical crimes table; older databases gain any missing column
+CRIMES_COLUMNS = [
+    ("case_number", "TEXT"),
+    ("date", "TEXT"),
+    ("crime_type", "TEXT"),
+    ("description", "TEXT"),
+    ("latitude", "REAL"),
+    ("longitude", "REAL"),
+    ("district", "TEXT"),
+    ("ward", "TEXT"),
+    ("beat", "TEXT"),
+    ("year_month", "TEXT"),
+    ("epoch", "INTEGER"),
+    ("hour", "INTEGER"),
+    ("weekday", "INTEGER"),
+    ("iso_week", "INTEGER"),
+    ("cell_coarse", "INTEGER"),
+    ("cell_medium", "INTEGER"),
+    ("cell_fine", "INTEGER"),
+]
+
+# Indexes shaped after the API's predicates, so each endpoint query reads
+# only the index. Partial indexes repeat the endpoint's own WHERE terms.
+QUERY_INDEXES = {
+    # /analysis/temporal/trends, /forecast/short-term, /crimes/all ordering
+    "idx_date_type": "ON crimes(date, crime_type)",
+    # /crimes/types and every crime_type filter
+    "idx_type_date": "ON crimes(crime_type, date)",
+    # /forecast/risk-assessment district ranking with centroids
+    "idx_district_date": (
+        "ON crimes(district, date, latitude, longitude) "
+        "WHERE district IS NOT NULL AND district != ''"
+    ),
+    # /stats/monthly
+    "idx_year_month": "ON crimes(year_month) WHERE year_month IS NOT NULL",
+    # /crimes/hotspots
+    "idx_date_location": "ON crimes(date, latitude, longitude)",
+}
+
+# Hotspot/density GROUP BYs over a date window read only these indexes.
+# Coarse and medium cells are few, so their cell-led indexes are walked
+# in cell order with a skip-scan seek to the window in each cell: the
+# GROUP BY needs no sort. Fine cells are too many to seek one by one; a
+# window over them is a range scan of the date-led index.
+GRID_INDEXES = {
+    "idx_date_cells": "ON crimes(date, cell_coarse, cell_medium, cell_fine)",
+    "idx_cell_coarse_date": "ON crimes(cell_coarse, date)",
+    "idx_cell_medium_date": "ON crimes(cell_medium, date)",
+}
+
+# R*Tree over crime coordinates, kept in sync with crimes by triggers.
+# Points are stored as zero-area boxes keyed by crimes.id.
+SPATIAL_INDEX = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS crimes_rtree
+    USING rtree(id, min_lon, max_lon, min_lat, max_lat)
+"""
+
+SPATIAL_TRIGGERS = {
+    "crimes_rtree_insert": """
+        AFTER INSERT ON crimes
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL
+        BEGIN
+            INSERT INTO crimes_rtree VALUES (
+                new.id, new.longitude, new.longitude, new.latitude, new.latitude
+            );
+        END
+    """,
+    "crimes_rtree_update": """
+        AFTER UPDATE OF latitude, longitude ON crimes
+        BEGIN
+            DELETE FROM crimes_rtree WHERE id = old.id;
+            INSERT INTO crimes_rtree SELECT
+                new.id, new.longitude, new.longitude, new.latitude, new.latitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END
+    """,
+    "crimes_rtree_delete": """
+        AFTER DELETE ON crimes
+        BEGIN
+            DELETE FROM crimes_rtree WHERE id = old.id;
+        END
+    """,
+}
+
+# Full-text index over crime descriptions. External content: the text stays
+# in crimes and crimes_fts holds only the inverted index, keyed by crimes.id.
+SEARCH_INDEX = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS crimes_fts
+    USING fts5(description, content='crimes', content_rowid='id')
+"""
+
+# An external-content index must be told the old text to remove it
+SEARCH_TRIGGERS = {
+    "crimes_fts_insert": """
+        AFTER INSERT ON crimes
+        BEGIN
+            INSERT INTO crimes_fts (rowid, description)
+            VALUES (new.id, new.description);
+        END
+    """,
+    "crimes_fts_update": """
+        AFTER UPDATE OF description ON crimes
+        BEGIN
+            INSERT INTO crimes_fts (crimes_fts, rowid, description)
+            VALUES ('delete', old.id, old.description);
+            INSERT INTO crimes_fts (rowid, description)
+            VALUES (new.id, new.description);
+        END
+    """,
+    "crimes_fts_delete": """
+        AFTER DELETE ON crimes
+        BEGIN
+            INSERT INTO crimes_fts (crimes_fts, rowid, description)
+            VALUES ('delete', old.id, old.description);
+        END
+    """,
+}
+
+# Single-column indexes that the covering indexes above make redundant
+SUPERSEDED_INDEXES = [
+    "idx_date",
+    "idx_crime_type",
+    "idx_district",
+    "idx_year_month",  # recreated as a partial index
+    "idx_crimes_date",
+    "idx_crimes_type",
+    "idx_crimes_district",
+]
+
+
+def iso_week(date_text):
+    """'2025-09-22...' → 202539 (ISO year * 100 + ISO week)"""
+    if not date_text:
+        return None
+    year, week, _ = datetime.strptime(date_text[:10], "%Y-%m-%d").isocalendar()
+    return year * 100 + week
+
+
+def table_columns(conn, table="crimes"):
+    """Column names of a table"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def has_unique_index(conn, column, table="crimes"):
+    """True if a UNIQUE index covers exactly `column`"""
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        name, unique = index[1], index[2]
+        columns = [row[2] for row in conn.execute(f"PRAGMA index_info('{name}')")]
+        if unique and columns == [column]:
+            return True
+    return False
+
+
+# ==================== MIGRATIONS ====================
+
+
+def create_tables(conn):
+    """crimes and ingest_state, for databases that have neither"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crimes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_number TEXT,
+            date TEXT NOT NULL,
+            crime_type TEXT NOT NULL,
+            description TEXT,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            district TEXT,
+            ward TEXT,
+            beat TEXT,
+            year_month TEXT,
+            epoch INTEGER,
+            hour INTEGER,
+            weekday INTEGER,
+            iso_week INTEGER,
+            cell_coarse INTEGER,
+            cell_medium INTEGER,
+            cell_fine INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Watermark of the last ingested record, used by incremental refreshes
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+def canonical_columns(conn):
+    """primary_type → crime_type, plus any missing canonical column"""
+    existing = table_columns(conn)
+    if "primary_type" in existing and "crime_type" not in existing:
+        conn.execute("ALTER TABLE crimes RENAME COLUMN primary_type TO crime_type")
+        existing = table_columns(conn)
+
+    # Time buckets and grid cells are added (and backfilled) by their own
+    # migrations
+    later = {"epoch", "hour", "weekday", "iso_week"}
+    later |= {cell_column(name) for name in GRID_RESOLUTIONS}
+    for name, kind in CRIMES_COLUMNS:
+        if name not in existing and name not in later:
+            conn.execute(f"ALTER TABLE crimes ADD COLUMN {name} {kind}")
+
+    conn.execute(
+        "UPDATE crimes SET year_month = substr(date, 1, 7) WHERE year_month IS NULL"
+    )
+
+
+def unique_case_numbers(conn):
+    """Drop duplicate case numbers, keeping the newest copy, and enforce UNIQUE"""
+    if has_unique_index(conn, "case_number"):
+        return
+
+    conn.execute("""
+        DELETE FROM crimes
+        WHERE case_number IS NOT NULL
+          AND id NOT IN (SELECT MAX(id) FROM crimes GROUP BY case_number)
+    """)
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_case_number ON crimes(case_number)"
+    )
+
+
+def time_buckets(conn):
+    """epoch/hour/weekday/iso_week columns with covering indexes"""
+    existing = table_columns(conn)
+    for name in ("epoch", "hour", "weekday", "iso_week"):
+        if name not in existing:
+            conn.execute(f"ALTER TABLE crimes ADD COLUMN {name} INTEGER")
+
+    # Older loads truncated `date` to the day, so their hour stays NULL
+    conn.create_function("iso_week", 1, iso_week, deterministic=True)
+    conn.execute("""
+        UPDATE crimes SET
+            epoch = CAST(strftime('%s', date) AS INTEGER),
+            hour = CASE WHEN length(date) > 10
+                        THEN CAST(strftime('%H', date) AS INTEGER) END,
+            weekday = (CAST(strftime('%w', date) AS INTEGER) + 6) % 7,
+            iso_week = iso_week(date)
+        WHERE epoch IS NULL
+    """)
+
+    # Hour-of-day / day-of-week counts never touch the table
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_epoch_hour ON crimes(epoch, crime_type, hour)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_epoch_weekday ON crimes(epoch, weekday, hour)"
+    )
+
+
+def query_indexes(conn):
+    """Replace single-column indexes with covering/partial query indexes"""
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, definition in QUERY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+
+def grid_cells(conn):
+    """Integer grid-cell keys at every resolution, with a covering index"""
+    existing = table_columns(conn)
+    columns = {cell_column(name): size for name, size in GRID_RESOLUTIONS.items()}
+    for name in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE crimes ADD COLUMN {name} INTEGER")
+
+    assignments = ", ".join(
+        f"{name} = {cell_key_sql(size)}" for name, size in columns.items()
+    )
+    conn.execute(f"""
+        UPDATE crimes SET {assignments}
+        WHERE cell_medium IS NULL
+          AND latitude IS NOT NULL AND longitude IS NOT NULL
+    """)
+
+    for name, definition in GRID_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+
+def grid_indexes(conn):
+    """Indexes added to GRID_INDEXES after the grid-cell migration"""
+    for name, definition in GRID_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+
+def summary_tables(conn):
+    """Pre-aggregated count tables, built from the crimes already stored"""
+    create_summary_tables(conn)
+    rebuild_summaries(conn)
+
+
+def spatial_index(conn):
+    """Backfilled R*Tree over crime coordinates, synced by triggers"""
+    # Recreating is far cheaper than deleting every entry of a full R*Tree
+    conn.execute("DROP TABLE IF EXISTS crimes_rtree")
+    conn.execute(SPATIAL_INDEX)
+    conn.execute("""
+        INSERT INTO crimes_rtree
+        SELECT id, longitude, longitude, latitude, latitude
+        FROM crimes
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    """)
+    for name, body in SPATIAL_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def search_index(conn):
+    """Backfilled FTS5 index over descriptions, synced by triggers"""
+    # DROP also removes the shadow tables, so a rebuild starts from empty
+    conn.execute("DROP TABLE IF EXISTS crimes_fts")
+    conn.execute(SEARCH_INDEX)
+    conn.execute("INSERT INTO crimes_fts (crimes_fts) VALUES ('rebuild')")
+    for name, body in SEARCH_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_sync_triggers(conn):
+    """Stop syncing crimes_rtree and crimes_fts
+
+    Bulk loads call spatial_index() and search_index() afterwards.
+    """
+    for name in [*SPATIAL_TRIGGERS, *SEARCH_TRIGGERS]:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+# (version, description, migration) - append only, never renumber
+MIGRATIONS = [
+    (1, "create crimes and ingest_state", create_tables),
+    (2, "canonical crimes columns", canonical_columns),
+    (3, "unique case numbers", unique_case_numbers),
+    (4, "time-bucket columns", time_buckets),
+    (5, "covering and partial query indexes", query_indexes),
+    (6, "aggregate summary tables", summary_tables),
+    (7, "R*Tree spatial index", spatial_index),
+    (8, "grid-cell keys", grid_cells),
+    (9, "FTS5 description search", search_index),
+    (10, "cell-led hotspot indexes", grid_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    """Migration version recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def analyze(conn):
+    """Refresh the query planner statistics for every table and index"""
+    conn.execute("ANALYZE")
+
+
+def optimize(conn):
+    """Cheap statistics refresh - only re-analyzes tables that changed a lot"""
+    conn.execute("PRAGMA optimize")
+
+
+def migrate(conn, verbose=True):
+    """
+    Apply every pending migration, then ANALYZE
+
+    Args:
+        conn: sqlite3 connection to the crimes database
+        verbose: Print one line per applied migration
+
+    Returns:
+        Schema version after migrating
+    """
+    version = schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if not pending:
+        return version
+
+    # Explicit BEGIN/COMMIT around each step, whatever mode conn was opened in
+    conn.commit()
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for number, description, migration in pending:
+            if verbose:
+                print(f"  Migration {number}: {description}")
+            conn.execute("BEGIN")
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        analyze(conn)
+    finally:
+        conn.isolation_level = isolation_level
+
+    return SCHEMA_VERSION
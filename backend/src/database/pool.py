@@ -0,0 +1,145 @@
+# src/database/pool.py
+"""
+Shared read-only SQLite connections for the API
+
+Opening a connection and applying pragmas costs more than most of the
+API's indexed queries, so connections are opened once and recycled. Each
+one is read-only (`mode=ro` URI plus `query_only`), memory-maps the
+database and keeps a large page cache. A connection is used by one thread
+at a time: `connect()` checks one out, and the usual `conn.close()` hands
+it back for the next request, whichever Flask worker thread serves it.
+
+While a request deadline is active (see database/deadline.py), checked
+out connections abort queries that run past it.
+
+Files that are never modified in place (sealed year shards) can be opened
+with `immutable=True`: SQLite then skips file locking and change checks.
+"""
+
+import os
+import sqlite3
+import threading
+from urllib.parse import quote
+
+from database.deadline import current_deadline, watch
+
+# Per-connection tuning; cache_size is in KiB when negative
+MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+
+# Idle connections kept for reuse; extras are closed when handed back
+MAX_IDLE = 16
+
+
+class PooledConnection(sqlite3.Connection):
+    """A connection whose close() returns it to its pool"""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+            return
+        # Never hand over an open read transaction (or a pinned WAL snapshot)
+        if self.in_transaction:
+            self.rollback()
+        watch(self, None)
+        self.pool.release(self)
+
+    def discard(self):
+        """Really close the underlying connection"""
+        super().close()
+
+
+class ConnectionPool:
+    """Recycled read-only connections to one database file"""
+
+    def __init__(
+        self,
+        db_path,
+        mmap_size=MMAP_SIZE,
+        cache_size_kb=CACHE_SIZE_KB,
+        max_idle=MAX_IDLE,
+        immutable=False,
+    ):
+        self.db_path = os.path.abspath(db_path)
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        # An immutable file is read as-is, whatever its journal mode
+        self._wal_checked = immutable
+        self.opened = 0
+
+    def connect(self, deadline=None):
+        """Check out a connection (reused when one is idle)
+
+        Queries on it are interrupted after `deadline`, by default the
+        active request deadline.
+        """
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        watch(conn, deadline or current_deadline())
+        return conn
+
+    def release(self, conn):
+        """Take a connection back; called by conn.close()"""
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.discard()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on return)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+    def _open(self):
+        if not self._wal_checked:
+            ensure_wal(self.db_path)
+            self._wal_checked = True
+
+        uri = f"file:{quote(self.db_path)}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            factory=PooledConnection,
+            # Handed between request threads, but only ever used by one
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = ON")
+        conn.pool = self
+        self.opened += 1
+        return conn
+
+
+def ensure_wal(db_path):
+    """Switch a database to WAL so readers never block the ingest writer
+
+    journal_mode is stored in the file, so this only writes once; a
+    read-only connection cannot change it itself.
+    """
+    try:
+        conn = sqlite3.connect(f"file:{quote(db_path)}?mode=rw", uri=True)
+        try:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if mode.lower() != "wal":
+                conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠ Could not enable WAL on {db_path}: {e}")
@@ -1,8 +1,17 @@
 # src/database/schema.py
 import sqlite3
 import os
+import sys
 import pandas as pd
 
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.generation import bump_generation  # noqa: E402
+from database.migrations import migrate, table_columns  # noqa: E402
+from database.summaries import refresh_summaries  # noqa: E402
+from utils.data_cleaner import derive_stored_columns  # noqa: E402
+
 
 class ChicagoCrimeDB:
     def __init__(self, db_path=None):
@@ -25,49 +34,13 @@ class ChicagoCrimeDB:
         return self.conn
 
     def create_tables(self):
-        """Create database schema"""
+        """Create (or upgrade) the canonical database schema"""
         if not self.conn:
             self.connect()
 
-        create_crimes_table = """
-        CREATE TABLE IF NOT EXISTS crimes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            case_number TEXT UNIQUE,
-            date TEXT NOT NULL,
-            primary_type TEXT NOT NULL,
-            description TEXT,
-            crime_category TEXT,
-            latitude REAL NOT NULL,
-            longitude REAL NOT NULL,
-            beat TEXT,
-            district TEXT,
-            ward TEXT,
-            year INTEGER,
-            month INTEGER,
-            hour INTEGER,
-            day_of_week TEXT,
-            is_weekend INTEGER,
-            season TEXT,
-            arrest INTEGER,
-            domestic INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-
-        create_indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_crimes_date ON crimes(date);",
-            "CREATE INDEX IF NOT EXISTS idx_crimes_type ON crimes(primary_type);",
-            "CREATE INDEX IF NOT EXISTS idx_crimes_location ON crimes(latitude, longitude);",
-            "CREATE INDEX IF NOT EXISTS idx_crimes_district ON crimes(district);",
-            "CREATE INDEX IF NOT EXISTS idx_crimes_year_month ON crimes(year, month);",
-        ]
-
         try:
-            self.conn.execute(create_crimes_table)
-            for sql in create_indexes:
-                self.conn.execute(sql)
-            self.conn.commit()
-            print("✓ Database schema created successfully!")
+            version = migrate(self.conn)
+            print(f"✓ Database schema ready (v{version})")
         except Exception as e:
             print(f"Error creating schema: {e}")
 
@@ -77,13 +50,22 @@ class ChicagoCrimeDB:
             self.connect()
 
         try:
-            df_insert = df.copy()
-            df_insert["arrest"] = df_insert.get("arrest", False).astype(int)
-            df_insert["domestic"] = df_insert.get("domestic", False).astype(int)
-            if "is_weekend" in df_insert.columns:
-                df_insert["is_weekend"] = df_insert["is_weekend"].astype(int)
+            # Time buckets and grid cells are stored as the ingest pipeline
+            # stores them, so these rows are found by the epoch- and
+            # cell-keyed queries and the summaries too. The other analysis
+            # columns (season, day_of_week, ...) are not table columns.
+            df = derive_stored_columns(df)
+            columns = table_columns(self.conn)
+            df_insert = df[[c for c in df.columns if c in columns]].copy()
+            for flag in ("arrest", "domestic"):
+                if flag in df_insert.columns:
+                    df_insert[flag] = df_insert[flag].astype(int)
 
             df_insert.to_sql("crimes", self.conn, if_exists="append", index=False)
+            if "date" in df_insert.columns:
+                days = df_insert["date"].dropna().astype(str).str[:10]
+                refresh_summaries(self.conn, set(days))
+            bump_generation(self.conn)
             self.conn.commit()
             print(f"✓ Inserted {len(df_insert)} records into database")
         except Exception as e:
@@ -98,17 +80,17 @@ class ChicagoCrimeDB:
             "total_crimes": "SELECT COUNT(*) as count FROM crimes",
             "date_range": "SELECT MIN(date) as min_date, MAX(date) as max_date FROM crimes",
             "top_crime_types": """
-                SELECT primary_type, COUNT(*) as count 
+                SELECT crime_type, COUNT(*) as count 
                 FROM crimes 
-                GROUP BY primary_type 
+                GROUP BY crime_type 
                 ORDER BY count DESC 
                 LIMIT 10
             """,
             "crimes_by_year": """
-                SELECT year, COUNT(*) as count 
+                SELECT substr(date, 1, 4) as year, COUNT(*) as count 
                 FROM crimes 
-                GROUP BY year 
-                ORDER BY year
+                GROUP BY 1 
+                ORDER BY 1
             """,
         }
 
@@ -0,0 +1,102 @@
+# src/database/search.py
+"""
+Ranked full-text search over crime descriptions
+
+`crimes_fts` (migration 9) indexes crimes.description. A search is one
+MATCH against that index joined back to crimes by id, so the usual type
+and date filters still apply, ordered by bm25 relevance and then newest
+first. Notebooks can call `search_crimes()` directly instead of scanning
+with LIKE '%...%'.
+"""
+
+import re
+import sqlite3
+
+import pandas as pd
+
+SEARCH_COLUMNS = [
+    "id",
+    "case_number",
+    "date",
+    "crime_type",
+    "description",
+    "latitude",
+    "longitude",
+    "district",
+]
+
+
+def quote_terms(text):
+    """'parking lot/garage' → '"parking" "lot/garage"' (every word literal)"""
+    words = re.findall(r"\S+", text)
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def search_query(crime_type=None, start_date=None, end_date=None, limit=100):
+    """SQL and parameters for a search, the MATCH text left as the first ?"""
+    query = f"""
+        SELECT {", ".join(f"c.{name}" for name in SEARCH_COLUMNS)},
+               crimes_fts.rank AS rank
+        FROM crimes_fts
+        JOIN crimes c ON c.id = crimes_fts.rowid
+        WHERE crimes_fts MATCH ?
+    """
+    params = []
+
+    if crime_type:
+        query += " AND c.crime_type = ?"
+        params.append(crime_type)
+
+    if start_date:
+        query += " AND c.date >= ?"
+        params.append(start_date)
+
+    if end_date:
+        # Dates carry a time of day; a bare end date covers the whole day
+        params.append(end_date + " 23:59:59" if len(end_date) == 10 else end_date)
+        query += " AND c.date <= ?"
+
+    # rank is bm25(): lower is more relevant
+    query += " ORDER BY rank, c.date DESC LIMIT ?"
+    params.append(limit)
+    return query, params
+
+
+def search_crimes(
+    conn, text, crime_type=None, start_date=None, end_date=None, limit=100
+):
+    """
+    Crimes whose description matches `text`, most relevant first
+
+    `text` is an FTS5 query ("parking lot", apart*, garage OR alley, ...).
+    Text that is not valid FTS5 syntax is searched as literal words.
+
+    Args:
+        conn: sqlite3 connection to the crimes database
+        text: Search terms
+        crime_type: Only this crime type
+        start_date: Earliest date (YYYY-MM-DD)
+        end_date: Latest date, inclusive
+        limit: Maximum number of rows
+
+    Returns:
+        DataFrame of SEARCH_COLUMNS plus `rank`
+
+    Raises:
+        ValueError: If `text` has no searchable words
+    """
+    if not text or not text.strip():
+        raise ValueError("Search text is empty")
+
+    query, params = search_query(crime_type, start_date, end_date, limit)
+    try:
+        return pd.read_sql_query(query, conn, params=[text, *params])
+    except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+        # Only query-syntax errors are retried; anything else is real
+        if "fts5" not in str(e) and "no such column" not in str(e):
+            raise
+
+    try:
+        return pd.read_sql_query(query, conn, params=[quote_terms(text), *params])
+    except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+        raise ValueError(f"Cannot search for '{text}': {e}") from e
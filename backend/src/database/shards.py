@@ -0,0 +1,388 @@
+# src/database/shards.py
+"""
+Year-partitioned copies of the crimes table
+
+With `setup_database.py --shards`, every year of crimes is also written to
+its own file, `shards/crimes_<year>.db`, next to crimes_clean.db. The
+single database stays the ingest target (upserts, watermark, summaries);
+the shards serve the raw-row API queries, which then walk one year's
+B-tree instead of the whole table.
+
+Past years are sealed: each is written once to a temporary file, renamed
+into place and opened with `immutable=1`, so readers skip locking and
+change detection entirely. Only the newest year is live - refreshed in
+place, per touched day, under WAL. When a new year appears the previous
+live shard is sealed.
+
+`manifest.json` lists each shard's date range; ShardRouter prunes shards
+by the requested dates and queries the rest in parallel.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from database.deadline import current_deadline
+from database.generation import bump_generation
+from database.migrations import (
+    CRIMES_COLUMNS,
+    GRID_INDEXES,
+    QUERY_INDEXES,
+    spatial_index,
+)
+from database.pool import ConnectionPool
+from database.streaming import iter_frames
+from database.summaries import day_runs, next_day
+
+MANIFEST = "manifest.json"
+
+# Bumped whenever shard contents change shape (1: crimes_rtree added,
+# 2: grid-cell columns); older shards are rewritten on the next run
+SHARD_FORMAT = 2
+
+# Threads used to query shards concurrently (sqlite3 releases the GIL)
+SHARD_WORKERS = int(os.environ.get("SHARD_WORKERS", 4))
+
+SHARD_COLUMNS = ["id"] + [name for name, _ in CRIMES_COLUMNS]
+
+
+def shard_path(shard_dir, year):
+    return os.path.join(shard_dir, f"crimes_{year}.db")
+
+
+def read_manifest(shard_dir):
+    """{year: {"rows", "min_date", "max_date", "sealed", "format"}} or {}"""
+    try:
+        with open(os.path.join(shard_dir, MANIFEST)) as f:
+            return json.load(f)["shards"]
+    except FileNotFoundError:
+        return {}
+
+
+# ==================== WRITING ====================
+
+
+def write_shards(db_path, shard_dir, days=None, verbose=True):
+    """
+    Bring the year shards in line with the crimes table in db_path
+
+    Args:
+        db_path: The single crimes database (source of truth)
+        shard_dir: Directory holding the shards and manifest.json
+        days: 'YYYY-MM-DD' days changed by an incremental load; None
+              rewrites every shard
+
+    Returns:
+        The new manifest
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = read_manifest(shard_dir)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # The monthly summary lists every year without scanning crimes
+        years = [
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT substr(year_month, 1, 4) FROM monthly_type "
+                "ORDER BY 1"
+            )
+        ]
+    finally:
+        conn.close()
+
+    live = years[-1] if years else None
+    changed = {d[:4] for d in days} if days is not None else set(years)
+
+    shards = {}
+    for year in years:
+        entry = manifest.get(year)
+        if entry is not None and entry.get("format") != SHARD_FORMAT:
+            entry = None
+        if year != live:
+            # A past year is rewritten only when it changed or was live before
+            if entry is None or not entry["sealed"] or year in changed:
+                entry = seal_shard(db_path, shard_dir, year)
+                if verbose:
+                    print(f"  Sealed shard {year}: {entry['rows']:,} rows")
+        elif entry is None or entry["sealed"] or days is None:
+            entry = build_live_shard(db_path, shard_dir, year)
+            if verbose:
+                print(f"  Built live shard {year}: {entry['rows']:,} rows")
+        elif year in changed:
+            year_days = sorted(d for d in days if d.startswith(year))
+            entry = refresh_live_shard(db_path, shard_dir, year, year_days)
+            if verbose:
+                print(f"  Refreshed live shard {year}: {len(year_days)} days")
+        shards[year] = entry
+
+    for year in set(manifest) - set(shards):
+        os.remove(shard_path(shard_dir, year))
+
+    write_manifest(shard_dir, shards)
+
+    # The API serves /crimes/all from the shards, so responses cached
+    # against the old ones must go
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            bump_generation(conn)
+    finally:
+        conn.close()
+    return shards
+
+
+def seal_shard(db_path, shard_dir, year):
+    """Write a past year to a fresh file and swap it in atomically"""
+    path = shard_path(shard_dir, year)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = copy_year(db_path, tmp_path, year)
+    try:
+        entry = shard_entry(conn, sealed=True)
+    finally:
+        conn.close()
+
+    # Readers holding the old file keep their snapshot; new ones see this
+    os.replace(tmp_path, path)
+    return entry
+
+
+def build_live_shard(db_path, shard_dir, year):
+    """Write the newest year from scratch, in WAL mode for in-place updates"""
+    path = shard_path(shard_dir, year)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = copy_year(db_path, tmp_path, year)
+    try:
+        entry = shard_entry(conn, sealed=False)
+    finally:
+        conn.close()
+
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.replace(tmp_path, path)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        conn.close()
+    return entry
+
+
+def refresh_live_shard(db_path, shard_dir, year, days):
+    """Replace the given days of the live shard in one transaction"""
+    columns = ", ".join(SHARD_COLUMNS)
+    conn = sqlite3.connect(shard_path(shard_dir, year), isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS source", (db_path,))
+        conn.execute("BEGIN")
+        try:
+            for first, last in day_runs(days):
+                bounds = (first, next_day(last))
+                conn.execute("DELETE FROM crimes WHERE date >= ? AND date < ?", bounds)
+                conn.execute(
+                    f"INSERT INTO crimes ({columns}) SELECT {columns} "
+                    "FROM source.crimes WHERE date >= ? AND date < ?",
+                    bounds,
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("DETACH DATABASE source")
+        conn.execute("PRAGMA optimize")
+        return shard_entry(conn, sealed=False)
+    finally:
+        conn.close()
+
+
+def copy_year(db_path, path, year):
+    """New shard file holding one year of crimes, indexed like the main table"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    definitions = ", ".join(f"{name} {kind}" for name, kind in CRIMES_COLUMNS)
+    columns = ", ".join(SHARD_COLUMNS)
+
+    conn.execute(f"CREATE TABLE crimes (id INTEGER PRIMARY KEY, {definitions})")
+    conn.execute("ATTACH DATABASE ? AS source", (db_path,))
+    conn.execute("BEGIN")
+    conn.execute(
+        f"INSERT INTO crimes ({columns}) SELECT {columns} FROM source.crimes "
+        "WHERE date >= ? AND date < ? ORDER BY date",
+        (year, str(int(year) + 1)),
+    )
+    conn.execute("COMMIT")
+    conn.execute("DETACH DATABASE source")
+
+    for name, definition in {**QUERY_INDEXES, **GRID_INDEXES}.items():
+        conn.execute(f"CREATE INDEX {name} {definition}")
+    # Bulk-filled, then kept in sync when the live shard is refreshed
+    spatial_index(conn)
+    conn.execute("ANALYZE")
+    return conn
+
+
+def shard_entry(conn, sealed):
+    rows, min_date, max_date = conn.execute(
+        "SELECT COUNT(*), MIN(date), MAX(date) FROM crimes"
+    ).fetchone()
+    return {
+        "rows": rows,
+        "min_date": min_date,
+        "max_date": max_date,
+        "sealed": sealed,
+        "format": SHARD_FORMAT,
+    }
+
+
+def write_manifest(shard_dir, shards):
+    path = os.path.join(shard_dir, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"shards": shards}, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+# ==================== READING ====================
+
+
+class ShardRouter:
+    """Fans a crimes query out to the year shards that overlap its dates"""
+
+    def __init__(self, shard_dir, workers=SHARD_WORKERS):
+        self.shard_dir = os.path.abspath(shard_dir)
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="shard")
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._manifest_mtime = None
+        self._pools = {}  # year -> (file identity, ConnectionPool)
+
+    def shards(self):
+        """Current manifest, re-read when ingest rewrites it"""
+        path = os.path.join(self.shard_dir, MANIFEST)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                self._manifest = read_manifest(self.shard_dir)
+                self._manifest_mtime = mtime
+            return self._manifest
+
+    def prune(self, start=None, end=None, descending=True):
+        """Years whose date range overlaps [start, end], in output order"""
+        years = [
+            year
+            for year, entry in self.shards().items()
+            if entry["rows"]
+            and (start is None or entry["max_date"] >= start)
+            and (end is None or entry["min_date"] <= end)
+        ]
+        return sorted(years, reverse=descending)
+
+    def connect(self, year, deadline=None):
+        """Pooled read-only connection to one shard"""
+        path = shard_path(self.shard_dir, year)
+        sealed = self.shards()[year]["sealed"]
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_mtime_ns, sealed)
+
+        with self._lock:
+            current = self._pools.get(year)
+            if current is None or current[0] != identity:
+                # Sealed files are replaced, never edited: a new inode means
+                # a new file, so stale immutable connections are retired
+                if current is not None:
+                    current[1].close_all()
+                pool = ConnectionPool(path, immutable=sealed)
+                self._pools[year] = current = (identity, pool)
+        return current[1].connect(deadline)
+
+    def read_frame(self, sql, params=(), start=None, end=None, limit=None):
+        """
+        Run `sql` on the shards overlapping [start, end], newest first
+
+        Shards cover disjoint years, so results of a query ordered by
+        date DESC are globally ordered once concatenated newest first.
+        With a `limit` (appended to `sql` as LIMIT ?), the newest shard is
+        read alone - it usually fills the page - and older ones are then
+        read in parallel waves, each asking only for the rows still missing.
+
+        `sql` may also be a callable taking the shard connection and
+        returning (sql, params), for queries planned per shard.
+        """
+        years = self.prune(start, end)
+        # Worker threads do not see the request's context variables
+        deadline = current_deadline()
+
+        def run(year, remaining):
+            conn = self.connect(year, deadline)
+            try:
+                query, args = sql(conn) if callable(sql) else (sql, params)
+                args = list(args)
+                if limit is not None:
+                    query += " LIMIT ?"
+                    args.append(remaining)
+                return pd.read_sql_query(query, conn, params=args)
+            finally:
+                conn.close()
+
+        frames = []
+        wave = 1 if limit is not None else len(years)
+        while years:
+            batch, years = years[:wave], years[wave:]
+            remaining = None if limit is None else limit - sum(map(len, frames))
+            frames.extend(self._executor.map(run, batch, [remaining] * len(batch)))
+            if limit is not None and sum(map(len, frames)) >= limit:
+                break
+            wave = self.workers
+
+        if not frames:
+            # No shard overlaps the dates: an empty result, with its columns
+            return pd.DataFrame(columns=SHARD_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        return df.head(limit) if limit is not None else df
+
+    def iter_frames(
+        self, sql, params=(), start=None, end=None, limit=None, deadline=None
+    ):
+        """
+        Stream `sql` from the shards overlapping [start, end], newest first
+
+        Like read_frame(), but shards are read one after another through
+        iter_frames() batches, so memory holds one batch at a time. A
+        generator may outlive its request's context, so the deadline can be
+        handed in.
+        """
+        deadline = deadline or current_deadline()
+        remaining = limit
+        for year in self.prune(start, end):
+            if remaining is not None and remaining <= 0:
+                return
+            conn = self.connect(year, deadline)
+            try:
+                query, args = sql(conn) if callable(sql) else (sql, params)
+                args = list(args)
+                if remaining is not None:
+                    query += " LIMIT ?"
+                    args.append(remaining)
+                for frame in iter_frames(conn, query, args):
+                    if remaining is not None:
+                        remaining -= len(frame)
+                    yield frame
+            finally:
+                conn.close()
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for _, pool in pools.values():
+            pool.close_all()
@@ -0,0 +1,42 @@
+# src/database/streaming.py
+"""
+Bounded-memory reads: query results as a stream of small DataFrames
+
+`iter_frames()` pulls rows with `cursor.fetchmany()` in fixed batches, so
+at most one batch is held at a time however many rows the query returns.
+The first batch is smaller, so a streamed response can start right away.
+"""
+
+import os
+
+import pandas as pd
+
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", 5000))
+FIRST_BATCH_ROWS = 500
+
+
+def iter_frames(conn, sql, params=(), batch_rows=STREAM_BATCH_ROWS):
+    """
+    Yield the result of `sql` as DataFrames of at most `batch_rows` rows
+
+    Args:
+        conn: sqlite3 connection (any row factory)
+        sql: SELECT statement
+        params: Its parameters
+        batch_rows: Rows per fetchmany() after the first, smaller batch
+    """
+    cursor = conn.cursor()
+    # Plain tuples; pooled connections default to sqlite3.Row
+    cursor.row_factory = None
+    try:
+        cursor.execute(sql, list(params))
+        columns = [d[0] for d in cursor.description]
+        size = min(FIRST_BATCH_ROWS, batch_rows)
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns)
+            size = batch_rows
+    finally:
+        cursor.close()
@@ -0,0 +1,220 @@
+# src/database/summaries.py
+"""
+Pre-aggregated crime counts maintained at ingest
+
+`crime_counts` is the base cube, keyed by (day, hour, crime_type,
+district, beat). Smaller rollups are derived from it for the dashboard
+endpoints, so each endpoint reads a few thousand grouped rows instead of
+scanning every crime:
+
+    daily_type_hour   (day, crime_type, hour)  trends, hourly, weekly, forecast
+    daily_district    (day, district)          risk assessment, with centroids
+    monthly_type      (year_month, crime_type) crime types, monthly stats
+
+Ingest refreshes only the days a load touched: the days of the new rows,
+plus the old days of records that an upsert moved.
+"""
+
+from datetime import date, timedelta
+
+SUMMARY_TABLES = {
+    "crime_counts": """
+        CREATE TABLE IF NOT EXISTS crime_counts (
+            day TEXT NOT NULL,
+            hour INTEGER,
+            crime_type TEXT NOT NULL,
+            district TEXT,
+            beat TEXT,
+            n INTEGER NOT NULL,
+            located INTEGER NOT NULL,
+            lat_sum REAL,
+            lon_sum REAL
+        )
+    """,
+    "daily_type_hour": """
+        CREATE TABLE IF NOT EXISTS daily_type_hour (
+            day TEXT NOT NULL,
+            crime_type TEXT NOT NULL,
+            hour INTEGER,
+            n INTEGER NOT NULL
+        )
+    """,
+    "daily_district": """
+        CREATE TABLE IF NOT EXISTS daily_district (
+            day TEXT NOT NULL,
+            district TEXT,
+            n INTEGER NOT NULL,
+            located INTEGER NOT NULL,
+            lat_sum REAL,
+            lon_sum REAL
+        )
+    """,
+    "monthly_type": """
+        CREATE TABLE IF NOT EXISTS monthly_type (
+            year_month TEXT NOT NULL,
+            crime_type TEXT NOT NULL,
+            n INTEGER NOT NULL
+        )
+    """,
+}
+
+# Covering indexes: every endpoint query is a range scan over one of these
+SUMMARY_INDEXES = {
+    "idx_crime_counts_day": "ON crime_counts(day)",
+    "idx_daily_type_hour": "ON daily_type_hour(day, crime_type, hour, n)",
+    "idx_daily_district": (
+        "ON daily_district(day, district, n, located, lat_sum, lon_sum)"
+    ),
+    "idx_monthly_type": "ON monthly_type(year_month, crime_type, n)",
+}
+
+# (table, range column, INSERT ... SELECT with a {where} placeholder)
+DAILY_REFRESH = [
+    (
+        "crime_counts",
+        "day",
+        """
+        INSERT INTO crime_counts
+        SELECT substr(date, 1, 10), hour, crime_type, district, beat,
+               COUNT(*), COUNT(latitude), SUM(latitude), SUM(longitude)
+        FROM crimes
+        WHERE {where}
+        GROUP BY 1, hour, crime_type, district, beat
+        """,
+    ),
+    (
+        "daily_type_hour",
+        "day",
+        """
+        INSERT INTO daily_type_hour
+        SELECT day, crime_type, hour, SUM(n)
+        FROM crime_counts
+        WHERE {where}
+        GROUP BY day, crime_type, hour
+        """,
+    ),
+    (
+        "daily_district",
+        "day",
+        """
+        INSERT INTO daily_district
+        SELECT day, district, SUM(n), SUM(located), SUM(lat_sum), SUM(lon_sum)
+        FROM crime_counts
+        WHERE {where}
+        GROUP BY day, district
+        """,
+    ),
+]
+
+MONTHLY_REFRESH = """
+    INSERT INTO monthly_type
+    SELECT substr(day, 1, 7), crime_type, SUM(n)
+    FROM crime_counts
+    WHERE {where}
+    GROUP BY 1, crime_type
+"""
+
+
+def create_summary_tables(conn):
+    """Create the summary tables and their indexes"""
+    for ddl in SUMMARY_TABLES.values():
+        conn.execute(ddl)
+    for name, definition in SUMMARY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+
+def rebuild_summaries(conn):
+    """Recompute every summary from the crimes table"""
+    for table in SUMMARY_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    for _, _, insert in DAILY_REFRESH:
+        conn.execute(insert.format(where="1"))
+    conn.execute(MONTHLY_REFRESH.format(where="1"))
+
+
+def refresh_summaries(conn, days):
+    """
+    Recompute the summaries for the given days ('YYYY-MM-DD')
+
+    Runs inside the caller's transaction. Consecutive days are refreshed
+    as one range, so a chronological chunk costs one query per table.
+    """
+    days = sorted({d[:10] for d in days if d})
+    if not days:
+        return
+
+    for first, last in day_runs(days):
+        end = next_day(last)
+        # crimes.date carries a time of day; the cube is keyed by day
+        crimes_range = ("date >= ? AND date < ?", (first, end))
+        cube_range = ("day >= ? AND day < ?", (first, end))
+
+        for table, column, insert in DAILY_REFRESH:
+            conn.execute(
+                f"DELETE FROM {table} WHERE {column} >= ? AND {column} < ?",
+                (first, end),
+            )
+            where, params = crimes_range if table == "crime_counts" else cube_range
+            conn.execute(insert.format(where=where), params)
+
+    for month in sorted({d[:7] for d in days}):
+        first = f"{month}-01"
+        end = next_month(first)
+        conn.execute("DELETE FROM monthly_type WHERE year_month = ?", (month,))
+        conn.execute(
+            MONTHLY_REFRESH.format(where="day >= ? AND day < ?"), (first, end)
+        )
+
+
+def track_replaced_days(conn):
+    """
+    Record the old day of every crime an upsert rewrites
+
+    A corrected record may move to another day (or type), so that day's
+    counts need refreshing too. The TEMP trigger lives on this connection
+    only and costs nothing for plain inserts.
+    """
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS replaced_days (day TEXT PRIMARY KEY)"
+    )
+    conn.execute("""
+        CREATE TEMP TRIGGER IF NOT EXISTS track_replaced_days
+        AFTER UPDATE ON main.crimes
+        BEGIN
+            -- Not INSERT OR IGNORE: the upsert firing this trigger overrides
+            -- the conflict policy of statements inside it
+            INSERT INTO replaced_days
+            SELECT substr(old.date, 1, 10)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM replaced_days WHERE day = substr(old.date, 1, 10)
+            );
+        END
+    """)
+
+
+def take_replaced_days(conn):
+    """Days recorded by track_replaced_days since the last call"""
+    days = {row[0] for row in conn.execute("SELECT day FROM temp.replaced_days")}
+    conn.execute("DELETE FROM temp.replaced_days")
+    return days
+
+
+def day_runs(days):
+    """Sorted 'YYYY-MM-DD' strings → [(first, last)] runs of consecutive days"""
+    runs = []
+    for text in days:
+        day = date.fromisoformat(text)
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [(first.isoformat(), last.isoformat()) for first, last in runs]
+
+
+def next_day(day):
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def next_month(first_of_month):
+    d = date.fromisoformat(first_of_month)
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1).isoformat()
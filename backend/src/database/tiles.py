@@ -0,0 +1,515 @@
+# src/database/tiles.py
+"""
+Pre-rendered vector tile pyramid of crime points
+
+With `setup_database.py --tiles`, every located crime is binned into the
+tiles of zoom levels MIN_ZOOM..MAX_ZOOM and written as Mapbox Vector
+Tiles to `tiles.mbtiles` next to crimes_clean.db. Each tile is divided
+into a grid of cells (CLUSTER_CELLS per side below POINT_ZOOM, POINT_CELLS
+from it on); every non-empty cell becomes one point feature carrying its
+crime `count` and most frequent `crime_type`. At low zooms a cell is a
+cluster; from POINT_ZOOM on cells are a few metres wide and hold single
+crimes or crimes at the same address. A tile never has more than cells²
+features, however much history the database holds.
+
+Tiles are pre-rendered for all crimes and for each crime type. A month
+filter would multiply the variants by the length of the history, so month
+tiles are cut at request time from that month's crimes instead
+(`render_tile`). The file follows the MBTiles layout (`metadata(name,
+value)`, TMS row numbering, gzipped tile data), with the crime type as one
+more key column of `tile_variants`; the `tiles` view is the unfiltered
+pyramid for standard MBTiles readers.
+
+The build holds one zoom at a time: each zoom re-reads the crimes in
+batches and keeps only its running counts per (cell, crime type), so
+memory follows the number of occupied cells, not the length of the
+history. The pyramid is rebuilt in full into a temporary file and swapped
+in, so readers never see a half-written store.
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from database.generation import bump_generation
+from database.pool import ConnectionPool
+from database.streaming import iter_frames
+from utils.mvt import EXTENT, point_layer
+
+TILE_FILE = "tiles.mbtiles"
+LAYER = "crimes"
+
+MIN_ZOOM = 0
+MAX_ZOOM = int(os.environ.get("TILE_MAX_ZOOM", 14))
+POINT_ZOOM = 12
+CLUSTER_CELLS = 64
+POINT_CELLS = 256
+
+# Filter value of a variant that is not filtered on that column
+ALL = ""
+ANY_CODE = -1
+
+# Rows read from crimes per batch while binning
+BIN_BATCH_ROWS = 50_000
+
+# Cell keys turned into variants and rendered at a time
+BAND_KEYS = 50_000
+
+# Low bits of a cell key holding the crime type code (up to 256 types);
+# the global cell row and column above them fit in int64 up to zoom 19
+TYPE_BITS = 8
+
+TILE_SCHEMA = """
+CREATE TABLE metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE tile_variants (
+    zoom_level INTEGER NOT NULL,
+    tile_column INTEGER NOT NULL,
+    tile_row INTEGER NOT NULL,
+    crime_type TEXT NOT NULL,
+    tile_data BLOB NOT NULL,
+    PRIMARY KEY (zoom_level, tile_column, tile_row, crime_type)
+);
+CREATE VIEW tiles AS
+    SELECT zoom_level, tile_column, tile_row, tile_data FROM tile_variants
+    WHERE crime_type = '';
+"""
+
+POINTS_SQL = """
+    SELECT latitude, longitude, COALESCE(crime_type, 'UNKNOWN') AS crime_type
+    FROM crimes
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+"""
+
+# One month of crimes inside a tile's bounds, for month-filtered tiles
+MONTH_POINTS_SQL = """
+    SELECT latitude, longitude, COALESCE(crime_type, 'UNKNOWN') AS crime_type
+    FROM crimes
+    WHERE year_month = ?
+      AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?
+"""
+
+
+def tile_path(db_path):
+    """The tile store lives next to the database it is rendered from"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), TILE_FILE)
+
+
+def cells_per_side(zoom):
+    return POINT_CELLS if zoom >= POINT_ZOOM else CLUSTER_CELLS
+
+
+# ==================== BINNING ====================
+
+
+def mercator(latitude, longitude, zoom):
+    """Web Mercator position in tile units: tile (x, y) = floor of each"""
+    scale = 2.0**zoom
+    x = (np.asarray(longitude) + 180.0) / 360.0 * scale
+    lat = np.radians(np.asarray(latitude))
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * scale
+    return x, y
+
+
+def cell_pixels(latitude, longitude, zoom):
+    """Global (column, row) of each point's cell across the whole zoom"""
+    n = cells_per_side(zoom)
+    x, y = mercator(latitude, longitude, zoom)
+    last = 2**zoom * n - 1
+    px = np.clip(np.floor(x * n), 0, last).astype(np.int64)
+    py = np.clip(np.floor(y * n), 0, last).astype(np.int64)
+    return px, py
+
+
+def bin_points(latitude, longitude, zoom):
+    """Vectorised (tile_x, tile_y, cell) for arrays of coordinates"""
+    n = cells_per_side(zoom)
+    px, py = cell_pixels(latitude, longitude, zoom)
+    return px // n, py // n, (py % n) * n + px % n
+
+
+def codes(values, mapping):
+    """Integer codes for a column of names; new names are added to mapping"""
+    local, uniques = pd.factorize(values)
+    lookup = np.array(
+        [mapping.setdefault(name, len(mapping)) for name in uniques], dtype=np.int64
+    )
+    return lookup[local]
+
+
+def cell_keys(latitude, longitude, type_codes, zoom):
+    """One int64 per point: its global cell row and column, then its type"""
+    side = 2**zoom * cells_per_side(zoom)
+    px, py = cell_pixels(latitude, longitude, zoom)
+    return ((py * side + px) << TYPE_BITS) | type_codes
+
+
+class KeyCounter:
+    """Running counts per int64 key, merged once the batches outgrow them"""
+
+    def __init__(self):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, keys):
+        batch = np.unique(keys, return_counts=True)
+        self.pending.append(batch)
+        self.pending_size += len(batch[0])
+        # Doubling merges: each key is re-sorted O(log n) times in all
+        if self.pending_size > max(len(self.keys), BIN_BATCH_ROWS):
+            self.merge()
+
+    def merge(self):
+        if not self.pending:
+            return
+        keys = np.concatenate([self.keys] + [k for k, _ in self.pending])
+        counts = np.concatenate([self.counts] + [c for _, c in self.pending])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        self.pending, self.pending_size = [], 0
+
+    def totals(self):
+        self.merge()
+        return self.keys, self.counts
+
+
+def count_cells(conn, zoom, types):
+    """
+    Crimes per (cell, crime type) at one zoom, in one pass over crimes
+
+    Args:
+        conn: Connection to the crimes database
+        zoom: Zoom level to bin at
+        types: {type name: code}, shared across zooms and extended here
+
+    Returns:
+        (sorted cell keys, counts); see cell_keys()
+    """
+    counter = KeyCounter()
+    for frame in iter_frames(conn, POINTS_SQL, batch_rows=BIN_BATCH_ROWS):
+        type_codes = codes(frame["crime_type"], types)
+        if len(types) > 2**TYPE_BITS:
+            raise ValueError(f"More than {2**TYPE_BITS} crime types to tile")
+        counter.add(
+            cell_keys(
+                frame["latitude"].to_numpy(dtype=float),
+                frame["longitude"].to_numpy(dtype=float),
+                type_codes,
+                zoom,
+            )
+        )
+    return counter.totals()
+
+
+def tile_bands(keys, counts, zoom, size=BAND_KEYS):
+    """
+    (keys, counts) slices of whole rows of tiles, about `size` keys each
+
+    Cell keys sort by global cell row first, so every row of tiles is one
+    contiguous run of them.
+    """
+    n = cells_per_side(zoom)
+    tile_y = (keys >> TYPE_BITS) // (2**zoom * n) // n
+    bounds = np.r_[0, np.flatnonzero(np.diff(tile_y)) + 1, len(keys)]
+    start = 0
+    while start < len(keys):
+        # The last row boundary within reach, or the next one for a row
+        # bigger than a band
+        stop = bounds[np.searchsorted(bounds, start + size, side="right") - 1]
+        if stop <= start:
+            stop = bounds[np.searchsorted(bounds, start, side="right")]
+        yield keys[start:stop], counts[start:stop]
+        start = stop
+
+
+def with_top_type(df, keys):
+    """Totals per `keys` with the most frequent crime type as `top`"""
+    per_type = df.groupby(keys + ["type"], as_index=False)["count"].sum()
+    per_type = per_type.sort_values(["count", "type"], ascending=[False, True])
+    top = per_type.drop_duplicates(keys).set_index(keys)["type"]
+    totals = per_type.groupby(keys)["count"].sum()
+    return pd.DataFrame({"count": totals, "top": top}).reset_index()
+
+
+def variants(keys, counts, zoom):
+    """
+    Cell counts of the unfiltered and per-type variants, sorted tile by tile
+
+    Columns: tile_x, tile_y, type (ANY_CODE when not filtered), cell,
+    count, top (the cell's most frequent crime type)
+    """
+    n = cells_per_side(zoom)
+    side = 2**zoom * n
+    pixel = keys >> TYPE_BITS
+    px, py = pixel % side, pixel // side
+    df = pd.DataFrame(
+        {
+            "tile_x": px // n,
+            "tile_y": py // n,
+            "cell": (py % n) * n + px % n,
+            "type": keys & (2**TYPE_BITS - 1),
+            "count": counts,
+        }
+    )
+
+    tile = ["tile_x", "tile_y", "cell"]
+    by_type = df.assign(top=df["type"])
+    everything = with_top_type(df, tile).assign(type=ANY_CODE)
+
+    columns = ["tile_x", "tile_y", "type", "cell", "count", "top"]
+    combined = pd.concat(
+        [everything[columns], by_type[columns]], ignore_index=True
+    )
+    return combined.sort_values(columns[:4], kind="stable", ignore_index=True)
+
+
+def cells_of_points(latitude, longitude, type_codes, zoom, tile_x, tile_y):
+    """Unfiltered cell counts of the points that fall in one tile"""
+    keys = cell_keys(latitude, longitude, type_codes, zoom)
+    n = cells_per_side(zoom)
+    pixel = keys >> TYPE_BITS
+    side = 2**zoom * n
+    inside = (pixel % side // n == tile_x) & (pixel // side // n == tile_y)
+    keys, counts = np.unique(keys[inside], return_counts=True)
+    cells = variants(keys, counts, zoom)
+    return cells[cells["type"] == ANY_CODE]
+
+
+def encode_tile(cell, count, top, zoom, type_names):
+    """Gzipped MVT of one tile's cells: index, crime count and top type code"""
+    n = cells_per_side(zoom)
+    scale = EXTENT / n
+    layer = point_layer(
+        LAYER,
+        ((cell % n + 0.5) * scale).astype(np.int64).tolist(),
+        ((cell // n + 0.5) * scale).astype(np.int64).tolist(),
+        {
+            "count": count.tolist(),
+            "crime_type": [type_names[t] for t in top.tolist()],
+        },
+    )
+    return gzip.compress(layer, compresslevel=6)
+
+
+def render_tiles(zoom, cells, type_names):
+    """Yield (zoom, column, TMS row, crime_type, gzipped MVT) rows"""
+    keys = cells[["tile_x", "tile_y", "type"]].to_numpy()
+    # Row indexes where a new (tile, filter) group starts
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    ends = np.r_[starts[1:], len(cells)]
+
+    cell = cells["cell"].to_numpy()
+    count = cells["count"].to_numpy()
+    top = cells["top"].to_numpy()
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        tile_x, tile_y, type_code = keys[start].tolist()
+        yield (
+            zoom,
+            tile_x,
+            2**zoom - 1 - tile_y,
+            type_names[type_code] if type_code != ANY_CODE else ALL,
+            encode_tile(
+                cell[start:end], count[start:end], top[start:end], zoom, type_names
+            ),
+        )
+
+
+def tile_bounds(zoom, x, y):
+    """(south, north, west, east) of an XYZ tile in degrees"""
+    scale = 2.0**zoom
+    west, east = x / scale * 360.0 - 180.0, (x + 1) / scale * 360.0 - 180.0
+    north, south = (
+        np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * row / scale))))
+        for row in (y, y + 1)
+    )
+    return float(south), float(north), west, east
+
+
+def render_tile(conn, zoom, x, y, crime_type=None, month=None):
+    """
+    Gzipped MVT of an XYZ tile cut from one month's crimes, or None if empty
+
+    Month variants are not pre-rendered; a month of crimes is small enough
+    to read through the year_month index and bin per request.
+    """
+    south, north, west, east = tile_bounds(zoom, x, y)
+    sql, params = MONTH_POINTS_SQL, [month, south, north, west, east]
+    if crime_type:
+        sql += " AND crime_type = ?"
+        params.append(crime_type)
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return None
+
+    latitude, longitude, names = zip(*rows)
+    types = {}
+    type_codes = codes(pd.Series(names), types)
+    cells = cells_of_points(
+        np.array(latitude), np.array(longitude), type_codes, zoom, x, y
+    )
+    if cells.empty:
+        return None
+    return encode_tile(
+        cells["cell"].to_numpy(),
+        cells["count"].to_numpy(),
+        cells["top"].to_numpy(),
+        zoom,
+        list(types),
+    )
+
+
+# ==================== WRITING ====================
+
+
+def write_tiles(db_path, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, verbose=True):
+    """
+    Render the tile pyramid for the crimes in db_path
+
+    Returns:
+        The store's metadata (see TileStore.metadata())
+    """
+    path = tile_path(db_path)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    types = {}
+    source = sqlite3.connect(db_path)
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.executescript(TILE_SCHEMA)
+        conn.execute("BEGIN")
+        total = 0
+        for zoom in range(min_zoom, max_zoom + 1):
+            # Binned, rendered and written before the next zoom is read
+            keys, counts = count_cells(source, zoom, types)
+            before = conn.total_changes
+            for band in tile_bands(keys, counts, zoom):
+                conn.executemany(
+                    "INSERT INTO tile_variants VALUES (?, ?, ?, ?, ?)",
+                    render_tiles(zoom, variants(*band, zoom), list(types)),
+                )
+            del keys, counts
+            written = conn.total_changes - before
+            total += written
+            if verbose:
+                print(f"  Zoom {zoom:>2}: {written:,} tiles")
+
+        metadata = tile_metadata(source, min_zoom, max_zoom, list(types))
+        conn.executemany(
+            "INSERT INTO metadata VALUES (?, ?)",
+            [
+                (name, value if isinstance(value, str) else json.dumps(value))
+                for name, value in metadata.items()
+            ],
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+        source.close()
+
+    # Readers holding the old file keep it; new connections see this one
+    os.replace(tmp_path, path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            bump_generation(conn)
+    finally:
+        conn.close()
+    if verbose:
+        print(f"✓ Tile pyramid written: {path} ({total:,} tiles)")
+    return metadata
+
+
+def tile_metadata(conn, min_zoom, max_zoom, type_names):
+    """MBTiles metadata rows, plus the filter values tiles can be cut for"""
+    bounds = conn.execute(
+        "SELECT MIN(longitude), MIN(latitude), MAX(longitude), MAX(latitude) "
+        "FROM crimes WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    ).fetchone()
+    # Read from the partial year_month index
+    month_names = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT year_month FROM crimes WHERE year_month IS NOT NULL"
+        )
+    ]
+    if bounds[0] is None:
+        bounds = (-180.0, -85.0511, 180.0, 85.0511)
+    center = [(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2, POINT_ZOOM]
+
+    return {
+        "name": LAYER,
+        "format": "pbf",
+        "type": "overlay",
+        "minzoom": str(min_zoom),
+        "maxzoom": str(max_zoom),
+        "bounds": ",".join(f"{value:.6f}" for value in bounds),
+        "center": ",".join(str(value) for value in center),
+        "json": {
+            "vector_layers": [
+                {
+                    "id": LAYER,
+                    "fields": {"count": "Number", "crime_type": "String"},
+                    "minzoom": min_zoom,
+                    "maxzoom": max_zoom,
+                }
+            ]
+        },
+        "crime_types": sorted(type_names),
+        "months": sorted(month_names),
+    }
+
+
+# ==================== READING ====================
+
+
+class TileStore:
+    """Read access to a tiles.mbtiles file"""
+
+    def __init__(self, path):
+        self.path = path
+        stat = os.stat(path)
+        # A rebuild replaces the file, so a new inode means a new pyramid
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        self.pool = ConnectionPool(path, immutable=True)
+        self._metadata = None
+
+    def tile(self, zoom, x, y, crime_type=None):
+        """Gzipped MVT bytes of a pre-rendered XYZ tile, or None when empty"""
+        conn = self.pool.connect()
+        try:
+            row = conn.execute(
+                "SELECT tile_data FROM tile_variants WHERE zoom_level = ? "
+                "AND tile_column = ? AND tile_row = ? AND crime_type = ?",
+                (zoom, x, 2**zoom - 1 - y, crime_type or ALL),
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def metadata(self):
+        """{name: value} of the metadata table, JSON values decoded"""
+        if self._metadata is None:
+            conn = self.pool.connect()
+            try:
+                rows = conn.execute("SELECT name, value FROM metadata").fetchall()
+            finally:
+                conn.close()
+            metadata = {}
+            for name, value in rows:
+                try:
+                    metadata[name] = json.loads(value)
+                except ValueError:
+                    metadata[name] = value
+            self._metadata = metadata
+        return self._metadata
+
+    def close(self):
+        self.pool.close_all()
@@ -0,0 +1,192 @@
+# src/utils/csv_reader.py
+"""
+Fast CSV reading for Chicago Data Portal exports
+
+Uses pyarrow's multi-threaded CSV parser with explicit column types when it
+is installed, and falls back to pandas' C parser otherwise. Either way the
+`date` column comes back as datetime64, parsed with a fixed format and once
+per distinct timestamp string.
+"""
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    pa_csv = None
+    HAS_PYARROW = False
+
+# Socrata API timestamps ("2025-09-22T14:30:00.000"), then the portal's
+# bulk-export format ("09/22/2025 02:30:00 PM")
+SOCRATA_TIMESTAMP_FORMATS = ["%Y-%m-%dT%H:%M:%S.%f", "%m/%d/%Y %I:%M:%S %p"]
+
+# Explicit types for the raw dataset columns - no per-column type inference
+RAW_COLUMN_TYPES = {
+    "id": "int64",
+    "case_number": "string",
+    "block": "string",
+    "iucr": "string",
+    "primary_type": "string",
+    "description": "string",
+    "location_description": "string",
+    "arrest": "bool",
+    "domestic": "bool",
+    "beat": "string",
+    "district": "string",
+    "ward": "string",
+    "community_area": "string",
+    "fbi_code": "string",
+    "x_coordinate": "float64",
+    "y_coordinate": "float64",
+    "year": "float64",
+    "updated_on": "string",
+    "latitude": "float64",
+    "longitude": "float64",
+    "location": "string",
+}
+
+# Parse ~this many bytes per pyarrow block (one block per parser thread)
+ARROW_BLOCK_SIZE = 8 << 20
+
+
+def parse_socrata_dates(values):
+    """
+    Parse Socrata timestamp strings into datetime64
+
+    Each distinct string is parsed once with an explicit format and the
+    result is broadcast back, so repeated timestamps (common - many records
+    share the same minute) cost a lookup instead of a parse. Unparseable
+    values become NaT.
+    """
+    values = pd.Series(values, copy=False)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Already dictionary-encoded (pyarrow reader) - reuse its codes
+        codes = values.cat.codes.to_numpy()
+        uniques = pd.Series(values.cat.categories, dtype="object")
+    else:
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Series(uniques, dtype="object")
+
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    remaining = uniques.notna()
+    for fmt in SOCRATA_TIMESTAMP_FORMATS:
+        if not remaining.any():
+            break
+        parsed[remaining] = pd.to_datetime(
+            uniques[remaining], format=fmt, errors="coerce"
+        )
+        remaining &= parsed.isna()
+
+    # Missing values have code -1 and become NaT
+    result = pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def format_socrata_timestamp(value):
+    """Render a timestamp the way Socrata does, for use in $where clauses"""
+    if isinstance(value, str):
+        return value
+    return pd.Timestamp(value).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+
+def read_crime_csv(path, chunksize=50000, columns=None, use_arrow=None):
+    """
+    Stream a Chicago crimes CSV as DataFrames of roughly `chunksize` rows
+
+    Args:
+        path: CSV file path (or anything pandas/pyarrow can open)
+        chunksize: Target rows per yielded DataFrame
+        columns: Raw columns to keep (default: all)
+        use_arrow: Force (True) or skip (False) the pyarrow reader;
+                   default uses it when installed
+    """
+    if use_arrow is None:
+        use_arrow = HAS_PYARROW
+    if use_arrow and not HAS_PYARROW:
+        raise ImportError("pyarrow is not installed")
+
+    reader = _read_arrow if use_arrow else _read_pandas
+    yield from reader(path, chunksize, columns)
+
+
+def _read_arrow(path, chunksize, columns):
+    """Multi-threaded pyarrow parse, regrouped into chunksize-row frames"""
+    arrow_types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "float64": pa.float64(),
+    }
+    column_types = {
+        name: arrow_types[kind]
+        for name, kind in RAW_COLUMN_TYPES.items()
+        if columns is None or name in columns
+    }
+    # Dictionary-encode timestamps so each distinct string is parsed once
+    column_types["date"] = pa.dictionary(pa.int32(), pa.string())
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=columns,
+            include_missing_columns=columns is not None,
+            strings_can_be_null=True,
+            true_values=["true", "True", "TRUE"],
+            false_values=["false", "False", "FALSE"],
+        ),
+    )
+
+    pending, rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield _arrow_to_pandas(table.slice(0, chunksize))
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+
+    if rows:
+        yield _arrow_to_pandas(pa.Table.from_batches(pending))
+
+
+def _arrow_to_pandas(table):
+    """Convert to pandas and parse the dictionary-encoded dates"""
+    df = table.to_pandas(use_threads=True)
+    if "date" in df.columns:
+        df["date"] = parse_socrata_dates(df["date"])
+    return df
+
+
+def _read_pandas(path, chunksize, columns):
+    """pandas C-parser fallback with the same column types"""
+    dtypes = {
+        name: ("boolean" if kind == "bool" else "object" if kind == "string" else kind)
+        for name, kind in RAW_COLUMN_TYPES.items()
+        if columns is None or name in columns
+    }
+    dtypes.pop("id", None)  # may be missing in extracts; let pandas infer
+
+    # Only keep requested columns that the file actually has
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda name: name in wanted  # noqa: E731
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtypes, usecols=usecols):
+        # Match pyarrow's include_missing_columns behaviour
+        for name in columns or []:
+            if name not in chunk.columns:
+                chunk[name] = None
+        if "date" in chunk.columns:
+            chunk["date"] = parse_socrata_dates(chunk["date"])
+        yield chunk
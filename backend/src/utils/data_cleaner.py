@@ -1,40 +1,231 @@
 # src/utils/data_cleaner.py
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_reader import parse_socrata_dates, read_crime_csv  # noqa: E402
+from utils.grid import GRID_RESOLUTIONS, cell_keys  # noqa: E402
+
+# City limits used to reject mis-geocoded records
+CHICAGO_BOUNDS = {
+    "lat_min": 41.64,
+    "lat_max": 42.02,
+    "lon_min": -87.94,
+    "lon_max": -87.52,
+}
+
+# The portal's history starts in 2001
+MIN_DATE = "2001-01-01"
+
+# Raw portal column → canonical crimes-table column
+COLUMN_MAP = {"primary_type": "crime_type", "location_description": "description"}
+
+# Canonical columns, in crimes-table order
+CANONICAL_COLUMNS = [
+    "case_number",
+    "date",
+    "crime_type",
+    "description",
+    "latitude",
+    "longitude",
+    "district",
+    "ward",
+    "beat",
+    "year_month",
+]
+
+CRIME_CATEGORIES = {
+    "BATTERY": "ASSAULT/BATTERY",
+    "ASSAULT": "ASSAULT/BATTERY",
+    "THEFT": "THEFT",
+    "CRIMINAL DAMAGE": "VANDALISM",
+    "NARCOTICS": "DRUG_RELATED",
+    "BURGLARY": "BURGLARY",
+    "ROBBERY": "ROBBERY",
+    "MOTOR VEHICLE THEFT": "VEHICLE_THEFT",
+}
+
+DAY_NAMES = np.array(
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+    dtype=object,
+)
+
+# Index 0 unused so months index directly
+SEASONS = np.array(
+    [None, "Winter", "Winter", "Spring", "Spring", "Spring", "Summer",
+     "Summer", "Summer", "Fall", "Fall", "Fall", "Winter"],
+    dtype=object,
+)
+
+# Target dtype per column; anything not listed is left as loaded
+COMPACT_DTYPES = {
+    "crime_type": "category",
+    "crime_category": "category",
+    "description": "category",
+    "district": "category",
+    "ward": "category",
+    "beat": "category",
+    "season": "category",
+    "day_of_week": "category",
+    "year_month": "category",
+    "latitude": "float32",
+    "longitude": "float32",
+    "hour": "int8",
+    "month": "int8",
+    "weekday": "int8",
+    "iso_week": "int32",
+    "year": "int16",
+    "is_weekend": "bool",
+}
+
 
 class ChicagoCrimeDataCleaner:
-    def __init__(self):
-        self.chicago_bounds = {
-            "lat_min": 41.6,
-            "lat_max": 42.1,
-            "lon_min": -87.9,
-            "lon_max": -87.5,
-        }
+    """
+    Single cleaning engine for the ingest pipeline and the analysis scripts
+
+    Works one chunk at a time: every chunk is filtered with one combined
+    mask (missing values, city bounds, date range), materialised once, and
+    the derived columns are added to that frame in place.
+    """
+
+    def __init__(
+        self,
+        bounds=None,
+        min_date=MIN_DATE,
+        derived=True,
+        text_dates=False,
+        time_buckets=False,
+        grid_cells=False,
+        compact=False,
+    ):
+        """
+        Args:
+            bounds: lat/lon box (default CHICAGO_BOUNDS)
+            min_date: Oldest date kept
+            derived: Add analysis columns (crime_category, hour, season, ...)
+            text_dates: Render `date` as 'YYYY-MM-DD HH:MM:SS' text for SQLite
+            time_buckets: Add the integer epoch/hour/weekday/iso_week columns
+                          stored alongside each crime
+            grid_cells: Add the cell_<resolution> grid keys (see utils/grid.py)
+            compact: Emit categorical/float32/int8 columns (see COMPACT_DTYPES)
+        """
+        self.chicago_bounds = bounds or CHICAGO_BOUNDS
+        self.min_date = pd.Timestamp(min_date)
+        self.derived = derived
+        self.text_dates = text_dates
+        self.time_buckets = time_buckets
+        self.grid_cells = grid_cells
+        self.compact = compact
 
     def clean_dataset(self, df):
         """Comprehensive data cleaning"""
         print(f"Initial dataset size: {len(df)}")
+        df_clean = self.clean_chunk(df)
+        print(f"After validation: {len(df_clean)}")
+        if self.compact:
+            saved = df_clean.attrs.get("memory_saved_mb", 0.0)
+            print(f"Compact dtypes saved {saved:,.1f} MB")
+        return df_clean
+
+    def clean_chunk(self, df):
+        """Clean one raw (or already renamed) chunk into canonical columns"""
+        # Raw exports also carry a secondary `description` - the canonical
+        # one comes from location_description
+        if "location_description" in df.columns and "description" in df.columns:
+            df = df.drop(columns=["description"])
+        df = df.rename(columns=COLUMN_MAP)
 
-        # 1. Remove rows with missing essential data
-        essential_cols = ["latitude", "longitude", "primary_type", "date"]
-        df_clean = df.dropna(subset=essential_cols).copy()
-        print(f"After removing missing essential data: {len(df_clean)}")
+        dates = parse_socrata_dates(df["date"])
+        latitude = pd.to_numeric(df["latitude"], errors="coerce")
+        longitude = pd.to_numeric(df["longitude"], errors="coerce")
 
-        # 2. Validate coordinates are within Chicago bounds
-        df_clean = self.validate_coordinates(df_clean)
-        print(f"After coordinate validation: {len(df_clean)}")
+        # 1-2. Essential data present, inside Chicago, plausible date
+        mask = self.valid_mask(df, dates, latitude, longitude)
 
-        # 3. Standardize crime types
-        df_clean = self.standardize_crime_types(df_clean)
+        # Materialise the kept rows once; everything below edits this frame
+        keep = [c for c in CANONICAL_COLUMNS if c in df.columns]
+        extra = [c for c in ("arrest", "domestic") if c in df.columns and self.derived]
+        out = pd.DataFrame(
+            {c: df[c].to_numpy()[mask] for c in keep + extra},
+            index=pd.RangeIndex(int(mask.sum())),
+        )
+        out["date"] = dates.to_numpy()[mask]
+        out["latitude"] = latitude.to_numpy()[mask]
+        out["longitude"] = longitude.to_numpy()[mask]
 
-        # 4. Parse and validate dates
-        df_clean = self.clean_dates(df_clean)
+        self.normalize_codes(out)
+        if "description" in out.columns:
+            out["description"] = out["description"].fillna("")
 
-        # 5. Add derived columns
-        df_clean = self.add_derived_columns(df_clean)
+        # 3-5. Standardize crime types, derived time columns
+        out["year_month"] = out["date"].to_numpy().astype("datetime64[M]").astype(str)
+        if self.derived:
+            self.standardize_crime_types(out)
+            self.add_derived_columns(out)
+        if self.time_buckets:
+            self.add_time_buckets(out)
+        if self.grid_cells:
+            self.add_grid_cells(out)
+        if self.text_dates:
+            # Full timestamp in SQLite's own format, so the hour is kept
+            text = np.datetime_as_string(out["date"].to_numpy(), unit="s")
+            out["date"] = np.char.replace(text, "T", " ").astype(object)
 
-        return df_clean
+        out.attrs = dict(df.attrs)
+        if self.compact:
+            before = frame_memory_mb(out)
+            compact_dtypes(out)
+            out.attrs["memory_saved_mb"] = before - frame_memory_mb(out)
+        return out
+
+    def clean_chunks(self, chunks, workers=1):
+        """
+        Clean an iterable of chunks, optionally across a process pool
+
+        Chunks come back in input order. At most 2 x workers chunks are in
+        flight, so memory stays bounded however long the input is.
+        """
+        if workers <= 1:
+            for chunk in chunks:
+                yield self.clean_chunk(chunk)
+            return
+
+        # The chunks usually come from the downloader's thread pool, which is
+        # running while workers start: forking then could copy a held lock
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=worker_context(),
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_clean_in_worker, chunk))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def valid_mask(self, df, dates, latitude, longitude):
+        """Boolean mask of rows worth keeping"""
+        bounds = self.chicago_bounds
+        return (
+            (latitude >= bounds["lat_min"])
+            & (latitude <= bounds["lat_max"])
+            & (longitude >= bounds["lon_min"])
+            & (longitude <= bounds["lon_max"])
+            & df["crime_type"].notna()
+            & (dates >= self.min_date)
+            & (dates <= pd.Timestamp.now())
+        ).to_numpy()
 
     def validate_coordinates(self, df):
         """Remove coordinates outside Chicago bounds"""
@@ -45,70 +236,163 @@ class ChicagoCrimeDataCleaner:
             & (df["longitude"] >= bounds["lon_min"])
             & (df["longitude"] <= bounds["lon_max"])
         )
-        return df[mask].copy()
+        return df[mask]
+
+    @staticmethod
+    def normalize_codes(df):
+        """'016' / '16.0' / 16 → '16' for district and ward; beats stay 4-digit"""
+        for column, width in (("district", 0), ("ward", 0), ("beat", 4)):
+            if column not in df.columns:
+                continue
+            # Few distinct values - normalise the uniques and broadcast back
+            codes, uniques = pd.factorize(df[column])
+            numbers = pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce")
+            labels = np.array(
+                [
+                    None if pd.isna(n) else str(int(n)).zfill(width)
+                    for n in numbers
+                ]
+                + [None],
+                dtype=object,
+            )
+            df[column] = labels[codes]
 
     def standardize_crime_types(self, df):
         """Standardize crime type names"""
-        crime_mapping = {
-            "BATTERY": "ASSAULT/BATTERY",
-            "ASSAULT": "ASSAULT/BATTERY",
-            "THEFT": "THEFT",
-            "CRIMINAL DAMAGE": "VANDALISM",
-            "NARCOTICS": "DRUG_RELATED",
-            "BURGLARY": "BURGLARY",
-            "ROBBERY": "ROBBERY",
-            "MOTOR VEHICLE THEFT": "VEHICLE_THEFT",
-        }
-
-        df["crime_category"] = df["primary_type"].map(crime_mapping).fillna("OTHER")
+        df["crime_category"] = df["crime_type"].map(CRIME_CATEGORIES).fillna("OTHER")
         return df
 
     def clean_dates(self, df):
         """Parse and validate dates"""
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        df = df.dropna(subset=["date"])
+        df["date"] = parse_socrata_dates(df["date"])
+        return df[(df["date"] >= self.min_date) & (df["date"] <= pd.Timestamp.now())]
+
+    def add_time_buckets(self, df):
+        """Add integer time buckets for index-only GROUP BYs"""
+        dates = df["date"]
+        iso = dates.dt.isocalendar()
+
+        df["epoch"] = dates.to_numpy().astype("datetime64[s]").astype(np.int64)
+        df["hour"] = dates.dt.hour.astype(np.int64)
+        df["weekday"] = dates.dt.weekday.astype(np.int64)  # Monday = 0
+        df["iso_week"] = (iso["year"] * 100 + iso["week"]).astype(np.int64)
 
-        # Remove future dates and very old dates (before 2008)
-        current_date = pd.Timestamp.now()
-        df = df[(df["date"] >= "2008-01-01") & (df["date"] <= current_date)]
+        return df
+
+    def add_grid_cells(self, df):
+        """Add integer grid-cell keys at every resolution"""
+        for name, size in GRID_RESOLUTIONS.items():
+            df[f"cell_{name}"] = cell_keys(df["latitude"], df["longitude"], size)
         return df
 
     def add_derived_columns(self, df):
         """Add useful derived columns"""
-        df["year"] = df["date"].dt.year
-        df["month"] = df["date"].dt.month
-        df["day_of_week"] = df["date"].dt.day_name()
-        df["hour"] = df["date"].dt.hour
-        df["is_weekend"] = df["date"].dt.weekday >= 5
-
-        # Season
-        df["season"] = df["month"].map(
-            {
-                12: "Winter",
-                1: "Winter",
-                2: "Winter",
-                3: "Spring",
-                4: "Spring",
-                5: "Spring",
-                6: "Summer",
-                7: "Summer",
-                8: "Summer",
-                9: "Fall",
-                10: "Fall",
-                11: "Fall",
-            }
-        )
+        dates = df["date"].dt
+        month = dates.month.to_numpy()
+        weekday = dates.weekday.to_numpy()
+
+        df["year"] = dates.year
+        df["month"] = month
+        df["day_of_week"] = DAY_NAMES[weekday]
+        df["hour"] = dates.hour
+        df["is_weekend"] = weekday >= 5
+        df["season"] = SEASONS[month]
 
         return df
 
 
+def frame_memory_mb(df):
+    """Deep memory usage of a DataFrame in MB"""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def compact_dtypes(df, report=False):
+    """
+    Downcast a crimes frame in place to compact dtypes
+
+    Args:
+        df: Frame from the cleaner or the crimes table
+        report: Print the before/after memory footprint
+
+    Returns:
+        The same frame; bytes saved are kept in df.attrs["memory_saved_mb"]
+    """
+    before = frame_memory_mb(df) if report else None
+
+    if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+
+    for column, dtype in COMPACT_DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if dtype.startswith("int") and df[column].isna().any():
+            # Nullable integers only where the data actually has gaps
+            dtype = dtype.replace("int", "Int")
+        df[column] = df[column].astype(dtype)
+
+    if report:
+        after = frame_memory_mb(df)
+        df.attrs["memory_saved_mb"] = before - after
+        print(
+            f"Memory: {before:,.1f} MB → {after:,.1f} MB "
+            f"(saved {before - after:,.1f} MB, {1 - after / before:.0%})"
+            if before
+            else "Memory: empty frame"
+        )
+    return df
+
+
+# Process-pool plumbing: each worker builds its cleaner once
+def derive_stored_columns(df):
+    """
+    Copy of a cleaned frame with the derived columns the crimes table stores
+
+    The ingest pipeline's cleaner adds them per chunk (time_buckets=True,
+    grid_cells=True); frames cleaned without those flags, e.g. by the
+    analysis scripts, get the same values here before they are inserted.
+    `date` may be datetimes or SQLite text and is left as it is.
+    """
+    cleaner = ChicagoCrimeDataCleaner(time_buckets=True, grid_cells=True)
+    out = df.copy()
+    buckets = cleaner.add_time_buckets(
+        pd.DataFrame({"date": parse_socrata_dates(out["date"])})
+    )
+    for column in ("epoch", "hour", "weekday", "iso_week"):
+        out[column] = buckets[column].to_numpy()
+    cleaner.add_grid_cells(out)
+    return out
+
+
+_worker_cleaner = None
+
+
+def worker_context():
+    """Start method that never forks a threaded parent: forkserver, else spawn"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def _init_worker(cleaner):
+    global _worker_cleaner
+    _worker_cleaner = cleaner
+
+
+def _clean_in_worker(chunk):
+    return _worker_cleaner.clean_chunk(chunk)
+
+
 # Usage script
 if __name__ == "__main__":
     cleaner = ChicagoCrimeDataCleaner()
 
-    # Clean sample data
-    df_raw = pd.read_csv("../data/raw/chicago_crimes_sample.csv")
-    df_clean = cleaner.clean_dataset(df_raw)
+    # Clean sample data (pyarrow-backed parse when available)
+    chunks = read_crime_csv("../data/raw/chicago_crimes_sample.csv")
+    df_clean = pd.concat(
+        cleaner.clean_chunks(chunks, workers=os.cpu_count() or 1), ignore_index=True
+    )
+    print(f"Cleaned dataset size: {len(df_clean)}")
 
     # Save cleaned data
     df_clean.to_csv("../data/processed/chicago_crimes_clean.csv", index=False)
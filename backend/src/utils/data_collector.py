@@ -1,39 +1,219 @@
 # src/utils/data_collector.py
-import requests
-import pandas as pd
+import csv
+import json
 import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+# Override to point the collector at a local stand-in server
+DEFAULT_BASE_URL = os.environ.get(
+    "CHICAGO_API_URL", "https://data.cityofchicago.org/resource/ijzp-q8t2.csv"
+)
+
+# :id breaks ties so $offset pages never overlap or skip rows
+DEFAULT_ORDER = "date DESC, :id"
+
 
 class ChicagoCrimeCollector:
-    def __init__(self, data_dir="data/raw"):
+    def __init__(
+        self,
+        data_dir="data/raw",
+        base_url=None,
+        workers=4,
+        page_size=50000,
+        timeout=120,
+        retries=3,
+    ):
         self.data_dir = data_dir
-        self.base_url = "https://data.cityofchicago.org/resource/ijzp-q8t2.csv"
-        
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.workers = workers
+        self.page_size = page_size
+        self.timeout = timeout
+        self.retries = retries
+        self._local = threading.local()
+        self._manifest_lock = threading.Lock()
+
     def download_recent_crimes(self, limit=50000):
         """Download recent crime data from Chicago Data Portal"""
         try:
-            url = f"{self.base_url}?$limit={limit}&$order=date DESC"
             print(f"Downloading {limit} records from Chicago Data Portal...")
-            
-            df = pd.read_csv(url)
-            
-            # Save to raw data
+
             output_path = os.path.join(self.data_dir, "chicago_crimes_recent.csv")
-            df.to_csv(output_path, index=False)
+            pages = self.iter_pages(limit, run_name="recent")
+            self.merge_pages(pages, output_path)
+            self.clear_pages("recent")
+
+            df = pd.read_csv(output_path)
             print(f"Downloaded {len(df)} records to {output_path}")
-            
+
             return df
         except Exception as e:
             print(f"Error downloading data: {e}")
             return None
-    
+
     def get_sample_data(self, n=1000):
         """Get a small sample for development"""
         url = f"{self.base_url}?$limit={n}"
         return pd.read_csv(url)
 
+    # ==================== PAGINATED DOWNLOADS ====================
+
+    def iter_pages(self, total, where=None, order=DEFAULT_ORDER, run_name="pages"):
+        """
+        Download up to `total` records as $offset pages on a thread pool
+
+        Yields page CSV paths in offset order as soon as each is ready, while
+        up to 2 x workers later pages download ahead. Finished pages are
+        recorded in a manifest next to them, so rerunning the same query
+        after a failure skips straight to the missing pages.
+        """
+        run_dir = os.path.join(self.data_dir, run_name)
+        query = {
+            "base_url": self.base_url,
+            "where": where,
+            "order": order,
+            "page_size": self.page_size,
+        }
+        manifest = self._load_manifest(run_dir, query)
+
+        offsets = list(range(0, total, self.page_size))
+        read_ahead = 2 * self.workers
+        futures = {}
+        submitted = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for i, offset in enumerate(offsets):
+                    while submitted < len(offsets) and submitted <= i + read_ahead:
+                        page_offset = offsets[submitted]
+                        limit = min(self.page_size, total - page_offset)
+                        futures[page_offset] = pool.submit(
+                            self._fetch_page,
+                            run_dir,
+                            manifest,
+                            page_offset,
+                            limit,
+                            where,
+                            order,
+                        )
+                        submitted += 1
+
+                    path, rows, limit = futures.pop(offset).result()
+                    yield path
+
+                    # A short page means the query is exhausted
+                    if rows < limit:
+                        break
+            finally:
+                for future in futures.values():
+                    future.cancel()
+
+    def download_pages(self, total, where=None, order=DEFAULT_ORDER, run_name="pages"):
+        """Download every page of a query and return the page paths in order"""
+        return list(self.iter_pages(total, where=where, order=order, run_name=run_name))
+
+    def merge_pages(self, page_paths, output_path):
+        """Concatenate page CSVs into one file, keeping a single header"""
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "wb") as out:
+            for i, path in enumerate(page_paths):
+                with open(path, "rb") as page:
+                    header = page.readline()
+                    if i == 0:
+                        out.write(header)
+                    shutil.copyfileobj(page, out)
+        return output_path
+
+    def clear_pages(self, run_name="pages"):
+        """Remove a finished run's pages and manifest"""
+        shutil.rmtree(os.path.join(self.data_dir, run_name), ignore_errors=True)
+
+    def _session(self):
+        """One keep-alive HTTP session per worker thread"""
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _fetch_page(self, run_dir, manifest, offset, limit, where, order):
+        """Download one page to disk (or reuse it from the manifest)"""
+        key = str(offset)
+        path = os.path.join(run_dir, f"page_{offset:010d}.csv")
+
+        done = manifest["pages"].get(key)
+        if done and done["limit"] == limit and os.path.exists(path):
+            return path, done["rows"], limit
+
+        params = {"$limit": limit, "$offset": offset, "$order": order}
+        if where:
+            params["$where"] = where
+
+        tmp_path = path + ".part"
+        for attempt in range(1, self.retries + 1):
+            try:
+                with self._session().get(
+                    self.base_url, params=params, stream=True, timeout=self.timeout
+                ) as response:
+                    response.raise_for_status()
+                    with open(tmp_path, "wb") as f:
+                        for block in response.iter_content(chunk_size=1 << 20):
+                            f.write(block)
+                break
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    raise
+                print(f"  Page {offset} failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+
+        os.replace(tmp_path, path)
+        rows = self._count_rows(path)
+
+        with self._manifest_lock:
+            manifest["pages"][key] = {"rows": rows, "limit": limit}
+            self._save_manifest(run_dir, manifest)
+
+        return path, rows, limit
+
+    @staticmethod
+    def _count_rows(path):
+        """Count CSV records (quoted fields may contain newlines)"""
+        with open(path, newline="", encoding="utf-8") as f:
+            return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+    @staticmethod
+    def _load_manifest(run_dir, query):
+        """Load the checkpoint manifest, starting over if the query changed"""
+        os.makedirs(run_dir, exist_ok=True)
+        manifest_path = os.path.join(run_dir, "manifest.json")
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("query") == query:
+                done = len(manifest["pages"])
+                if done:
+                    print(f"Resuming download: {done} pages already on disk")
+                return manifest
+
+        return {"query": query, "pages": {}}
+
+    @staticmethod
+    def _save_manifest(run_dir, manifest):
+        """Write the manifest atomically so a crash never leaves it half-written"""
+        manifest_path = os.path.join(run_dir, "manifest.json")
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+
 if __name__ == "__main__":
     collector = ChicagoCrimeCollector()
     # Start with small sample
     sample_df = collector.get_sample_data(5000)
     sample_df.to_csv("data/raw/chicago_crimes_sample.csv", index=False)
-    print("Sample data ready for exploration!")
\ No newline at end of file
+    print("Sample data ready for exploration!")
@@ -0,0 +1,119 @@
+# src/utils/data_loader.py
+"""
+Shared crime loader for the analysis scripts
+
+Reads the crimes table in chunks and stores each column in the smallest
+dtype that holds it: categoricals for repeated labels, float32 coordinates,
+int8/int16 time parts and datetime64 dates. Full-history frames shrink
+several-fold compared with pandas' object/float64 defaults.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_cleaner import (  # noqa: E402
+    ChicagoCrimeDataCleaner,
+    compact_dtypes,
+    frame_memory_mb,
+)
+
+DEFAULT_DB_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "data", "processed", "crimes_clean.db"
+    )
+)
+
+
+def concat_compact(chunks):
+    """Concatenate compacted chunks without widening categoricals to object"""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+
+    columns = {}
+    for column in chunks[0].columns:
+        parts = [c[column] for c in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[column] = pd.Series(union_categoricals(parts, ignore_order=True))
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def load_crimes(
+    db_path=None,
+    columns="*",
+    where=None,
+    params=(),
+    limit=None,
+    compact=True,
+    derived=False,
+    chunksize=250000,
+):
+    """
+    Load crimes into a DataFrame, chunk by chunk
+
+    Args:
+        db_path: SQLite database (default data/processed/crimes_clean.db)
+        columns: Column list or "*"; `date` is always selected
+        where: Optional SQL predicate, e.g. "date >= ?"
+        params: Parameters for `where`
+        limit: Optional row limit
+        compact: Store columns in compact dtypes and report the savings
+        derived: Add year/month/hour/day_of_week/is_weekend/season columns
+
+    Returns:
+        DataFrame with datetime64 `date`
+    """
+    if isinstance(columns, str) and columns.strip() != "*":
+        columns = [c.strip() for c in columns.split(",")]
+    if not isinstance(columns, str) and "date" not in columns:
+        # Every frame gets a parsed date; the derived columns need it too
+        columns = ["date", *columns]
+    select = columns if isinstance(columns, str) else ", ".join(columns)
+    query = f"SELECT {select} FROM crimes"
+    if where:
+        query += f" WHERE {where}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+
+    conn = sqlite3.connect(db_path or DEFAULT_DB_PATH)
+    cleaner = ChicagoCrimeDataCleaner()
+    loaded_mb = 0.0
+
+    try:
+        chunks = []
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+            chunk["date"] = pd.to_datetime(
+                chunk["date"], format="ISO8601", errors="coerce"
+            )
+            if derived:
+                cleaner.add_derived_columns(chunk)
+            if compact:
+                loaded_mb += frame_memory_mb(chunk)
+                compact_dtypes(chunk)
+            chunks.append(chunk)
+    finally:
+        conn.close()
+
+    if not chunks:
+        return pd.DataFrame()
+    df = concat_compact(chunks) if compact else pd.concat(chunks, ignore_index=True)
+
+    if compact and len(df):
+        after = frame_memory_mb(df)
+        df.attrs["memory_saved_mb"] = loaded_mb - after
+        print(
+            f"Loaded {len(df):,} crimes in {after:,.1f} MB "
+            f"(saved {loaded_mb - after:,.1f} MB vs default dtypes)"
+        )
+    return df
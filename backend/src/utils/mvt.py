@@ -0,0 +1,123 @@
+# src/utils/mvt.py
+"""
+Mapbox Vector Tile encoding for point layers
+
+Just enough of the MVT 2.1 protobuf schema to write Point features with
+properties, without a protobuf dependency:
+
+    Tile    { repeated Layer layers = 3 }
+    Layer   { version = 15, name = 1, features = 2, keys = 3,
+              values = 4, extent = 5 }
+    Feature { tags = 2 (packed), type = 3, geometry = 4 (packed) }
+    Value   { string = 1, double = 3, uint = 5, sint = 6, bool = 7 }
+
+Geometry is one MoveTo command per point, in tile coordinates
+(0..extent, origin top-left). Keys and values are deduplicated per layer.
+"""
+
+import struct
+
+EXTENT = 4096
+POINT = 1
+# Command integer for MoveTo (id 1) repeated once
+MOVE_TO_ONE = 1 | (1 << 3)
+
+
+def encode_varint(n):
+    """Protobuf base-128 varint of a non-negative integer"""
+    out = bytearray()
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+# Coordinates, tag indexes and feature lengths are nearly always below
+# 2**14, so their encodings are looked up instead of computed
+SMALL_VARINTS = [encode_varint(n) for n in range(1 << 14)]
+
+
+def varint(n):
+    if n < 16384:
+        return SMALL_VARINTS[n]
+    return encode_varint(n)
+
+
+def zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+
+def field(number, payload):
+    """A length-delimited protobuf field"""
+    return varint(number << 3 | 2) + varint(len(payload)) + payload
+
+
+def encode_value(value):
+    if isinstance(value, bool):
+        return b"\x38" + varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return b"\x28" + varint(value)
+        return b"\x30" + varint(zigzag(value))
+    if isinstance(value, float):
+        return b"\x19" + struct.pack("<d", value)
+    return field(1, str(value).encode())
+
+
+def point_layer(name, xs, ys, properties, extent=EXTENT):
+    """
+    One encoded layer of Point features
+
+    Args:
+        name: Layer name
+        xs, ys: Tile coordinates of each point (integers, 0..extent)
+        properties: {key: per-feature values}; None values are left out
+        extent: Tile coordinate range
+
+    Returns:
+        The layer as a Tile message (tiles are concatenations of these)
+    """
+    keys = list(properties)
+    columns = [properties[key] for key in keys]
+    values, index = [], {}
+    features = []
+    # Field headers of a Feature: tags (2), type (3) = POINT, geometry (4)
+    tags_header = b"\x12"
+    type_and_geometry_header = b"\x18" + varint(POINT) + b"\x22"
+    move_to = varint(MOVE_TO_ONE)
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        tags = bytearray()
+        for k, column in enumerate(columns):
+            value = column[i]
+            if value is None:
+                continue
+            slot = (type(value), value)
+            j = index.get(slot)
+            if j is None:
+                j = index[slot] = len(values)
+                values.append(value)
+            tags += varint(k) + varint(j)
+        geometry = move_to + varint(zigzag(int(x))) + varint(zigzag(int(y)))
+        feature = b"".join(
+            (
+                tags_header,
+                varint(len(tags)),
+                tags,
+                type_and_geometry_header,
+                varint(len(geometry)),
+                geometry,
+            )
+        )
+        features.append(b"\x12" + varint(len(feature)) + feature)
+
+    layer = (
+        b"\x78\x02"
+        + field(1, name.encode())
+        + b"".join(features)
+        + b"".join(field(3, key.encode()) for key in keys)
+        + b"".join(field(4, encode_value(value)) for value in values)
+        + b"\x28"
+        + varint(extent)
+    )
+    return field(3, layer)
@@ -0,0 +1,321 @@
+# src/utils/synthetic_generator.py
+"""
+Seeded synthetic Chicago crime records for offline and scale testing
+
+Records look like the portal's export: crime types follow the real mix,
+locations cluster around the city's high-crime community areas, and
+timestamps follow seasonal, weekly and hour-of-day rhythms. Rows are
+generated in fixed blocks, each seeded from (seed, block number), so any
+row range can be produced on its own. The same seed always gives the same
+records whatever the chunk size, and 50M rows stream in constant memory.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_cleaner import CHICAGO_BOUNDS  # noqa: E402
+
+# Rows per independently seeded block
+BLOCK_ROWS = 65536
+
+NS_PER_MINUTE = 60 * 10**9
+
+# Share of each primary type in recent years of portal data
+CRIME_TYPE_MIX = {
+    "THEFT": 0.215,
+    "BATTERY": 0.175,
+    "CRIMINAL DAMAGE": 0.110,
+    "MOTOR VEHICLE THEFT": 0.100,
+    "ASSAULT": 0.090,
+    "OTHER OFFENSE": 0.065,
+    "DECEPTIVE PRACTICE": 0.060,
+    "ROBBERY": 0.040,
+    "WEAPONS VIOLATION": 0.033,
+    "BURGLARY": 0.030,
+    "NARCOTICS": 0.020,
+    "CRIMINAL TRESPASS": 0.018,
+    "OFFENSE INVOLVING CHILDREN": 0.007,
+    "CRIMINAL SEXUAL ASSAULT": 0.006,
+    "SEX OFFENSE": 0.004,
+    "PUBLIC PEACE VIOLATION": 0.003,
+    "INTERFERENCE WITH PUBLIC OFFICER": 0.003,
+    "HOMICIDE": 0.0025,
+    "STALKING": 0.002,
+    "ARSON": 0.002,
+}
+
+LOCATION_MIX = {
+    "STREET": 0.25,
+    "APARTMENT": 0.18,
+    "RESIDENCE": 0.14,
+    "SIDEWALK": 0.06,
+    "SMALL RETAIL STORE": 0.03,
+    "PARKING LOT / GARAGE (NON RESIDENTIAL)": 0.03,
+    "RESTAURANT": 0.025,
+    "ALLEY": 0.02,
+    "VEHICLE NON-COMMERCIAL": 0.02,
+    "DEPARTMENT STORE": 0.015,
+    "GAS STATION": 0.015,
+    "CTA TRAIN": 0.01,
+    "OTHER (SPECIFY)": 0.205,
+}
+
+# Hotspot clusters: (lat, lon, spread in degrees, district, ward, weight)
+CLUSTERS = [
+    (41.8837, -87.6289, 0.010, 1, 42, 0.09),  # Loop
+    (41.9000, -87.6330, 0.012, 18, 2, 0.06),  # Near North
+    (41.9214, -87.6513, 0.012, 19, 43, 0.04),  # Lincoln Park
+    (41.9660, -87.6540, 0.010, 20, 46, 0.03),  # Uptown
+    (42.0080, -87.6680, 0.010, 24, 49, 0.04),  # Rogers Park
+    (41.9020, -87.7200, 0.015, 25, 26, 0.07),  # Humboldt Park
+    (41.8940, -87.7650, 0.018, 15, 29, 0.10),  # Austin
+    (41.8810, -87.7290, 0.013, 11, 28, 0.09),  # Garfield Park
+    (41.8450, -87.7140, 0.014, 10, 22, 0.05),  # Little Village
+    (41.8080, -87.6660, 0.014, 9, 20, 0.05),  # Back of the Yards
+    (41.7800, -87.6450, 0.016, 7, 16, 0.09),  # Englewood
+    (41.7750, -87.6960, 0.016, 8, 15, 0.05),  # Chicago Lawn
+    (41.7610, -87.5760, 0.012, 4, 7, 0.06),  # South Shore
+    (41.7410, -87.6120, 0.015, 6, 6, 0.07),  # Chatham
+    (41.7000, -87.6200, 0.016, 5, 9, 0.05),  # Roseland
+]
+
+# Share of records spread evenly over the city instead of clustered
+BACKGROUND_SHARE = 0.15
+
+# Relative volume per hour of day (midnight first)
+HOUR_PROFILE = np.array(
+    [0.015, 0.010, 0.008, 0.007, 0.008, 0.012, 0.020, 0.025,
+     0.030, 0.035, 0.040, 0.045, 0.050, 0.052, 0.055, 0.057,
+     0.060, 0.062, 0.065, 0.063, 0.060, 0.055, 0.048, 0.038]
+)
+
+# Relative volume per weekday, Monday first
+WEEKDAY_PROFILE = np.array([0.98, 0.97, 0.98, 0.99, 1.05, 1.04, 0.99])
+
+# Summer peak: +/- this share around mid-July
+SEASONAL_AMPLITUDE = 0.15
+SEASONAL_PEAK_DAY = 196
+
+ARREST_RATE = 0.12
+DOMESTIC_RATE = 0.18
+
+
+def _normalized(weights):
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+class SyntheticCrimeGenerator:
+    """
+    Deterministic stream of raw, portal-shaped crime records
+
+    Rows are numbered 0..total-1 in date order, oldest first. Any range of
+    them can be generated on its own, so chunks, pages and parallel workers
+    all see the same records.
+    """
+
+    def __init__(
+        self,
+        total,
+        seed=42,
+        start="2020-01-01",
+        end="2025-09-30",
+        bounds=None,
+    ):
+        """
+        Args:
+            total: Number of records in the dataset
+            seed: Random seed - same seed, same records
+            start: First day of the date range
+            end: Last day of the date range (inclusive)
+            bounds: lat/lon box (default CHICAGO_BOUNDS)
+        """
+        self.total = int(total)
+        self.seed = seed
+        self.bounds = bounds or CHICAGO_BOUNDS
+
+        self.crime_types = np.array(list(CRIME_TYPE_MIX), dtype=object)
+        self.crime_type_p = _normalized(list(CRIME_TYPE_MIX.values()))
+        self.locations = np.array(list(LOCATION_MIX), dtype=object)
+        self.location_p = _normalized(list(LOCATION_MIX.values()))
+        self.hour_p = _normalized(HOUR_PROFILE)
+        self.hour_cdf = np.concatenate([[0.0], np.cumsum(self.hour_p)])
+
+        clusters = np.array(CLUSTERS)
+        self.centers = clusters[:, :2]
+        self.spreads = clusters[:, 2]
+        self.cluster_p = _normalized(clusters[:, 5])
+
+        # Portal-style labels per cluster: district '7', ward '16', and
+        # beats '0711'..'0735' (district, sector 1-3, beat 1-5)
+        districts = clusters[:, 3].astype(int)
+        self.district_labels = districts.astype(str).astype(object)
+        self.ward_labels = clusters[:, 4].astype(int).astype(str).astype(object)
+        self.beat_labels = np.array(
+            [
+                [f"{d:02d}{s}{b}" for s in (1, 2, 3) for b in range(1, 6)]
+                for d in districts
+            ],
+            dtype=object,
+        )
+
+        # Spread the records over the days once; each row's day then
+        # follows from its position
+        self.days = pd.date_range(start, end, freq="D").to_numpy()
+        rng = np.random.default_rng([seed, 0xDA75])
+        self.day_counts = rng.multinomial(self.total, self.day_weights())
+        self.day_ends = np.cumsum(self.day_counts)
+
+        # Consecutive chunks share blocks - keep the last one
+        self._cached = None
+
+    def day_weights(self):
+        """Seasonal x weekday weight of every day in the range"""
+        days = pd.DatetimeIndex(self.days)
+        seasonal = 1 + SEASONAL_AMPLITUDE * np.cos(
+            2 * np.pi * (days.dayofyear.to_numpy() - SEASONAL_PEAK_DAY) / 365.25
+        )
+        return _normalized(seasonal * WEEKDAY_PROFILE[days.weekday.to_numpy()])
+
+    def rows(self, start, stop):
+        """Raw records start..stop-1 as a DataFrame (datetime64 dates)"""
+        start, stop = max(0, start), min(self.total, stop)
+        if start >= stop:
+            return self._block(0).iloc[0:0]
+
+        first, last = start // BLOCK_ROWS, (stop - 1) // BLOCK_ROWS
+        blocks = [self._block(b) for b in range(first, last + 1)]
+        frame = blocks[0] if len(blocks) == 1 else pd.concat(blocks, ignore_index=True)
+
+        offset = start - first * BLOCK_ROWS
+        return frame.iloc[offset : offset + stop - start].reset_index(drop=True)
+
+    def iter_chunks(self, chunksize=50000, start=0, stop=None):
+        """Stream raw records as DataFrames of `chunksize` rows"""
+        stop = self.total if stop is None else min(stop, self.total)
+        for chunk_start in range(start, stop, chunksize):
+            yield self.rows(chunk_start, min(chunk_start + chunksize, stop))
+
+    def write_csv(self, path, chunksize=250000):
+        """Write the whole dataset as a portal-format CSV, chunk by chunk"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        for i, chunk in enumerate(self.iter_chunks(chunksize)):
+            to_socrata_csv(chunk).to_csv(
+                path, mode="w" if i == 0 else "a", header=i == 0, index=False
+            )
+        return path
+
+    def _block(self, block):
+        """Generate one fixed-size block from its own seed"""
+        if self._cached is not None and self._cached[0] == block:
+            return self._cached[1]
+
+        start = block * BLOCK_ROWS
+        stop = min(start + BLOCK_ROWS, self.total)
+        n = max(0, stop - start)
+        rng = np.random.default_rng([self.seed, block])
+
+        latitude, longitude, cluster = self._locations(rng, n)
+        beat = rng.integers(0, len(self.beat_labels[0]), n)
+
+        ids = np.arange(start, stop) + 1
+        frame = pd.DataFrame(
+            {
+                "id": ids,
+                "case_number": np.array(
+                    [f"SY{i:08d}" for i in ids.tolist()], dtype=object
+                ),
+                "date": self._timestamps(start, stop),
+                "primary_type": self.crime_types[
+                    rng.choice(len(self.crime_types), n, p=self.crime_type_p)
+                ],
+                "location_description": self.locations[
+                    rng.choice(len(self.locations), n, p=self.location_p)
+                ],
+                "arrest": rng.random(n) < ARREST_RATE,
+                "domestic": rng.random(n) < DOMESTIC_RATE,
+                "beat": self.beat_labels[cluster, beat],
+                "district": self.district_labels[cluster],
+                "ward": self.ward_labels[cluster],
+                "latitude": latitude.round(9),
+                "longitude": longitude.round(9),
+            }
+        )
+        self._cached = (block, frame)
+        return frame
+
+    def _timestamps(self, start, stop):
+        """
+        Timestamps of rows start..stop-1
+
+        A row's day follows from its position; within the day, rows are
+        placed at evenly spaced quantiles of the hour-of-day profile. Times
+        therefore rise with the row number and the dataset is in date order
+        however it is chunked.
+        """
+        rows = np.arange(start, stop)
+        day = np.searchsorted(self.day_ends, rows, side="right")
+        day_start = self.day_ends[day] - self.day_counts[day]
+        quantile = (rows - day_start + 0.5) / self.day_counts[day]
+
+        hour = np.searchsorted(self.hour_cdf, quantile, side="right") - 1
+        within = (quantile - self.hour_cdf[hour]) / self.hour_p[hour]
+        minutes = hour * 60 + np.floor(within * 60).astype(np.int64)
+
+        midnight = self.days[day].astype("datetime64[ns]").astype(np.int64)
+        return (midnight + minutes * NS_PER_MINUTE).astype("datetime64[ns]")
+
+    def _locations(self, rng, n):
+        """Clustered points inside the bounds, plus each point's nearest cluster"""
+        b = self.bounds
+        cluster = rng.choice(len(self.cluster_p), n, p=self.cluster_p)
+        spread = self.spreads[cluster]
+        latitude = self.centers[cluster, 0] + rng.normal(0, 1, n) * spread
+        longitude = self.centers[cluster, 1] + rng.normal(0, 1, n) * spread
+
+        # Background records, plus cluster tails that fell outside the city
+        redraw = (rng.random(n) < BACKGROUND_SHARE) | ~(
+            (latitude >= b["lat_min"])
+            & (latitude <= b["lat_max"])
+            & (longitude >= b["lon_min"])
+            & (longitude <= b["lon_max"])
+        )
+        k = int(redraw.sum())
+        latitude[redraw] = rng.uniform(b["lat_min"], b["lat_max"], k)
+        longitude[redraw] = rng.uniform(b["lon_min"], b["lon_max"], k)
+
+        # Background points report the district of the nearest cluster
+        distance = (latitude[redraw, None] - self.centers[None, :, 0]) ** 2 + (
+            longitude[redraw, None] - self.centers[None, :, 1]
+        ) ** 2
+        cluster[redraw] = distance.argmin(axis=1)
+
+        return latitude, longitude, cluster
+
+
+def to_socrata_csv(df):
+    """Render a generated frame the way the portal's API serves it"""
+    out = df.copy()
+    text = np.datetime_as_string(out["date"].to_numpy(), unit="ms")
+    out["date"] = text.astype(object)
+    out["arrest"] = np.where(out["arrest"], "true", "false")
+    out["domestic"] = np.where(out["domestic"], "true", "false")
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic crimes CSV")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="data/raw/chicago_crimes_synthetic.csv")
+    args = parser.parse_args()
+
+    SyntheticCrimeGenerator(args.rows, seed=args.seed).write_csv(args.output)
+    print(f"✓ Wrote {args.rows:,} synthetic records to {args.output}")
@@ -0,0 +1,52 @@
+"""
+Shared pytest setup: make backend/ and backend/src importable the same way
+setup_database.py and src/api/main.py do at runtime.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BACKEND_DIR, "src")
+
+for path in (BACKEND_DIR, SRC_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest  # noqa: E402
+
+import database  # noqa: E402
+import setup_database  # noqa: E402
+from api.cache import response_cache  # noqa: E402
+
+# Crimes in the shared synthetic database. Parametrize `db_path` indirectly
+# for another size; 0 creates the schema only.
+SYNTHETIC_ROWS = 3000
+
+
+@pytest.fixture
+def db_path(request, tmp_path, monkeypatch):
+    """A crimes database built by setup_database.py from synthetic data"""
+    rows = getattr(request, "param", SYNTHETIC_ROWS)
+    path = str(tmp_path / "crimes_clean.db")
+    monkeypatch.setattr(setup_database, "DB_PATH", path)
+    setup_database.create_database()
+    if rows:
+        chunks = setup_database.synthetic_chicago_data(limit=rows, chunksize=1000)
+        setup_database.load_database(setup_database.clean_chunks(chunks, workers=1))
+    return path
+
+
+@pytest.fixture
+def client(db_path, monkeypatch):
+    """API test client serving db_path, with no responses cached yet"""
+    monkeypatch.setattr(database, "DB_PATH", database.DB_PATH)
+    database.set_db_path(db_path)
+    response_cache.clear()
+    from api.main import app
+
+    yield app.test_client()
+    for store in (database.get_tiles(), database.get_shards()):
+        if store:
+            store.close()
+    database.get_pool().close_all()
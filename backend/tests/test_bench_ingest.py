@@ -0,0 +1,58 @@
+"""
+Ingest benchmark smoke test: every stage runs and the JSON report is complete
+"""
+
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import bench_ingest  # noqa: E402
+
+
+def test_stand_in_serves_exact_row_ranges(tmp_path):
+    dataset = bench_ingest.StandInDataset(str(tmp_path / "source.csv"), 500)
+
+    with open(dataset.path, "rb") as f:
+        data = f.read()
+    start, end = dataset.byte_range(10, 5)
+    lines = data[start:end].decode().splitlines()
+
+    assert dataset.rows == 500
+    assert [line.split(",")[1] for line in lines] == [
+        f"SY{i:08d}" for i in range(11, 16)
+    ]
+    assert dataset.byte_range(498, 10)[1] == len(data)
+
+
+def test_benchmark_writes_per_stage_results(tmp_path):
+    output = tmp_path / "results.json"
+    status = bench_ingest.main(
+        [
+            "--sizes=2000",
+            "--chunk-size=500",
+            "--page-size=700",
+            "--clean-workers=1",
+            f"--work-dir={tmp_path}",
+            f"--output={output}",
+        ]
+    )
+
+    report = json.loads(output.read_text())
+    stages = report["results"]["2000"]
+
+    assert status == 0
+    assert list(stages) == bench_ingest.STAGES
+    for result in stages.values():
+        assert result["rows"] == 2000
+        assert result["rows_per_s"] > 0
+        assert result["peak_rss_mb"] > 0
+    assert stages["index"]["db_size_mb"] > 0
+
+    # A baseline twice as fast flags every stage
+    baseline = json.loads(output.read_text())
+    for result in baseline["results"]["2000"].values():
+        result["rows_per_s"] *= 2
+    assert len(bench_ingest.compare(report, baseline)) == len(bench_ingest.STAGES)
@@ -0,0 +1,154 @@
+"""
+Response cache tests: generation-keyed entries, memory and disk tiers
+"""
+
+from datetime import timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date, parse_date
+
+import setup_database
+from api import cache
+from api.cache import DiskTier, MemoryTier, ResponseCache, cache_key, response_cache
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    # Notice a new generation straight away
+    monkeypatch.setattr(cache, "GENERATION_TTL_S", 0)
+    return client
+
+
+def total(client):
+    response = client.get("/api/crimes/types")
+    types = response.get_json()["crime_types"]
+    return response.headers["X-Cache"], sum(t["count"] for t in types)
+
+
+def test_key_ignores_parameter_order_and_empty_values():
+    a = MultiDict([("limit", "10"), ("crime_type", "THEFT"), ("bbox", "")])
+    b = MultiDict([("crime_type", "THEFT"), ("limit", "10")])
+    assert cache_key("get_all_crimes", a) == cache_key("get_all_crimes", b)
+    assert cache_key("get_all_crimes", a) != cache_key("get_hotspots", a)
+
+
+def test_repeat_requests_are_served_from_memory(client):
+    before = dict(response_cache.counters)
+    first = client.get("/api/crimes/all?limit=50&crime_type=THEFT")
+    second = client.get("/api/crimes/all?crime_type=THEFT&limit=50")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT-MEMORY"
+    assert second.get_data() == first.get_data()
+    assert response_cache.counters["memory_hits"] == before["memory_hits"] + 1
+    assert response_cache.counters["misses"] == before["misses"] + 1
+
+    stats = client.get("/api/cache/stats").get_json()["cache"]
+    assert stats["memory"]["entries"] >= 1
+    assert client.get("/api/health").headers.get("X-Cache") is None
+
+
+def test_ingest_invalidates_cached_responses(client):
+    assert total(client)[0] == "MISS"
+    cached, count = total(client)
+    assert (cached, count) == ("HIT-MEMORY", 3000)
+
+    rows = setup_database.SyntheticCrimeGenerator(3010).rows(3000, 3010)
+    setup_database.load_database([setup_database.clean_data(rows)], bulk=False)
+
+    assert total(client) == ("MISS", 3010)
+
+
+def test_errors_are_not_cached(client):
+    for _ in range(2):
+        response = client.get("/api/crimes/hotspots?resolution=tiny")
+        assert response.status_code == 400
+    assert response.headers["X-Cache"] == "MISS"
+
+
+def test_memory_tier_evicts_least_recently_used():
+    memory = MemoryTier(max_bytes=100)
+    memory.put("a", (1, "application/json", b"x" * 40))
+    memory.put("b", (1, "application/json", b"x" * 40))
+    memory.get("a")
+    memory.put("c", (1, "application/json", b"x" * 40))
+
+    assert memory.get("b") is None
+    assert memory.get("a") and memory.get("c")
+    assert (memory.bytes, memory.evictions) == (80, 1)
+
+
+def test_disk_tier_is_shared_and_bounded(tmp_path):
+    # Two workers with their own memory tiers over one cache directory
+    first = ResponseCache(MemoryTier(), DiskTier(str(tmp_path), max_bytes=100))
+    second = ResponseCache(MemoryTier(), DiskTier(str(tmp_path), max_bytes=100))
+
+    first.store("a", 7, "application/json", b"x" * 40)
+    assert second.lookup("a", 7) == ("application/json", b"x" * 40, "disk")
+    assert second.lookup("a", 7)[2] == "memory"
+    # Computed under an older generation: a miss
+    assert second.lookup("a", 8) is None
+
+    first.store("b", 7, "application/json", b"y" * 40)
+    first.store("c", 7, "application/json", b"z" * 40)
+    assert second.disk.get("a") is None
+    assert second.disk.stats()["entries"] == 2
+
+    # A newer generation drops everything older
+    first.store("d", 8, "application/json", b"w" * 10)
+    assert second.disk.stats()["entries"] == 1
+
+
+def test_revalidation_answers_304_without_a_query(client, monkeypatch):
+    from api import limits
+
+    first = client.get("/api/crimes/types")
+    etag, modified = first.headers["ETag"], first.headers["Last-Modified"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    # Any query would now be interrupted, so a 304 proves none ran
+    monkeypatch.setitem(limits.ENDPOINT_BUDGETS, "get_crime_types", 0)
+    response = client.get("/api/crimes/types", headers={"If-None-Match": etag})
+    assert (response.status_code, response.get_data()) == (304, b"")
+    assert response.headers["ETag"] == etag
+    # Dates are whole seconds: only a strictly later one proves the copy
+    # current, since a reload within the same second shares its date
+    response = client.get(
+        "/api/crimes/types", headers={"If-Modified-Since": modified}
+    )
+    assert response.status_code == 200
+    later = http_date(parse_date(modified) + timedelta(seconds=1))
+    response = client.get("/api/crimes/types", headers={"If-Modified-Since": later})
+    assert response.status_code == 304
+
+    # Other parameters, other ETag
+    other = client.get("/api/crimes/all?limit=5").headers["ETag"]
+    assert other != etag
+
+
+def test_ingest_changes_the_etag(client):
+    etag = client.get("/api/health").headers["ETag"]
+    assert client.get("/api/health", headers={"If-None-Match": etag}).status_code == 304
+
+    rows = setup_database.SyntheticCrimeGenerator(3010).rows(3000, 3010)
+    setup_database.load_database([setup_database.clean_data(rows)], bulk=False)
+
+    response = client.get("/api/health", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["total_crimes"] == 3010
+
+
+def test_preflight_for_revalidation_is_cacheable(client):
+    # If-None-Match is not a CORS-safelisted header, so polls are preflighted
+    response = client.options(
+        "/api/crimes/types",
+        headers={
+            "Origin": "http://localhost:5173",
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "If-None-Match",
+        },
+    )
+    assert response.status_code == 200
+    assert int(response.headers["Access-Control-Max-Age"]) >= 3600
@@ -0,0 +1,217 @@
+"""
+Cluster index tests: hierarchy invariants and /api/crimes/clusters
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import database
+import setup_database
+from api import clusters
+from api.cache import response_cache
+
+CHICAGO = "-87.95,41.64,-87.52,42.03"
+
+
+def wait_for_index():
+    thread = clusters.warm_index(response_cache.generation())
+    if thread is not None:
+        thread.join()
+
+
+def hold_builds(monkeypatch):
+    """An Event that index builds started from now on wait for"""
+    release = threading.Event()
+    build = clusters.build_index
+
+    def held_build(*args, **kwargs):
+        release.wait(5)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(clusters, "build_index", held_build)
+    return release
+
+
+@pytest.fixture
+def built(client):
+    wait_for_index()
+    return client
+
+
+def test_every_level_accounts_for_every_crime():
+    rng = np.random.default_rng(7)
+    longitude = rng.uniform(-87.9, -87.5, 5000)
+    latitude = rng.uniform(41.65, 42.0, 5000)
+    kinds = rng.integers(0, 5, 5000)
+    index = clusters.ClusterIndex(longitude, latitude, kinds, list("ABCDE"))
+
+    sizes = [len(level.count) for level in index.levels]
+    assert all(level.count.sum() == 5000 for level in index.levels)
+    # Coarser zooms never hold more clusters than finer ones
+    assert sizes == sorted(sizes)
+    assert sizes[0] == 1 and sizes[-1] == 5000
+
+    # Top types are the cluster's most frequent, in order
+    whole = index.level(0)
+    expected = np.bincount(kinds, minlength=5)
+    assert whole.top_types[0].tolist() == np.argsort(-expected, kind="stable")[
+        : clusters.TOP_TYPES
+    ].tolist()
+    assert whole.top_counts[0].tolist() == sorted(expected, reverse=True)[:3]
+
+
+def test_fractional_zooms_report_the_level_they_show():
+    index = clusters.ClusterIndex([-87.6, -87.6], [41.8, 41.8], [0, 0], ["A"])
+    for zoom in [16, 16.5, 16.99]:
+        assert index.level(zoom) is index.levels[16]
+        assert index.clusters(zoom)["clustered"] is True
+    assert index.clusters(17.2)["clustered"] is False
+    # Two crimes at one address: a cluster wherever levels cluster
+    assert index.features(16.5)[0]["properties"]["cluster"] is True
+    assert index.features(17)[0]["properties"]["cluster"] is False
+
+
+def test_clusters_answer_for_a_viewport(built, db_path):
+    client = built
+    body = client.get(f"/api/crimes/clusters?zoom=10&bbox={CHICAGO}").get_json()
+    located = database.get_db().execute(
+        "SELECT COUNT(*) FROM crimes WHERE latitude IS NOT NULL"
+    ).fetchone()[0]
+    assert body["metadata"]["crimes"] == located
+
+    feature = max(body["features"], key=lambda f: f["properties"]["count"])
+    assert feature["properties"]["cluster"] is True
+    top = feature["properties"]["top_types"]
+    assert [t["count"] for t in top] == sorted((t["count"] for t in top), reverse=True)
+
+    # A smaller viewport at a deeper zoom: only clusters inside it
+    bbox = (-87.7, 41.85, -87.6, 41.9)
+    url = "/api/crimes/clusters?zoom=14&bbox=" + ",".join(map(str, bbox))
+    for f in client.get(url).get_json()["features"]:
+        lon, lat = f["geometry"]["coordinates"]
+        assert bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]
+
+
+def test_response_size_is_bounded_by_the_viewport(built):
+    client = built
+    # 60 px clusters in a ~1000 px wide viewport
+    body = client.get(f"/api/crimes/clusters?zoom=11&bbox={CHICAGO}").get_json()
+    width, height = clusters.viewport_pixels(
+        [float(v) for v in CHICAGO.split(",")], 11
+    )
+    cells = (width // clusters.RADIUS_PX + 2) * (height // clusters.RADIUS_PX + 2)
+    assert len(body["features"]) <= cells
+
+    response = client.get(f"/api/crimes/clusters?zoom=18&bbox={CHICAGO}")
+    assert response.status_code == 400
+    assert response.get_json()["code"] == "viewport_too_large"
+
+
+def test_requests_never_wait_for_a_build(client, monkeypatch):
+    release = hold_builds(monkeypatch)
+    url = f"/api/crimes/clusters?zoom=0&bbox={CHICAGO}"
+    response = client.get(url)
+    assert response.status_code == 503
+    assert response.get_json()["code"] == "index_building"
+    assert response.headers["Retry-After"] == str(clusters.RETRY_AFTER_S)
+
+    release.set()
+    wait_for_index()
+    assert client.get(url).status_code == 200
+
+
+def test_first_request_of_a_process_starts_the_build(client, monkeypatch):
+    monkeypatch.setattr(clusters, "_warmed_pid", None)
+    release = hold_builds(monkeypatch)
+    client.get("/api/crimes/types")
+    key, thread, _ = clusters._building
+    assert key == (database.DB_PATH, response_cache.generation())
+    assert thread.is_alive()
+    release.set()
+    thread.join()
+    assert clusters.cluster_index(key[1]) == (clusters._index[1], True)
+
+
+def test_builds_inherited_across_a_fork_are_restarted(client, monkeypatch):
+    # What a worker forked after `gunicorn --preload` finds: its parent's
+    # record of a build, whose thread does not exist in the child
+    key = (database.DB_PATH, response_cache.generation())
+    parent = threading.Thread(target=lambda: None)
+    monkeypatch.setattr(clusters, "_building", (key, parent, -1))
+    thread = clusters.warm_index(key[1])
+    assert thread is not parent
+    thread.join()
+    assert clusters.cluster_index(key[1])[1] is True
+
+
+def test_build_runs_under_its_own_deadline(client, monkeypatch):
+    monkeypatch.setattr(clusters, "BUILD_BUDGET_S", 0)
+    wait_for_index()
+    assert clusters.cluster_index(response_cache.generation()) == (None, False)
+    assert client.get(f"/api/crimes/clusters?zoom=0&bbox={CHICAGO}").status_code == 503
+
+
+def test_failed_builds_back_off_until_the_next_load(client, monkeypatch):
+    monkeypatch.setattr(clusters, "BUILD_BUDGET_S", 0)
+    monkeypatch.setattr("api.cache.GENERATION_TTL_S", 0)
+    wait_for_index()
+
+    # Requests after a failure start no new full-table scan
+    url = f"/api/crimes/clusters?zoom=0&bbox={CHICAGO}"
+    response = client.get(url)
+    assert response.status_code == 503
+    assert response.get_json()["code"] == "index_unavailable"
+    assert int(response.headers["Retry-After"]) > clusters.RETRY_AFTER_S
+    assert clusters.warm_index(response_cache.generation()) is None
+
+    # A new load is built at once
+    monkeypatch.setattr(clusters, "BUILD_BUDGET_S", 300)
+    rows = setup_database.SyntheticCrimeGenerator(3011).rows(100, 3011)
+    setup_database.load_database([setup_database.clean_data(rows)], bulk=False)
+    wait_for_index()
+    assert client.get(url + "&v=2").status_code == 200
+
+
+def test_index_is_rebuilt_for_a_new_generation(built, monkeypatch):
+    client = built
+    monkeypatch.setattr("api.cache.GENERATION_TTL_S", 0)
+    url = f"/api/crimes/clusters?zoom=0&bbox={CHICAGO}"
+    before = client.get(url).get_json()["metadata"]["crimes"]
+    index, _ = clusters.cluster_index(response_cache.generation())
+
+    rows = setup_database.SyntheticCrimeGenerator(3010).rows(3000, 3010)
+    setup_database.load_database([setup_database.clean_data(rows)], bulk=False)
+
+    # The old clusters stand in, uncached, while the new index is built
+    release = hold_builds(monkeypatch)
+    stale = client.get(url + "&v=2")
+    assert stale.headers["Cache-Control"] == "no-store"
+    assert stale.get_json()["metadata"]["stale"] is True
+    assert stale.get_json()["metadata"]["crimes"] == before
+    release.set()
+    wait_for_index()
+
+    fresh = client.get(url + "&v=2")
+    assert fresh.headers["X-Cache"] == "MISS"
+    assert fresh.get_json()["metadata"]["crimes"] > before
+    assert clusters.cluster_index(response_cache.generation())[0] is not index
+
+
+@pytest.mark.parametrize(
+    "query", ["", "zoom=abc", "zoom=30", "zoom=5&bbox=1,2,3", "zoom=12"]
+)
+def test_bad_requests_answer_400(client, query):
+    assert client.get(f"/api/crimes/clusters?{query}").status_code == 400
+
+
+def test_health_lists_the_map_endpoints(client):
+    endpoints = client.get("/api/health").get_json()["endpoints"]
+    listed = [path for paths in endpoints.values() for path in paths]
+    for path in [
+        "/api/crimes/search",
+        "/api/crimes/clusters",
+        "/api/tiles/{z}/{x}/{y}.mvt",
+    ]:
+        assert path in listed
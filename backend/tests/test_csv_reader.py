@@ -0,0 +1,55 @@
+"""
+CSV reader tests: pyarrow and pandas paths must agree
+"""
+
+import pandas as pd
+import pytest
+
+from utils import csv_reader
+
+CSV = (
+    "id,case_number,date,primary_type,description,latitude,longitude,district\n"
+    "1,JJ1,2025-09-22T14:30:00.000,THEFT,$500 AND UNDER,41.88,-87.63,001\n"
+    "2,JJ2,2025-09-22T14:30:00.000,BATTERY,SIMPLE,41.77,-87.60,007\n"
+    "3,JJ3,09/21/2025 11:05:00 PM,ROBBERY,ARMED,,,\n"
+    "4,JJ4,not a date,THEFT,OVER $500,41.90,-87.70,018\n"
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "crimes.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_parse_socrata_dates_handles_both_formats_and_garbage():
+    parsed = csv_reader.parse_socrata_dates(
+        pd.Series(["2025-09-22T14:30:00.000", "09/21/2025 11:05:00 PM", "bad", None])
+    )
+
+    assert parsed.tolist()[:2] == [
+        pd.Timestamp("2025-09-22 14:30:00"),
+        pd.Timestamp("2025-09-21 23:05:00"),
+    ]
+    assert parsed.iloc[2:].isna().all()
+
+
+@pytest.mark.parametrize("use_arrow", [False, True])
+def test_readers_return_typed_columns(csv_path, use_arrow):
+    if use_arrow:
+        pytest.importorskip("pyarrow")
+
+    columns = ["case_number", "date", "primary_type", "latitude", "district", "ward"]
+    chunks = list(
+        csv_reader.read_crime_csv(csv_path, chunksize=3, columns=columns, use_arrow=use_arrow)
+    )
+
+    df = pd.concat(chunks, ignore_index=True)
+    assert [len(c) for c in chunks] == [3, 1]
+    assert set(df.columns) == set(columns)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df["date"].isna().tolist() == [False, False, False, True]
+    assert df["district"].tolist()[:2] == ["001", "007"]
+    assert pd.isna(df.loc[2, "latitude"])
+    assert df["ward"].isna().all()
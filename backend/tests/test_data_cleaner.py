@@ -0,0 +1,54 @@
+"""
+Unified cleaning engine tests
+"""
+
+import pandas as pd
+
+from utils.data_cleaner import ChicagoCrimeDataCleaner, worker_context
+
+
+def raw_chunk(start, n=5):
+    return pd.DataFrame(
+        {
+            "case_number": [f"JJ{start + i:06d}" for i in range(n)],
+            "date": ["2025-07-05T23:15:00.000"] * n,
+            "primary_type": ["BATTERY"] * n,
+            "description": ["SIMPLE"] * n,
+            "location_description": [None] * n,
+            "latitude": [41.88] * n,
+            "longitude": [-87.63] * n,
+            "district": ["016"] * n,
+            "ward": [42.0] * n,
+            "beat": ["111"] * n,
+        }
+    )
+
+
+def test_clean_chunk_maps_columns_and_derives_time_fields():
+    df = raw_chunk(0, n=2)
+    df.loc[1, "latitude"] = 45.0  # outside Chicago
+
+    out = ChicagoCrimeDataCleaner().clean_chunk(df)
+
+    row = out.iloc[0]
+    assert len(out) == 1
+    assert row["crime_type"] == "BATTERY"
+    assert row["crime_category"] == "ASSAULT/BATTERY"
+    assert row["description"] == ""
+    assert (row["district"], row["ward"], row["beat"]) == ("16", "42", "0111")
+    assert (row["hour"], row["day_of_week"], row["season"]) == (23, "Saturday", "Summer")
+    assert bool(row["is_weekend"])
+
+
+def test_process_pool_keeps_chunk_order():
+    cleaner = ChicagoCrimeDataCleaner(derived=False, text_dates=True)
+    chunks = [raw_chunk(i * 5) for i in range(6)]
+
+    out = list(cleaner.clean_chunks(iter(chunks), workers=2))
+
+    assert [c["case_number"].iloc[0] for c in out] == [f"JJ{i * 5:06d}" for i in range(6)]
+    assert out[0]["date"].iloc[0] == "2025-07-05 23:15:00"
+
+
+def test_workers_are_never_forked_from_the_threaded_parent():
+    assert worker_context().get_start_method() in ("forkserver", "spawn")
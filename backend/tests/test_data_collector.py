@@ -0,0 +1,89 @@
+"""
+Paginated downloader tests against a local stand-in for the Socrata endpoint
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from utils.data_collector import ChicagoCrimeCollector
+
+TOTAL_ROWS = 95
+
+
+class FakeSocrataHandler(BaseHTTPRequestHandler):
+    """Serves TOTAL_ROWS rows honouring $offset/$limit; can fail given offsets"""
+
+    fail_offsets = set()
+    requested = []
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        offset = int(params["$offset"][0])
+        limit = int(params["$limit"][0])
+        self.requested.append(offset)
+
+        if offset in self.fail_offsets:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        rows = range(offset, min(offset + limit, TOTAL_ROWS))
+        body = "case_number,date\n" + "".join(
+            f"JJ{i:06d},2025-09-22T00:00:00.000\n" for i in rows
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FakeSocrataHandler.fail_offsets = set()
+    FakeSocrataHandler.requested = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeSocrataHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/resource/ijzp-q8t2.csv"
+    httpd.shutdown()
+
+
+def read_pages(paths):
+    return pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+
+
+def test_pages_are_fetched_in_order_and_stop_at_short_page(server, tmp_path):
+    collector = ChicagoCrimeCollector(
+        data_dir=str(tmp_path), base_url=server, workers=3, page_size=10
+    )
+
+    paths = collector.download_pages(1000)
+
+    df = read_pages(paths)
+    assert len(paths) == 10
+    assert df["case_number"].tolist() == [f"JJ{i:06d}" for i in range(TOTAL_ROWS)]
+
+
+def test_failed_run_resumes_from_manifest(server, tmp_path):
+    collector = ChicagoCrimeCollector(
+        data_dir=str(tmp_path), base_url=server, workers=2, page_size=10, retries=1
+    )
+
+    FakeSocrataHandler.fail_offsets = {50}
+    with pytest.raises(Exception):
+        collector.download_pages(TOTAL_ROWS)
+
+    FakeSocrataHandler.fail_offsets = set()
+    FakeSocrataHandler.requested = []
+    paths = collector.download_pages(TOTAL_ROWS)
+
+    assert 0 not in FakeSocrataHandler.requested
+    assert 50 in FakeSocrataHandler.requested
+    assert len(read_pages(paths)) == TOTAL_ROWS
@@ -0,0 +1,66 @@
+"""
+Compact-dtype loader tests
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from utils.data_loader import load_crimes
+
+
+def make_db(path, n=600):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE crimes (
+            id INTEGER PRIMARY KEY, case_number TEXT, date TEXT, crime_type TEXT,
+            description TEXT, latitude REAL, longitude REAL, district TEXT,
+            ward TEXT, beat TEXT, year_month TEXT
+        )
+        """
+    )
+    types = ["THEFT", "BATTERY", "NARCOTICS"]
+    conn.executemany(
+        "INSERT INTO crimes VALUES (NULL, ?, ?, ?, 'STREET', 41.88, -87.63, ?, '42', '0111', '2025-09')",
+        [(f"JJ{i}", f"2025-09-{1 + i % 28:02d}", types[i % 3], str(i % 25)) for i in range(n)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_load_crimes_uses_compact_dtypes_across_chunks(tmp_path):
+    path = str(tmp_path / "crimes.db")
+    make_db(path)
+
+    df = load_crimes(db_path=path, derived=True, chunksize=250)
+
+    assert len(df) == 600
+    assert isinstance(df["crime_type"].dtype, pd.CategoricalDtype)
+    assert set(df["crime_type"].cat.categories) == {"THEFT", "BATTERY", "NARCOTICS"}
+    assert isinstance(df["district"].dtype, pd.CategoricalDtype)
+    assert df["latitude"].dtype == "float32"
+    assert df["month"].dtype == "int8"
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df.attrs["memory_saved_mb"] > 0
+
+
+def test_load_crimes_without_compaction_keeps_defaults(tmp_path):
+    path = str(tmp_path / "crimes.db")
+    make_db(path, n=10)
+
+    df = load_crimes(db_path=path, columns=["date", "crime_type"], compact=False)
+
+    assert df["crime_type"].dtype == object
+    assert list(df.columns) == ["date", "crime_type"]
+
+
+def test_load_crimes_always_selects_the_date(tmp_path):
+    path = str(tmp_path / "crimes.db")
+    make_db(path, n=10)
+
+    df = load_crimes(db_path=path, columns="crime_type, district", derived=True)
+
+    assert list(df.columns[:3]) == ["date", "crime_type", "district"]
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert (df["month"] == 9).all()
@@ -0,0 +1,65 @@
+"""
+Binary export tests: Arrow IPC stream and FlatGeobuf from /api/crimes/all
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from api import formats
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_arrow_stream_matches_the_geojson(client):
+    url = "/api/crimes/all?limit=2000&start_date=2020-01-01"
+    geojson = client.get(url)
+    features = geojson.get_json()["features"]
+
+    response = client.get(url + "&format=arrow")
+    assert response.status_code == 200
+    assert response.mimetype == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.get_data()).read_all()
+
+    assert table.schema.field("crime_type").type == pa.dictionary(
+        pa.int32(), pa.string()
+    )
+    assert table.schema.field("latitude").type == pa.float32()
+    assert table.column("id").to_pylist() == [f["properties"]["id"] for f in features]
+    assert table.column("district").to_pylist() == [
+        f["properties"]["district"] for f in features
+    ]
+    coordinates = np.array([f["geometry"]["coordinates"] for f in features])
+    assert np.allclose(table.column("longitude"), coordinates[:, 0], atol=1e-4)
+
+    # Dictionary codes and float32 coordinates: a fraction of the JSON
+    assert len(response.get_data()) * 3 < len(geojson.get_data())
+
+
+def test_flatgeobuf_holds_the_same_points(client):
+    pyogrio = pytest.importorskip("pyogrio")
+    url = "/api/crimes/all?limit=1500&crime_type=THEFT"
+    features = client.get(url).get_json()["features"]
+
+    response = client.get(url + "&format=fgb")
+    assert response.status_code == 200
+    assert response.get_data()[:3] == b"fgb"
+    meta, _, geometry, fields = pyogrio.raw.read(io.BytesIO(response.get_data()))
+
+    ids = fields[list(meta["fields"]).index("id")]
+    assert ids.tolist() == [f["properties"]["id"] for f in features]
+    assert meta["geometry_type"] == "Point"
+    assert len(geometry) == len(features)
+
+
+def test_empty_result_is_a_valid_file(client):
+    url = "/api/crimes/all?crime_type=NO SUCH TYPE&format="
+    table = pa.ipc.open_stream(client.get(url + "arrow").get_data()).read_all()
+    assert table.num_rows == 0
+    assert client.get(url + "fgb").status_code == 200
+
+
+def test_missing_library_answers_501(client, monkeypatch):
+    monkeypatch.setattr(formats, "HAS_PYARROW", False)
+    assert client.get("/api/crimes/all?format=arrow").status_code == 501
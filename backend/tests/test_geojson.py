@@ -0,0 +1,66 @@
+"""
+GeoJSON serializer tests: same features as the row-by-row serializer, benchmark
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import bench_geojson  # noqa: E402
+from api import geojson  # noqa: E402
+from api.main import DISTRICT_NAMES, app  # noqa: E402
+
+ROWS = pd.DataFrame(
+    {
+        "id": [1, 2, 3, 4],
+        "case_number": ["JA1", "JA2", "JA3", "JA4"],
+        "date": ["2025-09-30 23:00:00", "2025-09-30", "2025-09-29", "2025-09-28"],
+        "crime_type": ["THEFT", "BATTERY", "THEFT", "ARSON"],
+        "description": ["STREET", "APARTMENT", None, "ALLEY"],
+        "latitude": [41.88, None, 41.75, 41.9],
+        "longitude": [-87.63, -87.6, -87.7, -87.65],
+        "district": ["1", "7", "13", None],
+    }
+)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_columnar_features_match_the_row_serializer(monkeypatch, use_orjson):
+    if use_orjson and not geojson.HAS_ORJSON:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(geojson, "HAS_ORJSON", use_orjson)
+
+    with app.app_context():
+        legacy = json.loads(bench_geojson.legacy_body(ROWS))["features"]
+    body = geojson.dumps({"features": geojson.crime_features(ROWS, DISTRICT_NAMES)})
+    features = json.loads(body)["features"]
+
+    # Row 2 has no latitude; row 4's unknown district is labelled, not "None"
+    assert [f["properties"]["id"] for f in features] == [1, 3, 4]
+    assert features[:2] == legacy[:2]
+    assert features[1]["properties"]["district"] == "District 13"
+    assert features[1]["properties"]["description"] is None
+    assert features[2]["properties"]["district"] == "Unknown"
+
+
+def test_unlocated_rows_can_be_kept_with_null_geometry():
+    features = geojson.crime_features(ROWS, DISTRICT_NAMES, located_only=False)
+    assert [f["geometry"] is None for f in features] == [False, True, False, False]
+    assert features[0]["geometry"]["coordinates"] == [-87.63, 41.88]
+
+
+def test_benchmark_reports_every_serializer(tmp_path):
+    output = tmp_path / "geojson.json"
+    assert bench_geojson.main(["--rows=1500", "--repeat=1", f"--output={output}"]) == 0
+
+    report = json.loads(output.read_text())
+    results = report["results"]
+    assert {"legacy", "columnar-json"} <= set(results)
+    assert report["config"]["rows"] == 1500
+    assert all(r["rows_per_s"] > 0 for r in results.values())
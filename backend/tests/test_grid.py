@@ -0,0 +1,92 @@
+"""
+Grid-cell tests: identical keys at ingest and in SQL, indexed hotspot GROUP BYs
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from utils.grid import GRID_RESOLUTIONS, cell_center, cell_key_sql, cell_keys
+
+
+def test_numpy_and_sql_keys_agree():
+    rng = np.random.default_rng(0)
+    latitude = np.concatenate([rng.uniform(41.64, 42.02, 2000), [41.65, 41.87]])
+    longitude = np.concatenate([rng.uniform(-87.94, -87.52, 2000), [-87.9, -87.63]])
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE crimes (latitude REAL, longitude REAL)")
+    conn.executemany("INSERT INTO crimes VALUES (?, ?)", zip(latitude, longitude))
+
+    for size in GRID_RESOLUTIONS.values():
+        rows = conn.execute(f"SELECT {cell_key_sql(size)} FROM crimes")
+        assert [row[0] for row in rows] == cell_keys(latitude, longitude, size).tolist()
+
+    # A cell's centre maps back to the same cell
+    key = int(cell_keys([41.8781], [-87.6298], 0.01)[0])
+    assert cell_keys(*([c] for c in cell_center(key, 0.01)), 0.01)[0] == key
+
+
+def test_ingest_stores_keys_matching_the_backfill(db_path):
+    conn = sqlite3.connect(db_path)
+    for name, size in GRID_RESOLUTIONS.items():
+        mismatched = conn.execute(
+            f"SELECT COUNT(*) FROM crimes WHERE cell_{name} != {cell_key_sql(size)}"
+        ).fetchone()[0]
+        assert mismatched == 0
+
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "resolution, index",
+    [
+        ("coarse", "idx_cell_coarse_date"),
+        ("medium", "idx_cell_medium_date"),
+        ("fine", "idx_date_cells"),
+    ],
+)
+def test_hotspot_windows_read_one_covering_index(db_path, resolution, index):
+    conn = sqlite3.connect(db_path)
+    plan = [
+        row[3]
+        for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT cell_{resolution}, COUNT(*) FROM crimes "
+            f"WHERE date >= '2025-01-01' AND cell_{resolution} IS NOT NULL "
+            f"GROUP BY cell_{resolution}"
+        )
+    ]
+    conn.close()
+    assert f"COVERING INDEX {index}" in plan[0]
+    # Cell-led indexes hand the rows over already grouped
+    sorted_groups = "USE TEMP B-TREE FOR GROUP BY" in plan
+    assert sorted_groups == (resolution == "fine")
+
+
+@pytest.mark.parametrize("resolution", list(GRID_RESOLUTIONS))
+def test_hotspots_group_by_the_requested_resolution(client, db_path, resolution):
+    url = f"/api/crimes/hotspots?resolution={resolution}&days=365&min_count=0"
+    body = client.get(url).get_json()
+
+    # Synthetic data ends 2025-09-30, so the window starts 2024-09-30
+    size = GRID_RESOLUTIONS[resolution]
+    with sqlite3.connect(db_path) as conn:
+        latitude, longitude = zip(
+            *conn.execute(
+                "SELECT latitude, longitude FROM crimes WHERE date >= '2024-09-30'"
+            )
+        )
+    keys, counts = np.unique(cell_keys(latitude, longitude, size), return_counts=True)
+    expected = dict(zip(keys.tolist(), counts.tolist()))
+
+    assert body["resolution"] == resolution
+    assert body["hotspots"]
+    for spot in body["hotspots"]:
+        assert expected[spot["cell"]] == spot["intensity"]
+    assert body["hotspots"][0]["intensity"] == max(expected.values())
+
+
+def test_unknown_resolution_is_rejected(client):
+    response = client.get("/api/crimes/hotspots?resolution=tiny")
+    assert response.status_code == 400
@@ -0,0 +1,120 @@
+"""
+Ingestion pipeline tests: chunked clean → batched load into SQLite
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import setup_database
+
+
+def raw_chunk(n, start=0):
+    """Build a raw Socrata-style chunk with n valid rows"""
+    return pd.DataFrame(
+        {
+            "case_number": [f"JJ{start + i:06d}" for i in range(n)],
+            "date": ["2025-09-22T14:30:00.000"] * n,
+            "primary_type": ["THEFT"] * n,
+            "location_description": ["STREET"] * n,
+            "latitude": [41.88] * n,
+            "longitude": [-87.63] * n,
+            "district": ["1"] * n,
+            "ward": ["42"] * n,
+            "beat": ["0111"] * n,
+            "arrest": [False] * n,
+        }
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "crimes_clean.db")
+    monkeypatch.setattr(setup_database, "DB_PATH", path)
+    monkeypatch.chdir(tmp_path)
+    setup_database.create_database()
+    return path
+
+
+def test_clean_data_drops_invalid_rows():
+    df = raw_chunk(4)
+    df.loc[0, "latitude"] = None
+    df.loc[1, "longitude"] = -80.0
+    df.loc[2, "date"] = "not a date"
+
+    cleaned = setup_database.clean_data(df)
+
+    assert len(cleaned) == 1
+    row = cleaned.iloc[0]
+    assert row["date"] == "2025-09-22 14:30:00"
+    assert row["year_month"] == "2025-09"
+    assert (row["hour"], row["weekday"], row["iso_week"]) == (14, 0, 202539)
+    assert row["epoch"] == 1758551400
+    assert "arrest" not in cleaned.columns
+
+
+def test_streaming_load_inserts_every_chunk(db_path):
+    stats = setup_database.StageStats()
+    chunks = (raw_chunk(250, start=i * 250) for i in range(4))
+
+    loaded = setup_database.load_database(
+        setup_database.clean_chunks(chunks, stats=stats), stats=stats
+    )
+
+    assert loaded == 1000
+    assert stats.stages["clean"]["rows"] == 1000
+    assert stats.stages["load"]["rows"] == 1000
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 1000
+
+
+def test_insert_chunk_rolls_back_failed_chunk(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    bad = setup_database.clean_data(raw_chunk(10))
+    bad.loc[bad.index[-1], "crime_type"] = None  # violates NOT NULL
+
+    with pytest.raises(sqlite3.IntegrityError):
+        setup_database.insert_chunk(conn, bad, batch_size=3)
+
+    assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 0
+    conn.close()
+
+
+def test_upsert_replaces_corrected_records_and_saves_watermark(db_path):
+    first = raw_chunk(3)
+    first.attrs["watermark"] = setup_database.chunk_watermark(first)
+    setup_database.load_database(setup_database.clean_chunks([first]))
+
+    corrected = raw_chunk(1, start=2)
+    corrected["primary_type"] = "ROBBERY"
+    corrected["date"] = "2025-09-23T08:00:00.000"
+    corrected.attrs["watermark"] = setup_database.chunk_watermark(
+        corrected, first.attrs["watermark"]
+    )
+    setup_database.load_database(setup_database.clean_chunks([corrected]))
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT case_number, crime_type FROM crimes ORDER BY case_number"
+        ).fetchall()
+    assert rows == [("JJ000000", "THEFT"), ("JJ000001", "THEFT"), ("JJ000002", "ROBBERY")]
+    assert setup_database.read_watermark() == ("2025-09-23T08:00:00.000", "JJ000002")
+
+
+def test_incremental_query_resumes_after_watermark():
+    where, order = setup_database.build_download_query(
+        since=("2025-09-22T14:30:00.000", "JJ000002")
+    )
+
+    assert "date > '2025-09-22T14:30:00.000'" in where
+    assert "case_number > 'JJ000002'" in where
+    assert order == "date ASC, case_number ASC"
+
+
+def test_watermark_quotes_are_escaped_in_the_query():
+    where, _ = setup_database.build_download_query(
+        since=("2025-09-22T14:30:00.000", "JJ' OR '1'='1")
+    )
+
+    assert where.endswith("case_number > 'JJ'' OR ''1''=''1')")
@@ -0,0 +1,105 @@
+"""
+Request limit tests: query deadlines on pooled connections, 503/413 answers
+"""
+
+import sqlite3
+
+import pytest
+
+import database
+from api import limits
+from database import deadline
+from database.pool import ConnectionPool
+from database.shards import write_shards
+
+ENDLESS = """
+    WITH RECURSIVE r(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM r)
+    SELECT COUNT(*) FROM r
+"""
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    # Check often, so even the small test queries reach a check
+    monkeypatch.setattr(deadline, "PROGRESS_OPS", 100)
+    return client
+
+
+def test_deadline_interrupts_a_runaway_query(db_path):
+    pool = ConnectionPool(db_path)
+    expiring, token = deadline.start_deadline(0.05)
+    conn = pool.connect()
+    with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+        conn.execute(ENDLESS).fetchone()
+    assert expiring.expired
+    conn.close()
+    deadline.end_deadline(token)
+
+    # Handed back without its handler: the next borrower runs unbudgeted
+    conn = pool.connect()
+    assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 3000
+    conn.close()
+    pool.close_all()
+
+
+@pytest.mark.parametrize(
+    "url,endpoint",
+    [
+        ("/api/crimes/all?limit=100", "get_all_crimes"),
+        # Blueprint routes answer 200 with empty data on errors
+        ("/api/analysis/temporal/weekly", "temporal.get_weekly_pattern"),
+    ],
+)
+def test_spent_budget_answers_503(client, monkeypatch, url, endpoint):
+    monkeypatch.setitem(limits.ENDPOINT_BUDGETS, endpoint, 0)
+    response = client.get(url)
+    assert response.status_code == 503
+    body = response.get_json()
+    assert (body["code"], body["endpoint"]) == ("query_timeout", endpoint)
+
+    # Other endpoints keep their own budgets
+    assert client.get("/api/crimes/types").status_code == 200
+
+
+def test_budget_reaches_shard_worker_threads(client, db_path, monkeypatch):
+    write_shards(db_path, database.shard_dir(), verbose=False)
+    url = "/api/crimes/all?start_date=2021-01-01&limit="
+    assert client.get(url + "2500").status_code == 200
+
+    # Another page, so the response cache cannot answer it
+    monkeypatch.setitem(limits.ENDPOINT_BUDGETS, "get_all_crimes", 0)
+    assert client.get(url + "2400").status_code == 503
+
+
+def test_oversized_requests_answer_413(client, monkeypatch):
+    monkeypatch.setitem(limits.SIZE_LIMITS, "limit", 1000)
+    response = client.get("/api/crimes/all?limit=10000000")
+    assert response.status_code == 413
+    assert response.get_json()["parameter"] == "limit"
+
+    response = client.get("/api/analysis/temporal/trends?days=100000")
+    assert response.status_code == 413
+    assert client.get("/api/crimes/all?limit=1000").status_code == 200
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/crimes/all?limit=-1",
+        "/api/crimes/all?limit=0&format=ndjson",
+        "/api/crimes/search?q=street&limit=-5",
+        "/api/analysis/temporal/trends?days=-1",
+    ],
+)
+def test_negative_sizes_answer_400(client, url):
+    # LIMIT -1 would read every row, past the 413 cap
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.get_json()["code"] == "invalid_parameter"
+
+
+def test_budgets_from_environment_format():
+    assert limits.parse_budgets(" get_all_crimes=2.5, temporal.x=1 ,") == {
+        "get_all_crimes": 2.5,
+        "temporal.x": 1.0,
+    }
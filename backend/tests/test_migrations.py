@@ -0,0 +1,106 @@
+"""
+Schema migration tests: legacy databases reach the canonical schema
+"""
+
+import sqlite3
+
+import pytest
+
+from database.migrations import SCHEMA_VERSION, migrate, schema_version, table_columns
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """A ChicagoCrimeDB-era table: primary_type, no year_month, duplicates"""
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.execute("""
+        CREATE TABLE crimes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_number TEXT,
+            date TEXT NOT NULL,
+            primary_type TEXT NOT NULL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            district TEXT,
+            season TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX idx_crimes_date ON crimes(date)")
+    conn.executemany(
+        "INSERT INTO crimes "
+        "(case_number, date, primary_type, latitude, longitude, district) "
+        "VALUES (?, ?, ?, 41.88, -87.63, '1')",
+        [
+            ("JJ1", "2025-09-21", "THEFT"),
+            ("JJ1", "2025-09-22 14:30:00", "BATTERY"),
+            ("JJ2", "2025-09-22 08:00:00", "THEFT"),
+        ],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, sql, params=()):
+    return " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def test_legacy_database_reaches_canonical_schema(legacy_db):
+    assert migrate(legacy_db, verbose=False) == SCHEMA_VERSION
+    assert schema_version(legacy_db) == SCHEMA_VERSION
+
+    columns = table_columns(legacy_db)
+    assert "primary_type" not in columns
+    assert {"crime_type", "year_month", "epoch", "hour", "weekday"} <= columns
+    assert "season" in columns  # extra columns are kept, never dropped
+
+    rows = legacy_db.execute(
+        "SELECT case_number, crime_type, year_month, hour, weekday "
+        "FROM crimes ORDER BY case_number"
+    ).fetchall()
+    # Newest copy of the duplicate survives
+    assert rows == [
+        ("JJ1", "BATTERY", "2025-09", 14, 0),
+        ("JJ2", "THEFT", "2025-09", 8, 0),
+    ]
+
+    indexes = {
+        row[0]
+        for row in legacy_db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    assert "idx_crimes_date" not in indexes
+    assert {"idx_date_type", "idx_district_date", "idx_year_month"} <= indexes
+
+
+def test_migrate_is_idempotent_and_analyzes(legacy_db):
+    migrate(legacy_db, verbose=False)
+    migrate(legacy_db, verbose=False)
+
+    assert schema_version(legacy_db) == SCHEMA_VERSION
+    stats = legacy_db.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+    assert stats > 0
+
+
+def test_endpoint_queries_are_index_only(legacy_db):
+    migrate(legacy_db, verbose=False)
+
+    monthly = query_plan(
+        legacy_db,
+        "SELECT year_month, COUNT(*) FROM crimes WHERE year_month IS NOT NULL "
+        "GROUP BY year_month ORDER BY year_month DESC LIMIT 12",
+    )
+    trends = query_plan(
+        legacy_db,
+        "SELECT substr(date, 1, 10), crime_type, COUNT(*) FROM crimes "
+        "WHERE date >= ? GROUP BY 1, crime_type",
+        ("2025-09-01",),
+    )
+    types = query_plan(
+        legacy_db, "SELECT crime_type, COUNT(*) FROM crimes GROUP BY crime_type"
+    )
+
+    assert "COVERING INDEX idx_year_month" in monthly
+    assert "COVERING INDEX" in trends
+    assert "COVERING INDEX idx_type_date" in types
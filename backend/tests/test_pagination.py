@@ -0,0 +1,136 @@
+"""
+Keyset pagination tests: cursors over /api/crimes/all, with and without shards
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+import database
+from api import limits
+from api.pagination import AFTER_CURSOR, ORDER_BY, decode_cursor, encode_cursor
+from database.shards import write_shards
+
+
+def all_pages(client, url):
+    """Feature ids of every page of url, and the number of pages"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page_url = url + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(page_url).get_json()
+        ids += [f["properties"]["id"] for f in body["features"]]
+        pages += 1
+        cursor = body["metadata"]["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def ordered_ids(db_path, where=""):
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT id FROM crimes WHERE latitude IS NOT NULL "
+            f"AND longitude IS NOT NULL {where}{ORDER_BY}"
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def test_cursor_round_trips():
+    token = encode_cursor("2025-07-04 12:30:00", 1234)
+    assert decode_cursor(token) == ("2025-07-04 12:30:00", 1234)
+    for bad in ["nope", encode_cursor("x", 1)[:-3], "WzEsMl0"]:  # last one: [1,2]
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_pages_cover_the_listing_once_in_order(client, db_path):
+    ids, pages = all_pages(client, "/api/crimes/all?limit=400")
+    assert ids == ordered_ids(db_path)
+    assert pages == len(ids) // 400 + 1
+
+    theft, _ = all_pages(client, "/api/crimes/all?crime_type=THEFT&limit=100")
+    assert theft == ordered_ids(db_path, "AND crime_type = 'THEFT'")
+
+
+def test_pages_read_from_shards_match(client, db_path):
+    expected, _ = all_pages(client, "/api/crimes/all?limit=500")
+    write_shards(db_path, database.shard_dir(), verbose=False)
+    assert database.get_shards() is not None
+    assert all_pages(client, "/api/crimes/all?limit=500&v=2")[0] == expected
+
+
+def test_pages_are_index_seeks(db_path):
+    conn = sqlite3.connect(db_path)
+    for where in ["", " AND crime_type = 'THEFT'"]:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM crimes WHERE 1=1"
+            f"{where}{AFTER_CURSOR}{ORDER_BY} LIMIT 100",
+            ["2025-01-01 00:00:00", 10],
+        ).fetchall()
+        assert plan[0][3].startswith("SEARCH crimes USING INDEX")
+    conn.close()
+
+
+def test_cursor_resumes_streamed_exports(client):
+    first = client.get("/api/crimes/all?limit=300").get_json()
+    cursor = first["metadata"]["next_cursor"]
+    paged = client.get(f"/api/crimes/all?limit=300&cursor={cursor}").get_json()
+
+    body = client.get(f"/api/crimes/all?limit=300&cursor={cursor}&format=ndjson")
+    *features, last = map(json.loads, body.get_data(as_text=True).splitlines())
+    assert [f["properties"]["id"] for f in features] == [
+        f["properties"]["id"] for f in paged["features"]
+    ]
+    assert last == {"next_cursor": paged["metadata"]["next_cursor"]}
+
+
+@pytest.mark.parametrize("query", ["&stream=1", "&format=ndjson", "&format=arrow"])
+def test_streamed_pages_hand_over_the_next_cursor(client, db_path, query):
+    if "arrow" in query:
+        pa = pytest.importorskip("pyarrow")
+    ids, cursor = [], None
+    while True:
+        url = "/api/crimes/all?limit=700" + query
+        body = client.get(url + (f"&cursor={cursor}" if cursor else "")).get_data()
+        if query == "&stream=1":
+            collection = json.loads(body)
+            assert collection["metadata"]["cursor"] == cursor
+            ids += [f["properties"]["id"] for f in collection["features"]]
+            cursor = collection["metadata"]["next_cursor"]
+        elif query == "&format=ndjson":
+            lines = [json.loads(line) for line in body.splitlines()]
+            ids += [line["properties"]["id"] for line in lines if "properties" in line]
+            cursor = lines[-1].get("next_cursor")
+        else:
+            read = pa.ipc.open_stream(body).read_next_batch_with_custom_metadata
+            cursor = None
+            for batch, metadata in iter(read, None):
+                ids += batch.column("id").to_pylist()
+                if metadata:
+                    cursor = metadata[b"next_cursor"].decode()
+        if cursor is None:
+            break
+    assert ids == ordered_ids(db_path)
+
+
+def test_flatgeobuf_pages_send_the_next_cursor_header(client):
+    pytest.importorskip("pyogrio")
+    first = client.get("/api/crimes/all?limit=300").get_json()["metadata"]
+    response = client.get("/api/crimes/all?limit=300&format=fgb")
+    assert response.headers["X-Next-Cursor"] == first["next_cursor"]
+
+
+def test_bad_cursor_answers_400(client):
+    response = client.get("/api/crimes/all?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("limit", [-2, 0])
+def test_limits_below_one_answer_400(client, monkeypatch, limit):
+    # Refused by the listing itself, not only by the request limits
+    monkeypatch.setattr(limits, "SIZE_MINIMUMS", {})
+    for query in ["", "&format=ndjson"]:
+        response = client.get(f"/api/crimes/all?limit={limit}{query}")
+        assert response.status_code == 400
+        assert "limit" in response.get_json()["error"]
@@ -0,0 +1,87 @@
+"""
+Connection pool tests: tuned, read-only connections recycled across threads
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+import database
+from database.migrations import migrate
+from database.pool import CACHE_SIZE_KB, ConnectionPool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "crimes_clean.db")
+    conn = sqlite3.connect(path)
+    migrate(conn, verbose=False)
+    conn.execute(
+        "INSERT INTO crimes (case_number, date, crime_type, latitude, longitude) "
+        "VALUES ('JJ1', '2025-09-22 14:30:00', 'THEFT', 41.88, -87.63)"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_connections_are_tuned_and_read_only(db_path):
+    pool = ConnectionPool(db_path)
+    conn = pool.connect()
+
+    pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]  # noqa: E731
+    assert pragma("journal_mode") == "wal"
+    assert pragma("query_only") == 1
+    assert pragma("temp_store") == 2  # MEMORY
+    assert pragma("cache_size") == -CACHE_SIZE_KB
+    assert pragma("mmap_size") > 0
+
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM crimes")
+    row = conn.execute("SELECT crime_type FROM crimes").fetchone()
+    assert row["crime_type"] == "THEFT"
+    conn.close()
+
+
+def test_closed_connections_are_reused_across_threads(db_path):
+    pool = ConnectionPool(db_path)
+    first = pool.connect()
+    first.close()
+
+    seen = []
+
+    def request():
+        conn = pool.connect()
+        seen.append(conn)
+        conn.execute("SELECT COUNT(*) FROM crimes").fetchone()
+        conn.close()
+
+    worker = threading.Thread(target=request)
+    worker.start()
+    worker.join()
+
+    assert seen == [first]
+    assert pool.opened == 1
+
+
+def test_concurrent_requests_get_their_own_connection(db_path):
+    pool = ConnectionPool(db_path)
+    a, b = pool.connect(), pool.connect()
+
+    assert a is not b
+    a.close()
+    b.close()
+    assert pool.connect() in (a, b)
+
+
+def test_get_db_serves_from_the_shared_pool(db_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.DB_PATH)
+    database.set_db_path(db_path)
+
+    conn = database.get_db()
+    conn.close()
+    assert database.get_db() is conn
+
+    database.set_db_path(db_path + ".missing")
+    assert database.get_db() is None
@@ -0,0 +1,58 @@
+"""
+ChicagoCrimeDB tests: records inserted outside the ingest pipeline
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import setup_database
+from database.schema import ChicagoCrimeDB
+from utils.data_cleaner import ChicagoCrimeDataCleaner
+from utils.grid import GRID_RESOLUTIONS, cell_keys
+
+
+@pytest.fixture
+def inserted(tmp_path):
+    """A frame cleaned for analysis, inserted through ChicagoCrimeDB"""
+    rows = setup_database.SyntheticCrimeGenerator(21).rows(0, 500)
+    df = ChicagoCrimeDataCleaner().clean_dataset(rows)
+    db = ChicagoCrimeDB(str(tmp_path / "crimes.db"))
+    db.create_tables()
+    db.insert_crimes(df)
+    db.conn.close()
+    conn = sqlite3.connect(db.db_path)
+    yield df, conn
+    conn.close()
+
+
+def test_inserted_crimes_carry_grid_cells(inserted):
+    df, conn = inserted
+    rows = conn.execute(
+        "SELECT latitude, longitude, cell_coarse, cell_medium, cell_fine "
+        "FROM crimes ORDER BY id"
+    ).fetchall()
+    assert len(rows) == len(df)
+    latitude, longitude, *cells = zip(*rows)
+    for name, stored in zip(GRID_RESOLUTIONS, cells):
+        size = GRID_RESOLUTIONS[name]
+        assert list(stored) == cell_keys(latitude, longitude, size).tolist()
+
+
+def test_inserted_crimes_carry_time_buckets(inserted):
+    df, conn = inserted
+    stored = pd.read_sql_query(
+        "SELECT date, epoch, hour, weekday, iso_week FROM crimes ORDER BY id", conn
+    )
+    assert stored[["epoch", "hour", "weekday", "iso_week"]].notna().all().all()
+
+    dates = pd.to_datetime(stored["date"])
+    iso = dates.dt.isocalendar()
+    assert stored["epoch"].tolist() == (dates.astype("int64") // 10**9).tolist()
+    assert stored["hour"].tolist() == dates.dt.hour.tolist()
+    assert stored["weekday"].tolist() == dates.dt.weekday.tolist()
+    assert stored["iso_week"].tolist() == (iso["year"] * 100 + iso["week"]).tolist()
+
+    # The summaries built on them count the inserted rows
+    assert conn.execute("SELECT SUM(n) FROM crime_counts").fetchone()[0] == len(df)
@@ -0,0 +1,93 @@
+"""
+Full-text search tests: FTS5 index synced at ingest, /crimes/search
+"""
+
+import sqlite3
+
+import setup_database
+from database.search import quote_terms, search_crimes
+
+
+def like(conn, word):
+    """Ids whose description contains `word`, by brute force"""
+    rows = conn.execute(
+        "SELECT id FROM crimes WHERE ' ' || upper(description) || ' ' LIKE ?",
+        (f"% {word.upper()} %",),
+    )
+    return {row[0] for row in rows}
+
+
+def test_search_matches_a_like_scan(db_path):
+    conn = sqlite3.connect(db_path)
+    word = conn.execute(
+        "SELECT description FROM crimes WHERE description NOT LIKE '% %' LIMIT 1"
+    ).fetchone()[0]
+
+    found = search_crimes(conn, word.lower(), limit=10000)
+    assert set(found["id"]) == like(conn, word)
+    assert found["rank"].is_monotonic_increasing
+    conn.close()
+
+
+def test_index_follows_upserts_and_deletes(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    crime_id, case_number = conn.execute(
+        "SELECT id, case_number FROM crimes LIMIT 1"
+    ).fetchone()
+
+    moved = setup_database.clean_data(
+        setup_database.SyntheticCrimeGenerator(10).rows(0, 1)
+    )
+    moved["case_number"] = case_number
+    moved["description"] = "ZEPPELIN HANGAR"
+    setup_database.insert_chunk(conn, moved)
+    assert list(search_crimes(conn, "zeppelin")["id"]) == [crime_id]
+
+    conn.execute("DELETE FROM crimes WHERE id = ?", (crime_id,))
+    assert search_crimes(conn, "zeppelin").empty
+    # The 'delete' commands left the index consistent with crimes
+    conn.execute("INSERT INTO crimes_fts (crimes_fts) VALUES ('integrity-check')")
+    conn.close()
+
+
+def test_invalid_syntax_falls_back_to_literal_words(db_path):
+    assert quote_terms('lot/garage "x') == '"lot/garage" """x"'
+
+    conn = sqlite3.connect(db_path)
+    word = conn.execute("SELECT description FROM crimes LIMIT 1").fetchone()[0]
+    assert not search_crimes(conn, word.split()[0] + " (").empty
+    conn.close()
+
+
+def test_search_endpoint_applies_type_and_date_filters(client, db_path):
+    conn = sqlite3.connect(db_path)
+    description, crime_type = conn.execute(
+        "SELECT description, crime_type FROM crimes "
+        "GROUP BY description, crime_type ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    word = description.split()[0]
+    expected = {
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM crimes WHERE crime_type = ? AND date >= '2025-01-01' "
+            "AND date <= '2025-06-30 23:59:59'",
+            (crime_type,),
+        )
+    } & like(conn, word)
+    conn.close()
+
+    response = client.get(
+        f"/api/crimes/search?q={word}&crime_type={crime_type}"
+        "&start_date=2025-01-01&end_date=2025-06-30&limit=10000"
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert expected
+    assert {f["properties"]["id"] for f in body["features"]} == expected
+    assert body["metadata"]["query"] == word
+
+
+def test_search_requires_text(client):
+    response = client.get("/api/crimes/search?q=%20")
+    assert response.status_code == 400
+    assert "q=" in response.get_json()["error"]
@@ -0,0 +1,96 @@
+"""
+Year shard tests: written from the main database, pruned and merged on read
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+import database
+import setup_database
+from database.shards import ShardRouter, read_manifest, shard_path, write_shards
+
+RECENT = "SELECT id, date FROM crimes WHERE date >= ? ORDER BY date DESC"
+
+
+def test_every_year_gets_a_shard_and_only_the_newest_is_live(db_path, tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    shards = write_shards(db_path, shard_dir, verbose=False)
+
+    years = sorted(shards)
+    assert years == [str(y) for y in range(2020, 2026)]
+    assert [shards[y]["sealed"] for y in years] == [True] * 5 + [False]
+    assert sum(entry["rows"] for entry in shards.values()) == 3000
+    assert read_manifest(shard_dir) == shards
+
+    sealed = sqlite3.connect(shard_path(shard_dir, "2021"))
+    assert sealed.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert sealed.execute("SELECT MIN(date) FROM crimes").fetchone()[0] >= "2021"
+    sealed.close()
+
+
+def test_router_prunes_years_and_merges_in_date_order(db_path, tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    write_shards(db_path, shard_dir, verbose=False)
+    router = ShardRouter(shard_dir, workers=3)
+
+    assert router.prune(start="2024-03-01") == ["2025", "2024"]
+    assert router.prune(start="2021-06-01", end="2022-01-31") == ["2022", "2021"]
+
+    with sqlite3.connect(db_path) as conn:
+        expected = pd.read_sql_query(RECENT, conn, params=["2023-11-01"])
+    every = router.read_frame(RECENT, ["2023-11-01"], start="2023-11-01")
+    pd.testing.assert_frame_equal(every, expected)
+
+    # A page spanning years is filled from the newest shards onwards
+    page = router.read_frame(RECENT, ["2023-11-01"], start="2023-11-01", limit=900)
+    pd.testing.assert_frame_equal(page, expected.head(900))
+
+    # Past years are read without locking; the live year is not
+    router.connect("2021").close()
+    router.connect("2025").close()
+    assert router._pools["2021"][1].immutable
+    assert not router._pools["2025"][1].immutable
+    router.close()
+
+
+def test_incremental_refresh_touches_only_the_live_shard(db_path, tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    write_shards(db_path, shard_dir, verbose=False)
+    sealed_before = os.stat(shard_path(shard_dir, "2022")).st_mtime_ns
+
+    generator = setup_database.SyntheticCrimeGenerator(10)
+    new = setup_database.clean_data(generator.rows(0, 1))
+    new["case_number"] = "ZZ000001"
+    new["date"] = "2025-09-30 22:00:00"
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    days = setup_database.insert_chunk(conn, new)
+    conn.close()
+
+    shards = write_shards(db_path, shard_dir, days=days, verbose=False)
+
+    assert shards["2025"]["max_date"] == "2025-09-30 22:00:00"
+    assert sum(entry["rows"] for entry in shards.values()) == 3001
+    assert os.stat(shard_path(shard_dir, "2022")).st_mtime_ns == sealed_before
+
+
+def test_crimes_endpoint_reads_from_shards(client, db_path):
+    url = "/api/crimes/all?limit=300&start_date=2024-06-01&end_date=2025-01-31"
+    single = client.get(url).get_json()["features"]
+
+    write_shards(db_path, database.shard_dir(), verbose=False)
+    sharded = client.get(url).get_json()["features"]
+
+    assert database.get_shards() is not None
+    assert [f["properties"]["id"] for f in sharded] == [
+        f["properties"]["id"] for f in single
+    ]
+    assert len(sharded) == 300
+
+
+def test_dates_past_every_shard_return_an_empty_collection(client, db_path):
+    write_shards(db_path, database.shard_dir(), verbose=False)
+    response = client.get("/api/crimes/all?start_date=2030-01-01")
+    assert response.status_code == 200
+    assert response.get_json()["features"] == []
@@ -0,0 +1,109 @@
+"""
+Spatial index tests: R*Tree synced at ingest, bbox viewports on /crimes/all
+"""
+
+import sqlite3
+
+import pytest
+
+import database
+import setup_database
+from api.cache import response_cache
+from database.shards import write_shards
+
+VIEWPORT = (-87.70, 41.85, -87.60, 41.92)
+
+
+def inside(db_path, bbox, limit):
+    """Newest crimes inside bbox, by brute force"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT id FROM crimes WHERE longitude BETWEEN ? AND ? "
+            "AND latitude BETWEEN ? AND ? ORDER BY date DESC, id LIMIT ?",
+            (min_lon, max_lon, min_lat, max_lat, limit),
+        )
+        return [row[0] for row in rows]
+
+
+def viewport_ids(client, bbox, limit=400):
+    url = f"/api/crimes/all?limit={limit}&bbox={','.join(map(str, bbox))}"
+    response = client.get(url)
+    assert response.status_code == 200
+    return [f["properties"]["id"] for f in response.get_json()["features"]]
+
+
+def test_rtree_follows_inserts_upserts_and_deletes(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    count = lambda sql: conn.execute(sql).fetchone()[0]  # noqa: E731
+    assert count("SELECT COUNT(*) FROM crimes_rtree") == 3000
+
+    crime_id, case_number = conn.execute(
+        "SELECT id, case_number FROM crimes LIMIT 1"
+    ).fetchone()
+    moved = setup_database.clean_data(
+        setup_database.SyntheticCrimeGenerator(10).rows(0, 1)
+    )
+    moved["case_number"] = case_number
+    moved["latitude"], moved["longitude"] = 41.9999, -87.8888
+    setup_database.insert_chunk(conn, moved)
+
+    box = conn.execute(
+        "SELECT min_lon, min_lat FROM crimes_rtree WHERE id = ?", (crime_id,)
+    ).fetchone()
+    assert box == pytest.approx((-87.8888, 41.9999), abs=1e-4)
+
+    conn.execute("DELETE FROM crimes WHERE id = ?", (crime_id,))
+    assert count("SELECT COUNT(*) FROM crimes_rtree") == 2999
+    conn.close()
+
+
+def test_interrupted_full_load_is_repaired_by_the_next_run(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # What a bulk load leaves behind if it dies before its final rebuild
+    setup_database.drop_sync_triggers(conn)
+    conn.execute("DELETE FROM crimes_rtree WHERE id % 2 = 0")
+    conn.execute("INSERT INTO ingest_state VALUES ('rebuild_pending', '1')")
+    conn.close()
+
+    setup_database.load_database([], bulk=False)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM crimes_rtree").fetchone()[0] == 3000
+    triggers = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchone()[0]
+    pending = conn.execute(
+        "SELECT COUNT(*) FROM ingest_state WHERE key = 'rebuild_pending'"
+    ).fetchone()[0]
+    assert (triggers, pending) == (6, 0)  # R*Tree and FTS triggers
+    conn.close()
+
+
+def test_bbox_returns_only_visible_crimes(client, db_path, monkeypatch):
+    import api.main
+
+    expected = inside(db_path, VIEWPORT, 400)
+    assert 0 < len(expected) <= 400
+
+    assert sorted(viewport_ids(client, VIEWPORT)) == sorted(expected)
+
+    # A crowded viewport is scanned by date instead; same answer
+    monkeypatch.setattr(api.main, "RTREE_MAX_CANDIDATES", 0)
+    response_cache.clear()
+    assert sorted(viewport_ids(client, VIEWPORT)) == sorted(expected)
+
+
+def test_bbox_through_year_shards(client, db_path):
+    write_shards(db_path, database.shard_dir(), verbose=False)
+    assert database.get_shards() is not None
+
+    expected = inside(db_path, VIEWPORT, 150)
+    assert sorted(viewport_ids(client, VIEWPORT, limit=150)) == sorted(expected)
+
+
+@pytest.mark.parametrize("bbox", ["1,2,3", "a,b,c,d", "-87.6,41.9,-87.7,41.8"])
+def test_invalid_bbox_is_rejected(client, bbox):
+    response = client.get(f"/api/crimes/all?bbox={bbox}")
+    assert response.status_code == 400
+    assert "bbox" in response.get_json()["error"]
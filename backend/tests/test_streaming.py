@@ -0,0 +1,102 @@
+"""
+Streaming export tests: fetchmany batches, NDJSON and chunked GeoJSON bodies
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+import database
+from api import limits
+from database import deadline, streaming
+from database.shards import write_shards
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    # Check often, so even the small test queries reach a check
+    monkeypatch.setattr(deadline, "PROGRESS_OPS", 100)
+    return client
+
+
+def test_frames_come_in_bounded_batches(db_path):
+    conn = sqlite3.connect(db_path)
+    frames = list(
+        streaming.iter_frames(
+            conn, "SELECT id FROM crimes ORDER BY id", batch_rows=1000
+        )
+    )
+    conn.close()
+
+    # A small first batch, so a response can start before the rest is read
+    assert [len(f) for f in frames] == [500, 1000, 1000, 500]
+    ids = [i for f in frames for i in f["id"].tolist()]
+    assert ids == sorted(ids) and len(set(ids)) == 3000
+
+
+def test_ndjson_lines_match_the_collection(client):
+    url = "/api/crimes/all?crime_type=THEFT&limit=2000"
+    features = client.get(url).get_json()["features"]
+
+    response = client.get(url + "&format=ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.is_streamed
+    # Streamed bodies are never stored by the response cache
+    assert response.headers["X-Cache"] == "MISS"
+    assert "ETag" not in response.headers
+    lines = response.get_data().decode().splitlines()
+    assert [json.loads(line) for line in lines] == features
+
+
+def test_streamed_collection_is_valid_geojson(client):
+    url = "/api/crimes/all?limit=2500&start_date=2020-01-01"
+    expected = client.get(url).get_json()
+
+    body = client.get(url + "&stream=1").get_json()
+    assert body["type"] == "FeatureCollection"
+    assert body["features"] == expected["features"]
+    assert body["metadata"]["count"] == expected["metadata"]["count"]
+    assert body["metadata"]["streamed"] is True
+    assert "error" not in body["metadata"]
+
+
+def test_streams_are_not_held_to_the_page_cap(client, monkeypatch):
+    monkeypatch.setitem(limits.SIZE_LIMITS, "limit", 100)
+    assert client.get("/api/crimes/all?limit=5000").status_code == 413
+
+    response = client.get("/api/crimes/all?limit=5000&format=ndjson")
+    assert response.status_code == 200
+    # Every located crime; the synthetic data leaves a few without coordinates
+    lines = response.get_data().splitlines()
+    assert 2900 <= len(lines) <= 3000
+
+
+def test_stream_reads_the_shards_newest_first(client, db_path):
+    write_shards(db_path, database.shard_dir(), verbose=False)
+    lines = client.get("/api/crimes/all?limit=2200&format=ndjson").get_data()
+    *features, last = map(json.loads, lines.splitlines())
+    # A page of the listing: the last line hands over the next one's cursor
+    assert set(last) == {"next_cursor"}
+    dates = [feature["properties"]["date"] for feature in features]
+    assert len(dates) <= 2200
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_unknown_format_answers_400(client):
+    assert client.get("/api/crimes/all?format=csv").status_code == 400
+
+
+def test_timeout_mid_stream_is_reported_in_band(client, monkeypatch):
+    monkeypatch.setattr(limits, "STREAM_BUDGET_S", 0)
+
+    body = client.get("/api/crimes/all?limit=3000&stream=1").get_json()
+    # The 200 status is already sent; the metadata says what happened
+    assert body["metadata"]["code"] == "query_timeout"
+    assert body["metadata"]["truncated"] is True
+
+    lines = client.get("/api/crimes/all?limit=3000&format=ndjson").get_data()
+    last = json.loads(lines.splitlines()[-1])
+    assert last["code"] == "query_timeout"
+    assert last["count"] == len(lines.splitlines()) - 1
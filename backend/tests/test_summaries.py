@@ -0,0 +1,125 @@
+"""
+Summary table tests: maintained by full and incremental loads, read by the API
+"""
+
+import sqlite3
+
+import pytest
+
+import setup_database
+
+CUBE_FROM_CRIMES = """
+    SELECT substr(date, 1, 10), hour, crime_type, district, beat, COUNT(*)
+    FROM crimes
+    GROUP BY 1, 2, 3, 4, 5
+    ORDER BY 1, 2, 3, 4, 5
+"""
+CUBE = """
+    SELECT day, hour, crime_type, district, beat, n
+    FROM crime_counts
+    ORDER BY 1, 2, 3, 4, 5
+"""
+
+
+# Every test loads its own crimes into an empty database
+pytestmark = pytest.mark.parametrize("db_path", [0], indirect=True)
+
+
+def synthetic_load(limit, bulk):
+    chunks = setup_database.synthetic_chicago_data(limit=limit, chunksize=700)
+    return setup_database.load_database(
+        setup_database.clean_chunks(chunks, workers=1), bulk=bulk
+    )
+
+
+def assert_summaries_match_crimes(conn):
+    assert conn.execute(CUBE).fetchall() == conn.execute(CUBE_FROM_CRIMES).fetchall()
+
+    total = conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0]
+    for table in ("daily_type_hour", "daily_district", "monthly_type"):
+        assert conn.execute(f"SELECT SUM(n) FROM {table}").fetchone()[0] == total
+
+    monthly = conn.execute(
+        "SELECT year_month, crime_type, n FROM monthly_type ORDER BY 1, 2"
+    ).fetchall()
+    assert monthly == conn.execute(
+        "SELECT substr(date, 1, 7), crime_type, COUNT(*) FROM crimes "
+        "GROUP BY 1, 2 ORDER BY 1, 2"
+    ).fetchall()
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_full_and_incremental_loads_maintain_summaries(db_path, bulk):
+    synthetic_load(3000, bulk=bulk)
+
+    with sqlite3.connect(db_path) as conn:
+        assert_summaries_match_crimes(conn)
+        groups = conn.execute("SELECT COUNT(*) FROM monthly_type").fetchone()[0]
+        assert groups < 3000
+
+
+def test_upsert_moving_a_crime_refreshes_both_days(db_path):
+    synthetic_load(2000, bulk=True)
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    case_number, day = conn.execute(
+        "SELECT case_number, substr(date, 1, 10) FROM crimes ORDER BY date LIMIT 1"
+    ).fetchone()
+    moved = setup_database.clean_data(
+        setup_database.SyntheticCrimeGenerator(2000).rows(0, 1)
+    )
+    moved["case_number"] = case_number
+    moved["crime_type"] = "ARSON"
+    moved["date"] = "2025-09-30 23:00:00"
+    moved["year_month"] = "2025-09"
+    moved["hour"] = 23
+
+    setup_database.insert_chunk(conn, moved)
+
+    old_day = conn.execute(
+        "SELECT COALESCE(SUM(n), 0) FROM daily_type_hour WHERE day = ?", (day,)
+    ).fetchone()[0]
+    arson = conn.execute(
+        "SELECT n FROM daily_type_hour WHERE day = '2025-09-30' "
+        "AND crime_type = 'ARSON' AND hour = 23"
+    ).fetchone()
+    crimes_on_old_day = conn.execute(
+        "SELECT COUNT(*) FROM crimes WHERE substr(date, 1, 10) = ?", (day,)
+    ).fetchone()[0]
+    assert arson == (1,)
+    assert old_day == crimes_on_old_day
+    assert_summaries_match_crimes(conn)
+    conn.close()
+
+
+def test_rerun_upserting_many_crimes_per_day(db_path):
+    # Same seed: every record comes back as an upsert, many on a shared day
+    synthetic_load(2000, bulk=True)
+    synthetic_load(2000, bulk=False)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 2000
+        assert_summaries_match_crimes(conn)
+
+
+def test_dashboard_endpoints_read_the_summaries(client, db_path):
+    synthetic_load(2000, bulk=True)
+    with sqlite3.connect(db_path) as conn:
+        by_type = dict(
+            conn.execute("SELECT crime_type, COUNT(*) FROM crimes GROUP BY 1")
+        )
+        # Endpoints must not need the raw rows any more
+        conn.execute("DELETE FROM crimes")
+
+    types = client.get("/api/crimes/types").get_json()["crime_types"]
+    assert {t["crime_type"]: t["count"] for t in types} == by_type
+
+    monthly = client.get("/api/stats/monthly").get_json()
+    hourly = client.get("/api/analysis/temporal/hourly?days=3650").get_json()
+    risk = client.get("/api/forecast/risk-assessment").get_json()
+    trends = client.get("/api/analysis/temporal/trends?days=30").get_json()
+
+    assert sum(m["crime_count"] for m in monthly["monthly_trends"]) > 0
+    assert hourly["total_crimes"] == sum(by_type.values())
+    assert risk["high_risk_areas"] and risk["total_crimes_analyzed"] > 0
+    assert trends["trends"]
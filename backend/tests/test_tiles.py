@@ -0,0 +1,241 @@
+"""
+Vector tile tests: MVT encoding, the pre-rendered pyramid and /api/tiles
+"""
+
+import gzip
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+import database
+from database import tiles
+from database.tiles import bin_points, tile_path, write_tiles
+from utils import mvt
+
+MAX_ZOOM = 12
+
+
+def read_varint(data, i):
+    value = shift = 0
+    while True:
+        byte = data[i]
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        i += 1
+        if byte < 0x80:
+            return value, i
+
+
+def read_fields(data):
+    """[(field number, int or bytes)] of one protobuf message"""
+    fields, i = [], 0
+    while i < len(data):
+        key, i = read_varint(data, i)
+        number, wire = key >> 3, key & 7
+        if wire == 0:
+            value, i = read_varint(data, i)
+        elif wire == 1:
+            value, i = data[i : i + 8], i + 8
+        else:
+            length, i = read_varint(data, i)
+            value, i = data[i : i + length], i + length
+        fields.append((number, value))
+    return fields
+
+
+def packed(data):
+    values, i = [], 0
+    while i < len(data):
+        value, i = read_varint(data, i)
+        values.append(value)
+    return values
+
+
+def decode_tile(data):
+    """{layer name: [(x, y, properties)]} of an MVT with point layers"""
+    layers = {}
+    for _, layer in read_fields(data):
+        fields = read_fields(layer)
+        name = next(v for n, v in fields if n == 1).decode()
+        keys = [v.decode() for n, v in fields if n == 3]
+        values = []
+        for _, value in (f for f in fields if f[0] == 4):
+            number, raw = read_fields(value)[0]
+            values.append(raw.decode() if number == 1 else raw)
+        points = []
+        for _, feature in (f for f in fields if f[0] == 2):
+            parts = dict(read_fields(feature))
+            tags = packed(parts[2])
+            command, x, y = packed(parts[4])
+            assert (command, parts[3]) == (mvt.MOVE_TO_ONE, mvt.POINT)
+            properties = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+            points.append((x >> 1, y >> 1, properties))
+        layers[name] = points
+    return layers
+
+
+@pytest.fixture
+def db_path(db_path):
+    write_tiles(db_path, max_zoom=MAX_ZOOM, verbose=False)
+    return db_path
+
+
+def located(db_path, where="", params=()):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM crimes WHERE latitude IS NOT NULL "
+            f"AND longitude IS NOT NULL {where}",
+            params,
+        ).fetchone()[0]
+
+
+def tile_counts(client, z, x, y, query=""):
+    response = client.get(f"/api/tiles/{z}/{x}/{y}.mvt{query}")
+    if response.status_code == 204:
+        return []
+    return [p["count"] for _, _, p in decode_tile(response.get_data())["crimes"]]
+
+
+def test_point_layer_round_trips():
+    layer = mvt.point_layer(
+        "crimes", [0, 4095], [17, 300], {"count": [3, 1], "crime_type": ["A", None]}
+    )
+    assert decode_tile(layer) == {
+        "crimes": [(0, 17, {"count": 3, "crime_type": "A"}), (4095, 300, {"count": 1})]
+    }
+
+
+def test_points_bin_into_slippy_map_tiles():
+    # The Loop is tile 262/380 at zoom 10
+    tile_x, tile_y, cell = bin_points([41.8781], [-87.6298], 10)
+    assert (tile_x[0], tile_y[0]) == (262, 380)
+    assert 0 <= cell[0] < 64 * 64
+
+
+def test_key_counts_merge_across_batches(monkeypatch):
+    monkeypatch.setattr(tiles, "BIN_BATCH_ROWS", 10)
+    keys = np.random.default_rng(3).integers(0, 50, 1000)
+    counter = tiles.KeyCounter()
+    for batch in np.array_split(keys, 37):
+        counter.add(batch)
+    expected = np.unique(keys, return_counts=True)
+    assert [a.tolist() for a in counter.totals()] == [a.tolist() for a in expected]
+
+
+def test_bands_hold_whole_rows_of_tiles():
+    zoom, side = 3, 8 * tiles.cells_per_side(3)
+    rng = np.random.default_rng(5)
+    cells = np.sort(rng.integers(0, side * side, 2000))
+    keys = np.unique(cells << tiles.TYPE_BITS)
+    counts = np.ones(len(keys), dtype=np.int64)
+
+    bands = list(tiles.tile_bands(keys, counts, zoom, size=100))
+    assert np.concatenate([k for k, _ in bands]).tolist() == keys.tolist()
+    rows = [set((k >> tiles.TYPE_BITS) // side // 64) for k, _ in bands]
+    assert all(a.isdisjoint(b) for a, b in zip(rows, rows[1:]))
+
+
+def test_pyramid_holds_no_month_variants(client, db_path):
+    conn = database.get_tiles().pool.connect()
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(tile_variants)")]
+    per_tile = conn.execute(
+        "SELECT MAX(n) FROM (SELECT COUNT(*) AS n FROM tile_variants "
+        "GROUP BY zoom_level, tile_column, tile_row)"
+    ).fetchone()[0]
+    conn.close()
+    types = client.get("/api/tiles/metadata").get_json()["crime_types"]
+    assert "month" not in columns
+    assert per_tile <= 1 + len(types)
+
+
+def test_every_zoom_counts_every_located_crime(client, db_path):
+    total = located(db_path)
+    # Chicago is one tile at zoom 0 and a handful at zoom 10
+    assert sum(tile_counts(client, 0, 0, 0)) == total
+
+    store = database.get_tiles()
+    conn = store.pool.connect()
+    rows = conn.execute(
+        "SELECT tile_column, tile_row FROM tiles WHERE zoom_level = 10"
+    ).fetchall()
+    conn.close()
+    counts = [sum(tile_counts(client, 10, x, 2**10 - 1 - row)) for x, row in rows]
+    assert sum(counts) == total
+
+
+def test_filters_pick_their_own_variant(client, db_path):
+    assert sum(tile_counts(client, 0, 0, 0, "?crime_type=THEFT")) == located(
+        db_path, "AND crime_type = ?", ["THEFT"]
+    )
+    month = client.get("/api/tiles/metadata").get_json()["months"][-1]
+    assert sum(tile_counts(client, 0, 0, 0, f"?month={month}")) == located(
+        db_path, "AND year_month = ?", [month]
+    )
+
+    response = client.get(f"/api/tiles/0/0/0.mvt?crime_type=THEFT&month={month}")
+    features = decode_tile(response.get_data())["crimes"]
+    assert {p["crime_type"] for _, _, p in features} == {"THEFT"}
+    assert sum(p["count"] for _, _, p in features) == located(
+        db_path, "AND crime_type = ? AND year_month = ?", ["THEFT", month]
+    )
+
+    # Month tiles are cut per request at every zoom
+    x, y = 262, 380
+    counts = tile_counts(client, 10, x, y, f"?month={month}")
+    south, north, west, east = tiles.tile_bounds(10, x, y)
+    assert 0 < sum(counts) == located(
+        db_path,
+        "AND year_month = ? AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+        [month, south, north, west, east],
+    )
+
+
+def test_tiles_are_gzipped_when_the_client_accepts_it(client):
+    plain = client.get("/api/tiles/0/0/0.mvt")
+    assert plain.mimetype == "application/vnd.mapbox-vector-tile"
+    assert "Content-Encoding" not in plain.headers
+
+    zipped = client.get("/api/tiles/0/0/0.mvt", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+
+    # Validated like every GET: a revalidation costs no lookup
+    again = client.get(
+        "/api/tiles/0/0/0.mvt", headers={"If-None-Match": plain.headers["ETag"]}
+    )
+    assert again.status_code == 304
+    assert again.headers["Vary"] == "Accept-Encoding"
+
+    # Each coding is its own representation, with its own strong ETag
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+    assert zipped.headers["Vary"] == plain.headers["Vary"] == "Accept-Encoding"
+    again = client.get(
+        "/api/tiles/0/0/0.mvt",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]},
+    )
+    assert (again.status_code, again.headers["ETag"]) == (304, zipped.headers["ETag"])
+    for other, coding in ((plain, "gzip"), (zipped, "identity")):
+        headers = {"Accept-Encoding": coding, "If-None-Match": other.headers["ETag"]}
+        response = client.get("/api/tiles/0/0/0.mvt", headers=headers)
+        assert response.status_code == 200
+
+
+def test_edge_cases(client):
+    assert client.get("/api/tiles/0/0/0.mvt?crime_type=NONE").status_code == 204
+    assert client.get("/api/tiles/0/0/0.mvt?month=July").status_code == 400
+    assert client.get("/api/tiles/1/2/0.mvt").status_code == 400
+    assert client.get(f"/api/tiles/{MAX_ZOOM + 1}/0/0.mvt").status_code == 404
+
+    tilejson = client.get("/api/tiles/metadata").get_json()
+    assert (tilejson["minzoom"], tilejson["maxzoom"]) == (0, MAX_ZOOM)
+    assert tilejson["tiles"][0].endswith("/api/tiles/{z}/{x}/{y}.mvt")
+    assert "THEFT" in tilejson["crime_types"]
+
+
+def test_missing_pyramid_answers_404(client, db_path):
+    database.get_tiles().close()
+    os.remove(tile_path(db_path))
+    assert database.get_tiles() is None
+    assert client.get("/api/tiles/0/0/0.mvt").status_code == 404
@@ -0,0 +1,50 @@
+"""
+Temporal analyzer tests on a loaded, compact-dtype crimes frame
+"""
+
+import importlib.util
+import sys
+from unittest import mock
+
+import pytest
+
+from utils.data_loader import load_crimes
+from test_data_loader import make_db
+
+# The analyses never plot; stand in for the plotting libraries where they
+# are not installed, for the import only
+PLOTTING = ("matplotlib", "matplotlib.pyplot", "seaborn")
+missing = {
+    name: mock.MagicMock()
+    for name in PLOTTING
+    if importlib.util.find_spec(name.split(".")[0]) is None
+}
+with mock.patch.dict(sys.modules, missing):
+    from analysis.time_series_analyzer import ChicagoTimeSeriesAnalyzer
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    path = str(tmp_path / "crimes.db")
+    make_db(path, n=560)
+    return ChicagoTimeSeriesAnalyzer(load_crimes(db_path=path, derived=True))
+
+
+def test_patterns_account_for_every_crime(analyzer):
+    daily_crimes, daily_stats = analyzer.analyze_daily_trends()
+    weekly, weekend = analyzer.analyze_weekly_patterns()
+    hourly, hourly_stats = analyzer.analyze_hourly_patterns()
+    monthly, seasonal, by_year, seasonal_stats = analyzer.analyze_seasonal_patterns()
+
+    assert daily_crimes.sum() == weekly.sum() == hourly.sum() == monthly.sum() == 560
+    assert daily_stats["mean_daily_crimes"] == 20
+    assert list(weekly.index)[0] == "Monday"
+    assert hourly_stats["peak_hour"] == 0
+    assert seasonal_stats["peak_month"] == 9
+    assert list(by_year.columns) == [2025]
+
+
+def test_insights_summarize_the_patterns(analyzer):
+    insights = analyzer.generate_temporal_insights()
+    assert insights["overview"]["total_crimes"] == 560
+    assert insights["seasonal_insights"]["most_active_season"] == "Fall"
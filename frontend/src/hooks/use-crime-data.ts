@@ -1,4 +1,5 @@
 import { useState, useEffect, useCallback } from 'react';
+import { fetchJson } from '@/lib/conditional-fetch';
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
@@ -94,19 +95,12 @@ export const useCrimeData = () => {
   // Check backend connection
   const checkConnection = useCallback(async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/health`, {
-        method: 'GET',
-        headers: { 'Content-Type': 'application/json' },
-      });
-      
-      if (response.ok) {
-        const data = await response.json();
-        setIsConnected(true);
-        setTotalCrimes(data.total_crimes || 0);
-        console.log('✓ Backend connected:', data.total_crimes, 'crimes');
-        return true;
-      }
-      return false;
+      // Revalidated with the last ETag: an unchanged backend answers 304
+      const data = await fetchJson<{ total_crimes: number }>(`${API_BASE_URL}/health`);
+      setIsConnected(true);
+      setTotalCrimes(data.total_crimes || 0);
+      console.log('✓ Backend connected:', data.total_crimes, 'crimes');
+      return true;
     } catch (error) {
       console.error('❌ Backend connection failed:', error);
       setIsConnected(false);
@@ -120,6 +114,8 @@ export const useCrimeData = () => {
     crime_type?: string;
     start_date?: string;
     end_date?: string;
+    // Map viewport: [minLon, minLat, maxLon, maxLat]
+    bbox?: [number, number, number, number];
   }) => {
     try {
       const params = new URLSearchParams();
@@ -127,11 +123,9 @@ export const useCrimeData = () => {
       if (options?.crime_type) params.append('crime_type', options.crime_type);
       if (options?.start_date) params.append('start_date', options.start_date);
       if (options?.end_date) params.append('end_date', options.end_date);
+      if (options?.bbox) params.append('bbox', options.bbox.join(','));
 
-      const response = await fetch(`${API_BASE_URL}/crimes/all?${params}`);
-      if (!response.ok) throw new Error('Failed to fetch crime data');
-      
-      const data = await response.json();
+      const data = await fetchJson<CrimeData>(`${API_BASE_URL}/crimes/all?${params}`, 'Failed to fetch crime data');
       setCrimeData(data);
       console.log('✓ Loaded crime data:', data.metadata.count, 'crimes');
       return data;
@@ -144,10 +138,7 @@ export const useCrimeData = () => {
   // Load crime types
   const loadCrimeTypes = useCallback(async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/crimes/types`);
-      if (!response.ok) throw new Error('Failed to fetch crime types');
-      
-      const data = await response.json();
+      const data = await fetchJson<{ crime_types?: CrimeType[] }>(`${API_BASE_URL}/crimes/types`, 'Failed to fetch crime types');
       setCrimeTypes(data.crime_types || []);
       console.log('✓ Loaded crime types:', data.crime_types?.length || 0, 'types');
       return data.crime_types;
@@ -160,10 +151,7 @@ export const useCrimeData = () => {
   // Load monthly stats
   const loadMonthlyStats = useCallback(async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/stats/monthly`);
-      if (!response.ok) throw new Error('Failed to fetch monthly stats');
-      
-      const data = await response.json();
+      const data = await fetchJson<{ monthly_trends?: MonthlyTrend[] }>(`${API_BASE_URL}/stats/monthly`, 'Failed to fetch monthly stats');
       setMonthlyTrends(data.monthly_trends || []);
       console.log('✓ Loaded monthly trends:', data.monthly_trends?.length || 0, 'months');
       return data.monthly_trends;
@@ -185,10 +173,7 @@ export const useCrimeData = () => {
       if (options?.days) params.append('days', options.days.toString());
       if (options?.crime_type) params.append('crime_type', options.crime_type);
 
-      const response = await fetch(`${API_BASE_URL}/analysis/temporal/trends?${params}`);
-      if (!response.ok) throw new Error('Failed to fetch temporal trends');
-      
-      const data = await response.json();
+      const data = await fetchJson<{ trends?: TemporalTrend[] }>(`${API_BASE_URL}/analysis/temporal/trends?${params}`, 'Failed to fetch temporal trends');
       const trends = data.trends || [];
       console.log('✓ Loaded temporal trends:', trends.length, 'trends');
       return trends as TemporalTrend[];
@@ -201,10 +186,7 @@ export const useCrimeData = () => {
   // Load hourly distribution
   const loadHourlyDistribution = useCallback(async (days: number = 90) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/analysis/temporal/hourly?days=${days}`);
-      if (!response.ok) throw new Error('Failed to fetch hourly data');
-      
-      const data = await response.json();
+      const data = await fetchJson<HourlyData>(`${API_BASE_URL}/analysis/temporal/hourly?days=${days}`, 'Failed to fetch hourly data');
       console.log('✓ Loaded hourly data:', data.total_crimes || 0, 'crimes,', data.peak_hours?.length || 0, 'peak hours');
       return data as HourlyData;
     } catch (error) {
@@ -216,10 +198,7 @@ export const useCrimeData = () => {
   // Load 7-day forecast - FIXED: handle direct array response
   const load7DayForecast = useCallback(async (model: 'sma' | 'es' = 'sma') => {
     try {
-      const response = await fetch(`${API_BASE_URL}/forecast/short-term?model=${model}`);
-      if (!response.ok) throw new Error('Failed to fetch forecast');
-      
-      const data = await response.json();
+      const data = await fetchJson<unknown>(`${API_BASE_URL}/forecast/short-term?model=${model}`, 'Failed to fetch forecast');
       // Backend returns array directly, not wrapped in object
       const forecast = Array.isArray(data) ? data : [];
       console.log('✓ Loaded forecast:', forecast.length, 'days');
@@ -233,10 +212,7 @@ export const useCrimeData = () => {
   // Load risk assessment
   const loadRiskAssessment = useCallback(async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/forecast/risk-assessment`);
-      if (!response.ok) throw new Error('Failed to fetch risk assessment');
-      
-      const data = await response.json();
+      const data = await fetchJson<RiskAssessment>(`${API_BASE_URL}/forecast/risk-assessment`, 'Failed to fetch risk assessment');
       console.log('✓ Loaded risk assessment:', data.overall_risk, 'risk,', data.high_risk_areas?.length || 0, 'areas');
       return data as RiskAssessment;
     } catch (error) {
@@ -1,4 +1,6 @@
 // src/lib/api.ts
+import { fetchJson } from './conditional-fetch';
+
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
 
 // Type Definitions
@@ -52,6 +54,8 @@ export interface CrimeFilters {
   crime_type?: string;
   start_date?: string;
   end_date?: string;
+  // Map viewport: [minLon, minLat, maxLon, maxLat]
+  bbox?: [number, number, number, number];
 }
 
 export interface CrimeTypeDetail {
@@ -74,14 +78,8 @@ class CrimeAPIService {
 
   private async fetchWithErrorHandling<T>(url: string): Promise<T> {
     try {
-      const response = await fetch(url);
-      
-      if (!response.ok) {
-        const error = await response.json().catch(() => ({ error: 'Request failed' }));
-        throw new Error(error.error || `HTTP ${response.status}: ${response.statusText}`);
-      }
-      
-      return await response.json();
+      // Sends the last ETag back; unchanged data comes back as a bodiless 304
+      return await fetchJson<T>(url);
     } catch (error) {
       console.error('API Error:', error);
       throw error;
@@ -98,12 +96,25 @@ class CrimeAPIService {
     if (filters.crime_type) params.append('crime_type', filters.crime_type);
     if (filters.start_date) params.append('start_date', filters.start_date);
     if (filters.end_date) params.append('end_date', filters.end_date);
+    if (filters.bbox) params.append('bbox', filters.bbox.join(','));
     
     return this.fetchWithErrorHandling<CrimeGeoJSON>(
       `${this.baseURL}/api/crimes/all?${params}`
     );
   }
 
+  async searchCrimes(q: string, filters: CrimeFilters = {}): Promise<CrimeGeoJSON> {
+    const params = new URLSearchParams({ q });
+    if (filters.limit) params.append('limit', filters.limit.toString());
+    if (filters.crime_type) params.append('crime_type', filters.crime_type);
+    if (filters.start_date) params.append('start_date', filters.start_date);
+    if (filters.end_date) params.append('end_date', filters.end_date);
+
+    return this.fetchWithErrorHandling<CrimeGeoJSON>(
+      `${this.baseURL}/api/crimes/search?${params}`
+    );
+  }
+
   async getCrimeTypes(): Promise<{ crime_types: CrimeType[]; total_types: number }> {
     return this.fetchWithErrorHandling(
       `${this.baseURL}/api/crimes/types`
@@ -0,0 +1,55 @@
+// src/lib/conditional-fetch.ts
+// GET with HTTP validators: the API tags every response with an ETag (and
+// Last-Modified) that only changes when new data is ingested. The last body
+// is kept and revalidated with If-None-Match, so an unchanged poll is
+// answered 304 with no body and no database work.
+//
+// Only the latest URL of each endpoint path is kept: a poll repeats it,
+// while a new viewport or filter replaces it, so panning the map does not
+// pile up one GeoJSON body per bbox.
+
+interface Validated {
+  url: string;
+  etag: string | null;
+  lastModified: string | null;
+  data: unknown;
+}
+
+const validated = new Map<string, Validated>();
+
+function endpointPath(url: string): string {
+  return new URL(url, window.location.href).pathname;
+}
+
+export async function fetchJson<T>(url: string, errorMessage?: string): Promise<T> {
+  const path = endpointPath(url);
+  const entry = validated.get(path);
+  const previous = entry?.url === url ? entry : undefined;
+  const headers: Record<string, string> = {};
+  if (previous?.etag) headers['If-None-Match'] = previous.etag;
+  else if (previous?.lastModified) headers['If-Modified-Since'] = previous.lastModified;
+
+  // no-store: the validators are ours, the browser cache must not answer
+  const response = await fetch(url, { headers, cache: 'no-store' });
+
+  if (response.status === 304 && previous) {
+    return previous.data as T;
+  }
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({ error: 'Request failed' }));
+    throw new Error(
+      errorMessage || error.error || `HTTP ${response.status}: ${response.statusText}`
+    );
+  }
+
+  const data = await response.json();
+  const etag = response.headers.get('ETag');
+  const lastModified = response.headers.get('Last-Modified');
+  if (etag || lastModified) {
+    validated.set(path, { url, etag, lastModified, data });
+  } else if (previous) {
+    validated.delete(path);
+  }
+  return data as T;
+}